@@ -1,1765 +1,103 @@
-import csv
-import io
-import uuid
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, g
-from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
-from authlib.integrations.flask_client import OAuth
-from datetime import datetime, timedelta
+import importlib
 import os
-from functools import wraps
+import threading
+from datetime import datetime
+
+import click
 from dotenv import load_dotenv
-from garminconnect import Garmin
-import json
-try:
-    from PIL import Image
-    PILLOW_AVAILABLE = True
-except ImportError:
-    PILLOW_AVAILABLE = False
+from flask import Flask, current_app, g, session
+from flask.cli import with_appcontext
+from sqlalchemy import event
+
+import assets
+import backup
+import compression
+import profiling
+import querycheck
+from models import (
+    DailySummary, EXPORT_TABLES, INSTANCE_TABLES, PROFILE_FIELDS, RESTORE_KEYS, UPLOAD_FOLDER, User,
+    backfill_meal_foods, bump_data_version, db, refresh_daily_summaries, upgrade_daily_summaries
+)
 
 # Charger les variables d'environnement depuis .env
 load_dotenv()
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///wellness.db')
-
-# Fix pour Render.com qui utilise postgres:// au lieu de postgresql://
-if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
-    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-print("CLIENT_ID =", repr(os.environ.get("GOOGLE_CLIENT_ID")))
-print("SECRET    =", repr(os.environ.get("GOOGLE_CLIENT_SECRET")))
-
-# Configuration OAuth avec authlib
-oauth = OAuth(app)
-
-# IMPORTANT: Remplace ces valeurs par tes vraies clés Google
-GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
-GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
-
-google = oauth.register(
-    name='google',
-    client_id=GOOGLE_CLIENT_ID,
-    client_secret=GOOGLE_CLIENT_SECRET,
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={
-        'scope': 'openid email profile'
-    }
-)
-
-db = SQLAlchemy(app)
-
-# ----------------------------------------
-#  CORRESPONDANCE TYPES GARMIN → NUTRISTEP
-# ----------------------------------------
-
-GARMIN_ACTIVITY_MAP = {
-    'running':          'Course',
-    'course à pied':    'Course',
-    'trail_running':    'Course',
-    'cycling':          'Vélo',
-    'mountain_biking':  'Vélo',
-    'swimming':         'Natation',
-    'open_water_swimming': 'Natation',
-    'walking':          'Marche',
-    'hiking':           'Marche',
-    'strength_training': 'Musculation',
-    'yoga':             'Yoga',
-    'skiing':           'Ski',
-    'ski en station':   'Ski',
-    'ski alpin':                      'Ski',
-    'ski de fond':                    'Ski',
-    'snowboard':                      'Ski',
-    'resort_skiing_snowboarding': 'Ski',
-    'backcountry_skiing': 'Ski',
-    'cardio':                         'Autre',
-    'elliptical':                     'Autre',
+# Blueprints toujours enregistrés, puis sous-systèmes optionnels : leur module (et ce
+# qu'il importe) n'est chargé que si l'option de configuration est active
+BLUEPRINTS = ('auth', 'weight', 'meals', 'activities', 'measurements', 'api')
+OPTIONAL_BLUEPRINTS = {'garmin': 'GARMIN_ENABLED', 'photos': 'PHOTOS_ENABLED'}
+
+# Profil base de données : réglages appliqués selon le moteur (DB_PROFILE=stock pour les désactiver)
+DB_PROFILE = os.environ.get('DB_PROFILE', 'tuned')
+
+# SQLite : WAL pour que les lectures ne bloquent pas l'écriture, attente au lieu de
+# "database is locked" quand plusieurs workers gunicorn écrivent en même temps
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000)),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 20000)),  # négatif = en Kio
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    'temp_store': 'MEMORY',
 }
 
-def map_garmin_activity(garmin_type):
-    if not garmin_type:
-        return 'Autre'
-    garmin_lower = garmin_type.lower().strip()
-    # Chercher d'abord une correspondance exacte
-    if garmin_lower in GARMIN_ACTIVITY_MAP:
-        return GARMIN_ACTIVITY_MAP[garmin_lower]
-    # Sinon chercher si une clé est contenue dans le type
-    for key, value in GARMIN_ACTIVITY_MAP.items():
-        if key in garmin_lower or garmin_lower in key:
-            return value
-    return 'Autre'
-
-# ========================================
-# MODÈLES DE BASE DE DONNÉES
-# ========================================
-
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(255), nullable=True)  # Nullable pour les comptes Google
-    google_id = db.Column(db.String(255), unique=True, nullable=True)  # ID Google
-    theme = db.Column(db.String(20), default='green')  # Thème préféré de l'utilisateur
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    # Nouvelles colonnes profil
-    birth_date = db.Column(db.Date, nullable=True)
-    height = db.Column(db.Float, nullable=True)  # en cm
-    gender = db.Column(db.String(1), nullable=True)  # M/F
-    target_weight = db.Column(db.Float, nullable=True)  # en kg
-    track_meals = db.Column(db.Boolean, default=True, nullable=False)
-    track_activities = db.Column(db.Boolean, default=True, nullable=False)
-    enable_garmin_import = db.Column(db.Boolean, default=True, nullable=False)
-    track_measurements = db.Column(db.Boolean, default=False, nullable=False)
-    enable_secondary_measurements = db.Column(db.Boolean, default=False, nullable=False)
-    track_photos = db.Column(db.Boolean, default=False, nullable=False)
-    # Relations
-    weight_entries = db.relationship('WeightEntry', backref='user', lazy=True, cascade='all, delete-orphan')
-    meal_entries = db.relationship('MealEntry', backref='user', lazy=True, cascade='all, delete-orphan')
-    activity_entries = db.relationship('ActivityEntry', backref='user', lazy=True, cascade='all, delete-orphan')
-    body_measurements = db.relationship('BodyMeasurement', backref='user', lazy=True, cascade='all, delete-orphan')
-    photo_entries = db.relationship('PhotoEntry', backref='user', lazy=True, cascade='all, delete-orphan')
-    meal_favorites = db.relationship('MealFavorite', backref='user', lazy=True, cascade='all, delete-orphan')
-
-class WeightEntry(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    weight = db.Column(db.Float, nullable=False)
-    date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
-    note = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class MealEntry(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-
-    # Nouveau: 5 types de repas
-    meal_type = db.Column(db.String(20), nullable=False)
-    # Valeurs: breakfast, snack_morning, lunch, snack_afternoon, dinner
-
-    date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
-
-    # Nouveau: aliments (liste JSON)
-    foods = db.Column(db.Text)  # Stocké comme JSON ["yaourt", "pomme", ...]
-
-    # Nouveau: qualification
-    qualification = db.Column(db.String(20), default='normal')  # normal, exception, equilibrage
-
-    # Nouveau: si "rien" pour ce repas
-    is_none = db.Column(db.Boolean, default=False)
-
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-    def get_foods_list(self):
-        """Retourne la liste des aliments"""
-        import json
-        if self.foods:
-            return json.loads(self.foods)
-        return []
-
-    def set_foods_list(self, foods_list):
-        """Définit la liste des aliments"""
-        import json
-        self.foods = json.dumps(foods_list)
-
-class ActivityEntry(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    activity_type = db.Column(db.String(100), nullable=False)
-    duration = db.Column(db.Integer, nullable=False)  # en minutes
-    steps = db.Column(db.Integer, nullable=True)  # Nombre de pas (pour type "Pas")
-    calories_burned = db.Column(db.Integer)
-    date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
-    note = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class BodyMeasurement(db.Model):
-    __tablename__ = 'body_measurements'
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    date = db.Column(db.Date, nullable=False)
-
-    # Mesures essentielles
-    waist = db.Column(db.Float, nullable=True)      # Tour de taille (cm)
-    hips = db.Column(db.Float, nullable=True)       # Tour de hanches (cm)
-    thigh = db.Column(db.Float, nullable=True)      # Tour de cuisse (cm)
-
-    # Mesures secondaires (optionnelles)
-    arm = db.Column(db.Float, nullable=True)        # Tour de bras (cm)
-    chest = db.Column(db.Float, nullable=True)      # Tour de poitrine (cm)
-    calf = db.Column(db.Float, nullable=True)       # Tour de mollet (cm)
-
-    note = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class PhotoEntry(db.Model):
-    __tablename__ = 'photo_entries'
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    date = db.Column(db.Date, nullable=False)
-    angle = db.Column(db.String(20), nullable=False)
-    # face, profil_g, profil_d, dos, ventre
-    filename = db.Column(db.String(200), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-PHOTO_ANGLES = [
-    ('visage',  'Visage',        'De face, cadre tête et épaules'),
-    ('ventre',  'Ventre',        'De profil, zone abdomen/taille'),
-    ('totale',  'Silhouette',    'De face, corps entier'),
-]
-
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads', 'photos')
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'heic'}
-
-class MealFavorite(db.Model):
-    __tablename__ = 'meal_favorites'
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    name = db.Column(db.String(100), nullable=False)
-    meal_type = db.Column(db.String(20), nullable=False)
-    foods = db.Column(db.Text, nullable=False)  # JSON
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-    def get_foods_list(self):
-        return json.loads(self.foods) if self.foods else []
-
-    def set_foods_list(self, foods_list):
-        self.foods = json.dumps(foods_list, ensure_ascii=False)
-
-# ========================================
-# DÉCORATEUR POUR PROTÉGER LES ROUTES
-# ========================================
-
-def login_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Veuillez vous connecter pour accéder à cette page.', 'warning')
-            return redirect(url_for('login'))
-        return f(*args, **kwargs)
-    return decorated_function
-
-# ========================================
-# ROUTES D'AUTHENTIFICATION GOOGLE
-# ========================================
-
-@app.route('/login/google')
-def google_login():
-    redirect_uri = url_for('google_authorized', _external=True)
-    return google.authorize_redirect(redirect_uri)
-
-
-@app.route('/login/google/authorized')
-def google_authorized():
-    try:
-        token = google.authorize_access_token()
-        user_info = token.get('userinfo')
-
-        if not user_info:
-            flash('Impossible de récupérer les informations depuis Google.', 'danger')
-            return redirect(url_for('login'))
-
-        google_id = user_info['sub']
-        email = user_info['email']
-        name = user_info.get('name', email.split('@')[0])
-
-        # Chercher si l'utilisateur existe déjà
-        user = User.query.filter_by(google_id=google_id).first()
-
-        if not user:
-            # Chercher par email (au cas où l'utilisateur a créé un compte classique avant)
-            user = User.query.filter_by(email=email).first()
-            if user:
-                # Lier le compte existant à Google
-                user.google_id = google_id
-            else:
-                # Créer un nouveau compte
-                # Générer un username unique
-                base_username = name.lower().replace(' ', '')
-                username = base_username
-                counter = 1
-                while User.query.filter_by(username=username).first():
-                    username = f"{base_username}{counter}"
-                    counter += 1
-
-                user = User(
-                    username=username,
-                    email=email,
-                    google_id=google_id,
-                    password_hash=None  # Pas de mot de passe pour les comptes Google
-                )
-                db.session.add(user)
-
-            db.session.commit()
-
-        # Connecter l'utilisateur
-        session['user_id'] = user.id
-        session['username'] = user.username
-        flash(f'Bienvenue {user.username} !', 'success')
-        return redirect(url_for('dashboard'))
-
-    except Exception as e:
-        flash(f'Erreur lors de la connexion avec Google: {str(e)}', 'danger')
-        return redirect(url_for('login'))
-
-# ========================================
-# ROUTES D'AUTHENTIFICATION CLASSIQUES
-# ========================================
-
-@app.route('/')
-def index():
-    if 'user_id' in session:
-        return redirect(url_for('dashboard'))
-    return redirect(url_for('login'))
-
-@app.route('/login')
-def login():
-    # Si déjà connecté, rediriger vers le dashboard
-    if 'user_id' in session:
-        return redirect(url_for('dashboard'))
-
-    # Afficher la page de login Google uniquement
-    return render_template('login.html', theme='green')
-
-
-
-"""
-@app.route('/register', methods=['GET', 'POST'])
-def register():
-    if request.method == 'POST':
-        username = request.form.get('username')
-        email = request.form.get('email')
-        password = request.form.get('password')
-        password_confirm = request.form.get('password_confirm')
-
-        if password != password_confirm:
-            flash('Les mots de passe ne correspondent pas.', 'danger')
-            return render_template('register.html', theme='green')
-
-        if User.query.filter_by(username=username).first():
-            flash('Ce nom d\'utilisateur existe déjà.', 'danger')
-            return render_template('register.html', theme='green')
-
-        if User.query.filter_by(email=email).first():
-            flash('Cet email est déjà utilisé.', 'danger')
-            return render_template('register.html', theme='green')
-
-        new_user = User(
-            username=username,
-            email=email,
-            password_hash=generate_password_hash(password)
-        )
-        db.session.add(new_user)
-        db.session.commit()
-
-        flash('Compte créé avec succès ! Vous pouvez maintenant vous connecter.', 'success')
-        return redirect(url_for('login'))
-
-    return render_template('register.html', theme='green')
-"""
-@app.route('/logout')
-def logout():
-    session.clear()
-    flash('Vous êtes déconnecté.', 'info')
-    return redirect(url_for('login'))
-
-
-@app.route('/api/change-theme', methods=['POST'])
-@login_required
-def change_theme():
-    data = request.get_json()
-    theme = data.get('theme', 'green')
-
-    # Valider le thème
-    if theme not in ['green', 'ocean', 'sunset']:
-        return jsonify({'error': 'Invalid theme'}), 400
-
-    # Mettre à jour le thème de l'utilisateur
-    user = User.query.get(session['user_id'])
-    user.theme = theme
-    db.session.commit()
-
-    return jsonify({'success': True})
-
-# ========================================
-# ROUTES PRINCIPALES
-# ========================================
-@app.route('/dashboard')
-@login_required
-def dashboard():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-    today = datetime.utcnow().date()
-    thirty_days_ago = today - timedelta(days=30)
-
-    # Poids actuel
-    latest_weight = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.desc()).first()
-
-    # Poids de départ
-    first_weight = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.asc()).first()
-
-    # Poids saisi aujourd'hui (pour afficher/masquer le bouton)
-    today_weight = WeightEntry.query.filter_by(user_id=user_id, date=today).first()
-
-    # Historique poids (30 derniers jours)
-    weight_history = WeightEntry.query.filter(
-        WeightEntry.user_id == user_id,
-        WeightEntry.date >= thirty_days_ago
-    ).order_by(WeightEntry.date).all()
-
-    # Statistiques d'évolution du poids
-    weight_stats = None
-    if latest_weight and first_weight and first_weight.id != latest_weight.id:
-        days_tracking = (latest_weight.date - first_weight.date).days or 1
-        total_loss = latest_weight.weight - first_weight.weight
-        avg_per_week = (total_loss / days_tracking) * 7
-        avg_per_month = (total_loss / days_tracking) * 30
-        weight_stats = {
-            'total_loss': total_loss,
-            'avg_per_week': avg_per_week,
-            'avg_per_month': avg_per_month,
-            'days_tracking': days_tracking
+def engine_options(uri):
+    """Options du moteur SQLAlchemy selon la base et le profil."""
+    if DB_PROFILE != 'tuned':
+        return {}
+    if uri.startswith('sqlite'):
+        return {'connect_args': {'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000}}
+    if uri.startswith('postgresql'):
+        return {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+            'pool_timeout': 10,
+            'pool_pre_ping': True,   # connexions coupées par l'hébergeur après inactivité
+            'pool_recycle': 300,
         }
+    return {}
 
-    # Mesures corporelles (30 derniers jours)
-    latest_measurements = []
-    if user.track_measurements:
-        latest_measurements = BodyMeasurement.query.filter(
-            BodyMeasurement.user_id == user_id,
-            BodyMeasurement.date >= thirty_days_ago
-        ).order_by(BodyMeasurement.date).all()
-
-    # Repas d'aujourd'hui
-    today_meals = MealEntry.query.filter_by(user_id=user_id, date=today).all()
-
-    # Rappel photo mensuel
-    photo_reminder = False
-    if user.track_photos:
-        first_day_month = today.replace(day=1)
-        photo_this_month = PhotoEntry.query.filter(
-            PhotoEntry.user_id == user_id,
-            PhotoEntry.date >= first_day_month
-        ).first()
-        photo_reminder = photo_this_month is None
-
-    return render_template('dashboard.html',
-                         latest_weight=latest_weight,
-                         first_weight=first_weight,
-                         today_weight=today_weight,
-                         weight_history=weight_history,
-                         weight_stats=weight_stats,
-                         today_meals=today_meals,
-                         latest_measurements=latest_measurements,
-                         photo_reminder=photo_reminder,
-                         user=user,
-                         today=today,
-                         theme=user.theme)
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Écouteur 'connect' du moteur de l'application (SQLite, profil tuned)."""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {pragma} = {value}')
+    cursor.close()
 
 # ========================================
-# ROUTES POIDS
+# INITIALISATION ET COMMANDES
 # ========================================
 
-@app.route('/weight')
-@login_required
-def weight():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-    today = datetime.utcnow().date()
-
-    # Récupérer toutes les entrées
-    entries = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.desc()).all()
-
-    # Vérifier si déjà saisi aujourd'hui
-    weight_today = WeightEntry.query.filter_by(user_id=user_id, date=today).first()
-
-    # Récupérer le dernier poids pour le pré-remplir
-    last_weight = entries[0].weight if entries else None
-
-    # Calculer le nombre de jours depuis la dernière saisie
-    days_since_last_entry = None
-    if entries and not weight_today:
-        last_entry_date = entries[0].date
-        days_since_last_entry = (today - last_entry_date).days
-
-    # Message d'encouragement basé sur l'évolution
-    weight_evolution_message = None
-    weight_evolution_style = None
-
-    if len(entries) >= 7:
-        latest_weight = entries[0].weight
-        previous_weight = entries[1].weight
-        diff = latest_weight - previous_weight
-
-        if diff < -0.2:  # Baisse significative
-            weight_evolution_message = f"🎉 Bravo ! Tu as perdu {abs(diff):.1f} kg depuis ta dernière pesée ! Continue comme ça ! 💪"
-            weight_evolution_style = "background: linear-gradient(135deg, #dcfce7, #bbf7d0); border-left: 4px solid #10b981; color: #065f46"
-        elif diff > 0.2:  # Hausse
-            weight_evolution_message = f"💙 Pas de panique ! +{diff:.1f} kg, ça arrive. L'important c'est de continuer, tu vas y arriver ! 🌟"
-            weight_evolution_style = "background: linear-gradient(135deg, #dbeafe, #bfdbfe); border-left: 4px solid #3b82f6; color: #1e3a8a"
-        elif abs(diff) <= 0.2:  # Stable
-            weight_evolution_message = f"✨ Poids stable ! C'est bien, tu maintiens le cap. Continue tes efforts ! 🎯"
-            weight_evolution_style = "background: linear-gradient(135deg, #fef3c7, #fde68a); border-left: 4px solid #f59e0b; color: #92400e"
-
-    # Préparer les données pour le graphique (toutes les données)
-    all_entries = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date).all()
-    all_dates = [entry.date.strftime('%d/%m') for entry in all_entries]
-    all_weights = [entry.weight for entry in all_entries]
-
-    return render_template('weight.html',
-                         entries=entries,
-                         weight_today=weight_today,
-                         last_weight=last_weight,
-                         days_since_last_entry=days_since_last_entry,
-                         weight_evolution_message=weight_evolution_message,
-                         weight_evolution_style=weight_evolution_style,
-                         all_dates=all_dates,
-                         all_weights=all_weights,
-                         today=today,
-                         theme=user.theme)
-
-@app.route('/weight/add', methods=['POST'])
-@login_required
-def add_weight():
-    user_id = session['user_id']
-    today = datetime.utcnow().date()
-
-    # Vérifier si déjà saisi aujourd'hui
-    existing_entry = WeightEntry.query.filter_by(user_id=user_id, date=today).first()
-    if existing_entry:
-        flash('Tu as déjà enregistré ton poids aujourd\'hui !', 'warning')
-        return redirect(url_for('weight'))
-
-    weight = float(request.form.get('weight'))
-
-    # Validation
-    if weight < 30 or weight > 300:
-        flash('Le poids doit être entre 30 et 300 kg.', 'danger')
-        return redirect(url_for('weight'))
-
-    new_entry = WeightEntry(
-        user_id=user_id,
-        weight=weight,
-        date=today,
-        note=None  # Plus de notes
-    )
-    db.session.add(new_entry)
-    db.session.commit()
-
-    flash('Poids enregistré avec succès ! 🎉', 'success')
-    return redirect(url_for('weight'))
-
-@app.route('/weight/delete/<int:entry_id>', methods=['POST'])
-@login_required
-def delete_weight(entry_id):
-    user_id = session['user_id']
-    today = datetime.utcnow().date()
-
-    entry = WeightEntry.query.get_or_404(entry_id)
-
-    # Vérifier que c'est bien l'utilisateur
-    if entry.user_id != user_id:
-        flash('Erreur : cette pesée ne vous appartient pas.', 'error')
-        return redirect(url_for('weight'))
-
-    # Vérifier que c'est la pesée du jour
-    if entry.date != today:
-        flash('❌ Tu ne peux supprimer que la pesée du jour.', 'warning')
-        return redirect(url_for('weight'))
-
-    db.session.delete(entry)
-    db.session.commit()
-
-    flash('✅ Pesée du jour supprimée.', 'success')
-    return redirect(url_for('weight'))
-
-
-# ========================================
-# ROUTES REPAS
-# ========================================
-
-@app.route('/meals')
-@login_required
-def meals():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    # Gérer l'offset de mois (navigation)
-    month_offset = int(request.args.get('month_offset', 0))
-
-    # Calculer le mois à afficher
-    today = datetime.utcnow().date()
-
-    # Premier jour du mois actuel + offset
-    first_day_current_month = today.replace(day=1)
-
-    # Ajouter l'offset de mois
-    target_month = first_day_current_month.month + month_offset
-    target_year = first_day_current_month.year
-
-    while target_month > 12:
-        target_month -= 12
-        target_year += 1
-    while target_month < 1:
-        target_month += 12
-        target_year -= 1
-
-    first_day_month = first_day_current_month.replace(year=target_year, month=target_month, day=1)
-
-    # Dernier jour du mois
-    if target_month == 12:
-        last_day_month = first_day_month.replace(year=target_year + 1, month=1, day=1) - timedelta(days=1)
-    else:
-        last_day_month = first_day_month.replace(month=target_month + 1, day=1) - timedelta(days=1)
-
-    # Trouver le lundi avant le 1er du mois (pour la grille)
-    days_since_monday = first_day_month.weekday()
-    grid_start = first_day_month - timedelta(days=days_since_monday)
-
-    # Trouver le dimanche après la fin du mois
-    days_until_sunday = 6 - last_day_month.weekday()
-    grid_end = last_day_month + timedelta(days=days_until_sunday)
-
-    # Préparer les données pour chaque jour de la grille
-    month_days = []
-    current_date = grid_start
-
-    while current_date <= grid_end:
-        # Récupérer les repas de ce jour
-        day_meals = MealEntry.query.filter_by(
-            user_id=user_id,
-            date=current_date
-        ).all()
-
-        # Organiser par type de repas
-        meals_by_type = {
-            'breakfast': None,
-            'snack_morning': None,
-            'lunch': None,
-            'snack_afternoon': None,
-            'dinner': None
-        }
-
-        for meal in day_meals:
-            meals_by_type[meal.meal_type] = {
-                'foods': meal.get_foods_list(),
-                'qualification': meal.qualification,
-                'is_none': meal.is_none
-            }
-
-        # Critère VERT : Les 3 repas principaux (breakfast, lunch, dinner) sont remplis
-        main_meals = ['breakfast', 'lunch', 'dinner']
-        main_meals_filled = all(meals_by_type[t] is not None for t in main_meals)
-        is_complete = main_meals_filled
-
-        # A des repas = au moins un repas rempli
-        has_meals = any(meals_by_type[t] is not None for t in meals_by_type)
-
-        # Compter les exceptions et équilibrages
-        exception_count = sum(1 for m in day_meals if m.qualification == 'exception')
-        equilibrage_count = sum(1 for m in day_meals if m.qualification == 'equilibrage')
-
-        month_days.append({
-            'date': current_date,
-            'is_today': current_date == today,
-            'other_month': current_date.month != target_month,
-            'meals': meals_by_type,
-            'is_complete': is_complete,
-            'has_meals': has_meals,
-            'exception_count': exception_count,
-            'equilibrage_count': equilibrage_count
-        })
-
-        current_date += timedelta(days=1)
-
-    # Récupérer l'historique des aliments pour l'autocomplétion
-    all_user_meals = MealEntry.query.filter_by(user_id=user_id).all()
-    food_history = set()
-    for meal in all_user_meals:
-        if meal.foods:
-            food_history.update(meal.get_foods_list())
-
-    # Noms des mois en français
-    month_names = ['', 'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
-                   'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
-
-    return render_template('meals.html',
-                         month_days=month_days,
-                         month_name=month_names[target_month],
-                         year=target_year,
-                         month_offset=month_offset,
-                         food_history=list(food_history),
-                         theme=user.theme)
-
-@app.route('/meals/recap')
-@login_required
-def meals_recap():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    # Récupérer les dates depuis les paramètres (par défaut: 2 dernières semaines)
-    today = datetime.utcnow().date()
-    default_start = today - timedelta(days=14)
-
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-
-    if start_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-    else:
-        start_date = default_start
-
-    if end_date_str:
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-    else:
-        end_date = today
-
-    # Récupérer tous les repas de la période
-    all_meals = MealEntry.query.filter(
-        MealEntry.user_id == user_id,
-        MealEntry.date >= start_date,
-        MealEntry.date <= end_date
-    ).all()
-
-    # Organiser par jour
-    meals_by_date = {}
-    for meal in all_meals:
-        if meal.date not in meals_by_date:
-            meals_by_date[meal.date] = {}
-        meals_by_date[meal.date][meal.meal_type] = {
-            'foods': meal.get_foods_list(),
-            'qualification': meal.qualification,
-            'is_none': meal.is_none
-        }
-
-    # Préparer les données jour par jour
-    days_data = []
-    current_date = start_date
-    day_names_fr = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-
-    while current_date <= end_date:
-        day_meals = meals_by_date.get(current_date, {})
-
-        # Organiser par type
-        meals_organized = {
-            'breakfast': day_meals.get('breakfast'),
-            'snack_morning': day_meals.get('snack_morning'),
-            'lunch': day_meals.get('lunch'),
-            'snack_afternoon': day_meals.get('snack_afternoon'),
-            'dinner': day_meals.get('dinner')
-        }
-
-        days_data.append({
-            'date': current_date,
-            'day_name': day_names_fr[current_date.weekday()],
-            'is_today': current_date == today,
-            'meals': meals_organized
-        })
-
-        current_date += timedelta(days=1)
-
-    # Calculer les statistiques
-    days_with_meals = sum(1 for day in days_data if any(day['meals'].values()))
-
-    complete_days = 0
-    for day in days_data:
-        main_meals = ['breakfast', 'lunch', 'dinner']
-        if all(day['meals'][t] is not None for t in main_meals):
-            complete_days += 1
-
-    total_exceptions = sum(1 for meal in all_meals if meal.qualification == 'exception')
-    total_equilibrages = sum(1 for meal in all_meals if meal.qualification == 'equilibrage')
-
-    # Détecter si on a des encas ou goûters AVEC DES ALIMENTS (pas juste "rien")
-    has_snack_morning = any(
-        meal.meal_type == 'snack_morning' and not meal.is_none and meal.foods
-        for meal in all_meals
-    )
-    has_snack_afternoon = any(
-        meal.meal_type == 'snack_afternoon' and not meal.is_none and meal.foods
-        for meal in all_meals
-    )
-
-    # ========================================
-    # RÉCUPÉRER LES ACTIVITÉS ET LES ORGANISER PAR JOUR
-    # ========================================
-    activities = ActivityEntry.query.filter(
-        ActivityEntry.user_id == user_id,
-        ActivityEntry.date >= start_date,
-        ActivityEntry.date <= end_date
-    ).order_by(ActivityEntry.date).all()
-
-    # Organiser les activités par date
-    activities_by_date = {}
-    for activity in activities:
-        if activity.date not in activities_by_date:
-            activities_by_date[activity.date] = []
-        activities_by_date[activity.date].append({
-            'activity_type': activity.activity_type,
-            'duration': activity.duration,
-            'steps': activity.steps or 0,
-            'calories_burned': activity.calories_burned,
-            'note': activity.note
-        })
-
-    # Ajouter les activités dans days_data
-    for day in days_data:
-        day['activities'] = activities_by_date.get(day['date'], [])
-
-    # Statistiques activités
-    activities_stats = {
-        'total_count': len(activities),
-        'total_steps': sum(a.steps or 0 for a in activities),
-        'total_calories': sum(a.calories_burned or 0 for a in activities)
-    }
-
-    stats = {
-        'days_with_meals': days_with_meals,
-        'complete_days': complete_days,
-        'total_exceptions': total_exceptions,
-        'total_equilibrages': total_equilibrages
-    }
-
-    return render_template('meals_recap.html',
-                         days_data=days_data,
-                         start_date=start_date,
-                         end_date=end_date,
-                         stats=stats,
-                         has_snack_morning=has_snack_morning,
-                         has_snack_afternoon=has_snack_afternoon,
-                         activities_stats=activities_stats,
-                         current_user=user,
-                         theme=user.theme)
-
-
-
-
-@app.route('/api/get-day-meals')
-@login_required
-def get_day_meals():
-    user_id = session['user_id']
-    date_str = request.args.get('date')
-    date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-    # Récupérer les repas de ce jour
-    day_meals = MealEntry.query.filter_by(
-        user_id=user_id,
-        date=date
-    ).all()
-
-    # Organiser par type
-    meals_by_type = {
-        'breakfast': {'foods': [], 'qualification': 'normal', 'is_none': False},
-        'snack_morning': {'foods': [], 'qualification': 'normal', 'is_none': False},
-        'lunch': {'foods': [], 'qualification': 'normal', 'is_none': False},
-        'snack_afternoon': {'foods': [], 'qualification': 'normal', 'is_none': False},
-        'dinner': {'foods': [], 'qualification': 'normal', 'is_none': False}
-    }
-
-    for meal in day_meals:
-        meals_by_type[meal.meal_type] = {
-            'foods': meal.get_foods_list(),
-            'qualification': meal.qualification,
-            'is_none': meal.is_none
-        }
-
-    return jsonify({
-        'date': date_str,
-        'meals': meals_by_type
-    })
-
-@app.route('/meals/save-day', methods=['POST'])
-@login_required
-def save_day_meals():
-    user_id = session['user_id']
-    date_str = request.form.get('date')
-    date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-    meal_types = ['breakfast', 'snack_morning', 'lunch', 'snack_afternoon', 'dinner']
-
-    # Supprimer les anciens repas de ce jour
-    MealEntry.query.filter_by(user_id=user_id, date=date).delete()
-
-    # Sauvegarder les nouveaux repas
-    for meal_type in meal_types:
-        # Vérifier si "rien"
-        is_none = request.form.get(f'{meal_type}_none') == 'on'
-
-        # Récupérer les aliments
-        foods = request.form.getlist(f'{meal_type}_food[]')
-        foods = [f.strip() for f in foods if f.strip()]
-
-        # Récupérer la qualification
-        qualification = request.form.get(f'{meal_type}_qualification', 'normal')
-
-        # Créer l'entrée seulement si "rien" OU au moins un aliment
-        if is_none or len(foods) > 0:
-            meal_entry = MealEntry(
-                user_id=user_id,
-                meal_type=meal_type,
-                date=date,
-                is_none=is_none,
-                qualification=qualification
-            )
-            meal_entry.set_foods_list(foods)
-            db.session.add(meal_entry)
-
-    db.session.commit()
-
-    return jsonify({'success': True})
-
-
-# ========================================
-# ROUTES ACTIVITÉS
-# ========================================
-
-@app.route('/activities')
-@login_required
-def activities():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-    today = datetime.utcnow().date()
-    entries = ActivityEntry.query.filter_by(user_id=user_id).order_by(
-        ActivityEntry.date.desc(),
-        ActivityEntry.created_at.desc()
-    ).all()
-
-    # Statistiques générales
-    week_ago = today - timedelta(days=7)
-    week_count = ActivityEntry.query.filter(
-        ActivityEntry.user_id == user_id,
-        ActivityEntry.date >= week_ago
-    ).count()
-    total_steps = sum(entry.steps or 0 for entry in entries)
-    total_calories = sum(entry.calories_burned or 0 for entry in entries)
-    stats = {
-        'week_count': week_count,
-        'total_steps': total_steps,
-        'total_calories': total_calories
-    }
-
-    # Données graphique pas (30 derniers jours)
-    thirty_days_ago = today - timedelta(days=30)
-    recent_entries = ActivityEntry.query.filter(
-        ActivityEntry.user_id == user_id,
-        ActivityEntry.date >= thirty_days_ago
-    ).order_by(ActivityEntry.date.asc()).all()
-
-    # Construire les listes dates/pas pour le graphique
-    steps_by_date = {}
-    activities_by_date = {}
-    for entry in recent_entries:
-        date_str = entry.date.strftime('%d/%m')
-        if entry.activity_type == 'Pas':
-            steps_by_date[date_str] = (steps_by_date.get(date_str, 0) + (entry.steps or 0))
-        else:
-            if date_str not in activities_by_date:
-                activities_by_date[date_str] = []
-            activities_by_date[date_str].append({
-                'type': entry.activity_type,
-                'duration': entry.duration,
-                'calories': entry.calories_burned
-            })
-
-    # Générer toutes les dates des 30 derniers jours
-    all_dates = []
-    all_steps = []
-    for i in range(30):
-        d = thirty_days_ago + timedelta(days=i)
-        date_str = d.strftime('%d/%m')
-        all_dates.append(date_str)
-        all_steps.append(steps_by_date.get(date_str, 0))
-
-    steps_data = {'dates': all_dates, 'steps': all_steps}
-
-    non_zero = [s for s in all_steps if s > 0]
-    steps_stats = {'average': int(sum(non_zero) / len(non_zero)) if non_zero else 0}
-
-    return render_template('activities.html',
-                         entries=entries,
-                         today=today,
-                         stats=stats,
-                         steps_data=steps_data,
-                         steps_stats=steps_stats,
-                         activities_by_date=activities_by_date,
-                         user=user,
-                         theme=user.theme)
-
-@app.route('/activities/add', methods=['POST'])
-@login_required
-def add_activity():
-    user_id = session['user_id']
-    activity_type = request.form.get('activity_type')
-    date_str = request.form.get('date')
-    note = request.form.get('note', '')
-
-    date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-    # Pour le type "Pas"
-    if activity_type == 'Pas':
-        steps = int(request.form.get('steps', 0))
-        duration = 0
-        calories_burned = None
-
-        new_entry = ActivityEntry(
-            user_id=user_id,
-            activity_type=activity_type,
-            duration=duration,
-            steps=steps,
-            calories_burned=calories_burned,
-            date=date,
-            note=note
-        )
-    else:
-        # Pour les autres activités
-        duration = int(request.form.get('duration', 0))
-        calories_burned = request.form.get('calories_burned')
+# Workers gthread : les premières requêtes arrivent en parallèle, une seule crée les tables
+_tables_lock = threading.Lock()
 
-        new_entry = ActivityEntry(
-            user_id=user_id,
-            activity_type=activity_type,
-            duration=duration,
-            steps=None,
-            calories_burned=int(calories_burned) if calories_burned else None,
-            date=date,
-            note=note
-        )
-
-    db.session.add(new_entry)
-    db.session.commit()
-
-    flash('Activité enregistrée !', 'success')
-    return redirect(url_for('activities'))
-
-@app.route('/activities/delete/<int:id>')
-@login_required
-def delete_activity(id):
-    entry = ActivityEntry.query.get_or_404(id)
-    if entry.user_id != session['user_id']:
-        flash('Action non autorisée.', 'danger')
-        return redirect(url_for('activities'))
-
-    db.session.delete(entry)
-    db.session.commit()
-    flash('Activité supprimée.', 'info')
-    return redirect(url_for('activities'))
-
-
-
-# ----------------------------------------
-# ROUTE : PAGE D'IMPORT GARMIN
-# ----------------------------------------
-
-@app.route('/garmin')
-@login_required
-def garmin_import():
-    user = User.query.get(session['user_id'])
-    return render_template('garmin_import.html',
-                         pending_data=None,
-                         theme=user.theme)
-
-
-@app.route('/garmin/fetch', methods=['POST'])
-@login_required
-def garmin_fetch():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    email = request.form.get('garmin_email')
-    password = request.form.get('garmin_password')
-    import_days = int(request.form.get('import_days', 14))
-
-    today = datetime.utcnow().date()
-    start_date = today - timedelta(days=import_days)
-
-    try:
-        # Connexion à Garmin Connect
-        api = Garmin(email, password)
-        api.login()
-
-        pending_data = {
-            'steps': [],
-            'activities': []
-        }
-
-        # ---- RÉCUPÉRER LES PAS QUOTIDIENS ----
-        current = start_date
-        while current <= today:
-            try:
-                steps_data = api.get_steps_data(current.isoformat())
-                # Sommer tous les pas de la journée
-                total_steps = sum(
-                    item.get('steps', 0)
-                    for item in steps_data
-                    if item.get('steps')
-                )
-
-                if total_steps > 0:
-                    # Vérifier si déjà importé
-                    already_exists = ActivityEntry.query.filter_by(
-                        user_id=user_id,
-                        activity_type='Pas',
-                        date=current
-                    ).first() is not None
-
-                    pending_data['steps'].append({
-                        'date': current.isoformat(),
-                        'steps': total_steps,
-                        'already_exists': already_exists
-                    })
-            except Exception:
-                pass
-            current += timedelta(days=1)
-
-        # ---- RÉCUPÉRER LES ACTIVITÉS ----
-        try:
-            activities = api.get_activities_by_date(
-                start_date.isoformat(),
-                today.isoformat()
-            )
-
-            for act in activities:
-                garmin_id = str(act.get('activityId', ''))
-
-                # Type d'activité
-                activity_type_raw = act.get('activityType', {}).get('typeKey', 'other')
-                activity_type = map_garmin_activity(activity_type_raw)
-
-                # Durée en minutes
-                duration_seconds = act.get('duration', 0)
-                duration_minutes = round(duration_seconds / 60) if duration_seconds else 0
-
-                # Calories
-                calories = act.get('calories', None)
-                if calories:
-                    calories = round(calories)
-
-                # Date
-                start_time = act.get('startTimeLocal', '')
-                activity_date = start_time[:10] if start_time else today.isoformat()
-
-                # Vérifier si déjà importé (même date + même type + même durée)
-                act_date = datetime.strptime(activity_date, '%Y-%m-%d').date()
-                already_exists = ActivityEntry.query.filter_by(
-                    user_id=user_id,
-                    activity_type=activity_type,
-                    date=act_date,
-                    duration=duration_minutes
-                ).first() is not None
-
-                pending_data['activities'].append({
-                    'garmin_id': garmin_id,
-                    'date': activity_date,
-                    'activity_type': activity_type,
-                    'activity_type_raw': activity_type_raw,
-                    'duration': duration_minutes,
-                    'calories': calories,
-                    'already_exists': already_exists
-                })
-        except Exception as e:
-            flash(f'Erreur lors de la récupération des activités : {str(e)}', 'warning')
-
-        return render_template('garmin_import.html',
-                             pending_data=pending_data,
-                             theme=user.theme)
-
-    except Exception as e:
-        flash(f'Erreur de connexion Garmin : {str(e)}', 'error')
-        return render_template('garmin_import.html',
-                             pending_data=None,
-                             theme=user.theme)
-
-@app.route('/garmin-csv')
-@login_required
-def garmin_csv_import():
-    user = User.query.get(session['user_id'])
-    return render_template('garmin_csv_import.html',
-                         pending_data=None,
-                         theme=user.theme)
-
-
-@app.route('/garmin-csv/parse', methods=['POST'])
-@login_required
-def garmin_csv_parse():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    pending_data = {'steps': [], 'activities': []}
-
-    # ---- PARSING DU CSV DES PAS ----
-    steps_file = request.files.get('steps_csv')
-    if steps_file and steps_file.filename:
-        try:
-            content = steps_file.read().decode('utf-8-sig')  # utf-8-sig gère le BOM
-            reader = csv.DictReader(io.StringIO(content))
-
-            for row in reader:
-                # Garmin utilise différents noms de colonnes selon la langue
-                date_val = (row.get('Date') or row.get('CalendarDate') or
-                           row.get('date') or '').strip()
-                steps_val = (row.get('Steps') or row.get('Pas') or
-                            row.get('steps') or '0').strip()
-
-                if not date_val:
-                    continue
-
-                try:
-                    # Nettoyer le nombre de pas (enlever virgules/espaces)
-                    steps_clean = int(steps_val.replace(',', '').replace(' ', '').replace('\xa0', ''))
-                    if steps_clean <= 0:
-                        continue
-
-                    # Parser la date (formats possibles : YYYY-MM-DD ou DD/MM/YYYY)
-                    try:
-                        date_obj = datetime.strptime(date_val, '%Y-%m-%d').date()
-                    except ValueError:
-                        date_obj = datetime.strptime(date_val, '%d/%m/%Y').date()
-
-                    # Vérifier si déjà importé
-                    already_exists = ActivityEntry.query.filter_by(
-                        user_id=user_id,
-                        activity_type='Pas',
-                        date=date_obj
-                    ).first() is not None
-
-                    pending_data['steps'].append({
-                        'date': date_obj.isoformat(),
-                        'steps': steps_clean,
-                        'already_exists': already_exists
-                    })
-                except (ValueError, AttributeError):
-                    continue
-
-            # Trier par date décroissante
-            pending_data['steps'].sort(key=lambda x: x['date'], reverse=True)
-
-        except Exception as e:
-            flash(f'Erreur lecture fichier pas : {str(e)}', 'warning')
-
-    # ---- PARSING DU CSV DES ACTIVITÉS ----
-    activities_file = request.files.get('activities_csv')
-    if activities_file and activities_file.filename:
-        try:
-            content = activities_file.read().decode('utf-8-sig')
-            reader = csv.DictReader(io.StringIO(content))
-
-            for row in reader:
-                # Colonnes Garmin activités (EN/FR)
-                # Chercher la colonne type peu importe le nom exact
-                activity_name = ''
-                for col_name in row.keys():
-                    if 'type' in col_name.lower() and 'activit' in col_name.lower():
-                        activity_name = row[col_name].strip()
-                        break
-                if not activity_name:
-                    activity_name = (row.get('Activity Type') or row.get('activityType') or '').strip()
-                date_val = (row.get('Date') or row.get('date') or '').strip()
-                duration_val = (row.get('Time') or row.get('Durée') or
-                               row.get('duration') or '0').strip()
-                calories_val = (row.get('Calories') or row.get('calories') or '').strip()
-
-                if not date_val or not activity_name:
-                    continue
-
-                try:
-                    # Parser la date
-                    try:
-                        date_obj = datetime.strptime(date_val[:10], '%Y-%m-%d').date()
-                    except ValueError:
-                        date_obj = datetime.strptime(date_val[:10], '%d/%m/%Y').date()
-
-                    # Parser la durée (format HH:MM:SS ou minutes)
-                    duration_minutes = 0
-                    if ':' in duration_val:
-                        parts = duration_val.split(':')
-                        if len(parts) == 3:
-                            duration_minutes = int(parts[0]) * 60 + int(parts[1])
-                        elif len(parts) == 2:
-                            duration_minutes = int(parts[0])
-                    else:
-                        try:
-                            duration_minutes = int(float(duration_val.replace(',', '.')))
-                        except (ValueError, AttributeError):
-                            duration_minutes = 0
-
-                    # Parser les calories
-                    calories = None
-                    if calories_val:
-                        try:
-                            calories = int(float(calories_val.replace(',', '').replace(' ', '')))
-                        except (ValueError, AttributeError):
-                            calories = None
-
-                    # Mapper le type d'activité
-                    activity_type = map_garmin_activity(activity_name)
-
-                    # Vérifier si déjà importé
-                    already_exists = ActivityEntry.query.filter_by(
-                        user_id=user_id,
-                        activity_type=activity_type,
-                        date=date_obj,
-                        duration=duration_minutes
-                    ).first() is not None
-
-                    pending_data['activities'].append({
-                        'date': date_obj.isoformat(),
-                        'activity_type': activity_type,
-                        'activity_type_raw': activity_name,
-                        'duration': duration_minutes,
-                        'calories': calories,
-                        'already_exists': already_exists
-                    })
-                except (ValueError, AttributeError):
-                    continue
-
-            # Trier par date décroissante
-            pending_data['activities'].sort(key=lambda x: x['date'], reverse=True)
-
-        except Exception as e:
-            flash(f'Erreur lecture fichier activités : {str(e)}', 'warning')
-
-    if not pending_data['steps'] and not pending_data['activities']:
-        flash('Aucune donnée trouvée dans les fichiers. Vérifie le format CSV.', 'warning')
-
-    return render_template('garmin_csv_import.html',
-                         pending_data=pending_data,
-                         theme=user.theme)
-
-
-@app.route('/garmin-csv/confirm', methods=['POST'])
-@login_required
-def garmin_csv_confirm():
-    user_id = session['user_id']
-
-    imported_steps = 0
-    imported_activities = 0
-
-    # Importer les pas cochés
-    for key, value in request.form.items():
-        if key.startswith('steps_'):
-            date_str = key.replace('steps_', '')
-            try:
-                steps = int(value)
-                date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-                existing = ActivityEntry.query.filter_by(
-                    user_id=user_id,
-                    activity_type='Pas',
-                    date=date
-                ).first()
-
-                if not existing:
-                    new_entry = ActivityEntry(
-                        user_id=user_id,
-                        activity_type='Pas',
-                        duration=0,
-                        steps=steps,
-                        date=date,
-                        note='Import Garmin CSV'
-                    )
-                    db.session.add(new_entry)
-                    imported_steps += 1
-            except (ValueError, AttributeError):
-                continue
-
-    # Importer les activités cochées
-    total_acts = int(request.form.get('total_acts', 0))
-    for i in range(1, total_acts + 1):
-        if request.form.get(f'act_{i}_import'):
-            try:
-                date_str = request.form.get(f'act_{i}_date', '')
-                activity_type = request.form.get(f'act_{i}_type', '')
-                duration = int(request.form.get(f'act_{i}_duration', 0))
-                calories_str = request.form.get(f'act_{i}_calories', '')
-                calories = int(calories_str) if calories_str else None
-
-                date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-                new_entry = ActivityEntry(
-                    user_id=user_id,
-                    activity_type=activity_type,
-                    duration=duration,
-                    calories_burned=calories,
-                    date=date,
-                    note='Import Garmin CSV'
-                )
-                db.session.add(new_entry)
-                imported_activities += 1
-            except (ValueError, AttributeError):
-                continue
-
-    db.session.commit()
-
-    msg = []
-    if imported_steps > 0:
-        msg.append(f'{imported_steps} jour(s) de pas')
-    if imported_activities > 0:
-        msg.append(f'{imported_activities} activité(s)')
-
-    if msg:
-        flash(f'✅ Import réussi : {" et ".join(msg)} importés depuis Garmin !', 'success')
-    else:
-        flash('Aucune nouvelle donnée importée.', 'info')
-
-    return redirect(url_for('activities'))
-
-
-
-@app.route('/garmin/import', methods=['POST'])
-@login_required
-def garmin_import_confirm():
-    user_id = session['user_id']
-
-    imported_steps = 0
-    imported_activities = 0
-
-    # Traiter les pas cochés
-    for key, value in request.form.items():
-        if key.startswith('steps_'):
-            date_str = key.replace('steps_', '')
-            steps = int(value)
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-            # Vérifier qu'il n'existe pas déjà
-            existing = ActivityEntry.query.filter_by(
-                user_id=user_id,
-                activity_type='Pas',
-                date=date
-            ).first()
-
-            if not existing:
-                new_entry = ActivityEntry(
-                    user_id=user_id,
-                    activity_type='Pas',
-                    duration=0,
-                    steps=steps,
-                    date=date,
-                    note='Import Garmin'
-                )
-                db.session.add(new_entry)
-                imported_steps += 1
-
-    # Traiter les activités cochées
-    for key, value in request.form.items():
-        if key.startswith('activity_') and not key.startswith('activity_data_'):
-            garmin_id = key.replace('activity_', '')
-
-            # Récupérer les données de l'activité
-            data_key = f'activity_data_{garmin_id}'
-            if data_key in request.form:
-                act_data = json.loads(request.form[data_key])
-                date = datetime.strptime(act_data['date'], '%Y-%m-%d').date()
-
-                new_entry = ActivityEntry(
-                    user_id=user_id,
-                    activity_type=act_data['activity_type'],
-                    duration=act_data['duration'],
-                    calories_burned=act_data['calories'],
-                    date=date,
-                    note=f"Import Garmin ({act_data['activity_type_raw']})"
-                )
-                db.session.add(new_entry)
-                imported_activities += 1
-
-    db.session.commit()
-
-    msg = []
-    if imported_steps > 0:
-        msg.append(f'{imported_steps} jour(s) de pas')
-    if imported_activities > 0:
-        msg.append(f'{imported_activities} activité(s)')
-
-    if msg:
-        flash(f'✅ Import réussi : {" et ".join(msg)} importés depuis Garmin !', 'success')
-    else:
-        flash('Aucune nouvelle donnée à importer.', 'info')
-
-    return redirect(url_for('activities'))
-
-
-# ----------------------------------------
-# 3. ROUTE : PAGE PROFIL
-# ----------------------------------------
-
-@app.route('/profile')
-@login_required
-def profile():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    # Dernier poids
-    latest_weight = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.desc()).first()
-
-    # Premier poids
-    first_weight = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.asc()).first()
-
-    # Calculer les stats
-    weight_stats = None
-    if first_weight and latest_weight and first_weight.id != latest_weight.id:
-        total_loss = latest_weight.weight - first_weight.weight
-        days_tracking = (latest_weight.date - first_weight.date).days
-
-        if days_tracking > 0:
-            avg_per_day = total_loss / days_tracking
-            avg_per_week = avg_per_day * 7
-            avg_per_month = avg_per_day * 30
-
-            weight_stats = {
-                'total_loss': total_loss,
-                'days_tracking': days_tracking,
-                'avg_per_week': avg_per_week,
-                'avg_per_month': avg_per_month
-            }
-
-    today = datetime.utcnow().date()
-
-    return render_template('profile.html',
-                         user=user,
-                         latest_weight=latest_weight,
-                         first_weight=first_weight,
-                         weight_stats=weight_stats,
-                         today=today,
-                         theme=user.theme)
-
-
-# ----------------------------------------
-# 4. ROUTE : MISE À JOUR PROFIL
-# ----------------------------------------
-
-@app.route('/profile/update', methods=['POST'])
-@login_required
-def profile_update():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    # Thème (AJOUTER EN PREMIER)
-    theme = request.form.get('theme', '').strip()
-    if theme in ['healthy', 'ocean', 'sunset']:
-        user.theme = theme
-
-    user.track_meals = bool(request.form.get('track_meals'))
-    user.track_activities = bool(request.form.get('track_activities'))
-    user.enable_garmin_import = bool(request.form.get('enable_garmin_import'))
-    user.track_measurements = bool(request.form.get('track_measurements'))
-    user.enable_secondary_measurements = bool(request.form.get('enable_secondary_measurements'))
-    user.track_photos = bool(request.form.get('track_photos'))
-    # Date de naissance
-    birth_date_str = request.form.get('birth_date', '').strip()
-    if birth_date_str:
-        try:
-            user.birth_date = datetime.strptime(birth_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
-    else:
-        user.birth_date = None
-
-    # Taille
-    height_str = request.form.get('height', '').strip()
-    if height_str:
-        try:
-            user.height = float(height_str)
-        except ValueError:
-            pass
-    else:
-        user.height = None
-
-    # Sexe
-    gender = request.form.get('gender', '').strip()
-    user.gender = gender if gender in ['M', 'F'] else None
-
-    # Poids cible
-    target_weight_str = request.form.get('target_weight', '').strip()
-    if target_weight_str:
-        try:
-            user.target_weight = float(target_weight_str)
-        except ValueError:
-            pass
-    else:
-        user.target_weight = None
-
-    db.session.commit()
-
-    flash('✅ Profil mis à jour !', 'success')
-    return redirect(url_for('profile'))
-
-
-# ----------------------------------------
-# 5. ROUTE : PAGE MESURES (après route /activities)
-# ----------------------------------------
-
-@app.route('/measurements')
-@login_required
-def measurements():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    if not user.track_measurements:
-        flash('Le suivi des mesures n\'est pas activé.', 'warning')
-        return redirect(url_for('dashboard'))
-
-    today = datetime.utcnow().date()
-
-    # Mesure du jour
-    measurement_today = BodyMeasurement.query.filter_by(
-        user_id=user_id,
-        date=today
-    ).first()
-
-    # Dernière mesure si pas aujourd'hui
-    latest_measurement = BodyMeasurement.query.filter_by(
-        user_id=user_id
-    ).order_by(BodyMeasurement.date.desc()).first()
-
-    # Historique (90 derniers jours pour graphique)
-    ninety_days_ago = today - timedelta(days=90)
-    measurements = BodyMeasurement.query.filter(
-        BodyMeasurement.user_id == user_id,
-        BodyMeasurement.date >= ninety_days_ago
-    ).order_by(BodyMeasurement.date.desc()).all()
-
-    # Préparer données pour graphiques
-    dates = [m.date.strftime('%d/%m') for m in reversed(measurements)]
-    waist_data = [m.waist for m in reversed(measurements) if m.waist]
-    hips_data = [m.hips for m in reversed(measurements) if m.hips]
-    thigh_data = [m.thigh for m in reversed(measurements) if m.thigh]
-
-    # Calculer évolutions
-    stats = {}
-    if measurements and len(measurements) > 1:
-        first = measurements[-1]
-        latest = measurements[0]
-
-        if first.waist and latest.waist:
-            stats['waist_diff'] = latest.waist - first.waist
-        if first.hips and latest.hips:
-            stats['hips_diff'] = latest.hips - first.hips
-        if first.thigh and latest.thigh:
-            stats['thigh_diff'] = latest.thigh - first.thigh
-
-    # Calculer ratio taille/hanches si dispo
-    waist_hip_ratio = None
-    if latest_measurement and latest_measurement.waist and latest_measurement.hips:
-        waist_hip_ratio = round(latest_measurement.waist / latest_measurement.hips, 2)
-
-    return render_template('measurements.html',
-                         measurement_today=measurement_today,
-                         latest_measurement=latest_measurement,
-                         measurements=measurements,
-                         dates=dates,
-                         waist_data=waist_data,
-                         hips_data=hips_data,
-                         thigh_data=thigh_data,
-                         stats=stats,
-                         waist_hip_ratio=waist_hip_ratio,
-                         today=today,
-                         user=user,
-                         theme=user.theme)
-
-
-# ----------------------------------------
-# 6. ROUTE : AJOUTER MESURE
-# ----------------------------------------
-
-@app.route('/measurements/add', methods=['POST'])
-@login_required
-def add_measurement():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    if not user.track_measurements:
-        flash('Le suivi des mesures n\'est pas activé.', 'warning')
-        return redirect(url_for('dashboard'))
-
-    today = datetime.utcnow().date()
-
-    # Vérifier si déjà saisi aujourd'hui
-    existing = BodyMeasurement.query.filter_by(
-        user_id=user_id,
-        date=today
-    ).first()
-
-    if existing:
-        # Mise à jour
-        existing.waist = float(request.form.get('waist')) if request.form.get('waist') else None
-        existing.hips = float(request.form.get('hips')) if request.form.get('hips') else None
-        existing.thigh = float(request.form.get('thigh')) if request.form.get('thigh') else None
-        existing.arm = float(request.form.get('arm')) if request.form.get('arm') else None
-        existing.chest = float(request.form.get('chest')) if request.form.get('chest') else None
-        existing.calf = float(request.form.get('calf')) if request.form.get('calf') else None
-        existing.note = request.form.get('note', '').strip()
-
-        flash('✅ Mesures mises à jour !', 'success')
-    else:
-        # Création
-        new_measurement = BodyMeasurement(
-            user_id=user_id,
-            date=today,
-            waist=float(request.form.get('waist')) if request.form.get('waist') else None,
-            hips=float(request.form.get('hips')) if request.form.get('hips') else None,
-            thigh=float(request.form.get('thigh')) if request.form.get('thigh') else None,
-            arm=float(request.form.get('arm')) if request.form.get('arm') else None,
-            chest=float(request.form.get('chest')) if request.form.get('chest') else None,
-            calf=float(request.form.get('calf')) if request.form.get('calf') else None,
-            note=request.form.get('note', '').strip()
-        )
-        db.session.add(new_measurement)
-        flash('✅ Mesures enregistrées !', 'success')
-
-    db.session.commit()
-    return redirect(url_for('measurements'))
-
-@app.route('/measurements/delete/<int:id>', methods=['POST'])
-@login_required
-def delete_measurement(id):
-    user_id = session['user_id']
-    measurement = BodyMeasurement.query.get_or_404(id)
-
-    # Vérifier que la mesure appartient bien à l'utilisateur
-    if measurement.user_id != user_id:
-        flash('Action non autorisée', 'error')
-        return redirect(url_for('measurements'))
-
-    db.session.delete(measurement)
-    db.session.commit()
-
-    flash('✅ Mesure supprimée !', 'success')
-    return redirect(url_for('measurements'))
-
-# ========================================
-# API POUR LES GRAPHIQUES
-# ========================================
-
-@app.route('/api/weight-data')
-@login_required
-def weight_data():
-    user_id = session['user_id']
-    days = int(request.args.get('days', 30))
-
-    start_date = datetime.utcnow().date() - timedelta(days=days)
-    entries = WeightEntry.query.filter(
-        WeightEntry.user_id == user_id,
-        WeightEntry.date >= start_date
-    ).order_by(WeightEntry.date).all()
-
-    data = {
-        'dates': [entry.date.strftime('%Y-%m-%d') for entry in entries],
-        'weights': [entry.weight for entry in entries]
-    }
-
-    return jsonify(data)
-
-# ========================================
-# INITIALISATION DE LA BASE DE DONNÉES
-# ========================================
-
-@app.before_request
 def create_tables():
-    if not hasattr(app, 'tables_created'):
-        db.create_all()
-        app.tables_created = True
+    if current_app.extensions.get('tables_created'):
+        return
+    with _tables_lock:
+        if not current_app.extensions.get('tables_created'):
+            # Migration des aliments : `flask backfill-foods` au déploiement, pas ici
+            db.create_all()
+            upgrade_daily_summaries()
+            current_app.extensions['tables_created'] = True
+
+@click.command('backfill-foods')
+@with_appcontext
+def backfill_foods_command():
+    """Migre les aliments JSON des repas vers la table meal_food."""
+    db.create_all()
+    click.echo(f'{backfill_meal_foods()} repas migrés')
+
+@click.command('rebuild-summaries')
+@with_appcontext
+def rebuild_summaries_command():
+    """Recalcule les résumés quotidiens (IMC, métabolisme, dépense) de tous les comptes."""
+    db.create_all()
+    upgrade_daily_summaries()
+    for user in User.query.all():
+        refresh_daily_summaries(user)
+        db.session.commit()
+    click.echo(f'{DailySummary.query.count()} résumés quotidiens')
 
 def load_user():
     if 'user_id' in session:
@@ -1767,249 +105,164 @@ def load_user():
     else:
         g.current_user = None
 
-# ========================================
-# ROUTES FAVORIS REPAS
-# ========================================
-
-@app.route('/api/meal-favorites')
-@login_required
-def get_meal_favorites():
-    user_id = session['user_id']
-    meal_type = request.args.get('meal_type')
-    query = MealFavorite.query.filter_by(user_id=user_id)
-    if meal_type:
-        query = query.filter_by(meal_type=meal_type)
-    favorites = query.order_by(MealFavorite.name).all()
-    return jsonify([{
-        'id': f.id,
-        'name': f.name,
-        'meal_type': f.meal_type,
-        'foods': f.get_foods_list()
-    } for f in favorites])
-
-@app.route('/api/meal-favorites/save', methods=['POST'])
-@login_required
-def save_meal_favorite():
-    user_id = session['user_id']
-    data = request.get_json()
-    name = data.get('name', '').strip()
-    meal_type = data.get('meal_type', '')
-    foods = data.get('foods', [])
-
-    if not name or not meal_type or not foods:
-        return jsonify({'error': 'Données manquantes'}), 400
-
-    # Vérifier doublon nom + type
-    existing = MealFavorite.query.filter_by(
-        user_id=user_id, name=name, meal_type=meal_type
-    ).first()
-    if existing:
-        return jsonify({'error': 'Un favori avec ce nom existe déjà pour ce type de repas'}), 409
+@click.command('backup')
+@with_appcontext
+@click.option('--dest', default='backups', show_default=True, help='Dossier des archives')
+@click.option('--keep', default=30, show_default=True, help='Nombre d\'archives conservées')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+@click.option('--incremental', is_flag=True, help='Seulement les photos modifiées depuis la dernière sauvegarde complète')
+def backup_command(dest, keep, fmt, incremental):
+    """Sauvegarde complète : base (snapshot SQLite), tables et photos."""
+    db_path = None
+    if db.engine.url.get_backend_name() == 'sqlite':
+        db_path = db.engine.url.database
+    archive_path, removed = backup.write_backup(
+        db.session, INSTANCE_TABLES, UPLOAD_FOLDER, dest,
+        db_path=db_path, fmt=fmt, incremental=incremental, keep=keep
+    )
+    click.echo(f'Sauvegarde écrite : {archive_path}')
+    for name in removed:
+        click.echo(f'Rotation : {name} supprimée')
+
+@click.command('restore')
+@with_appcontext
+@click.argument('archive', type=click.Path(exists=True, dir_okay=False))
+@click.option('--email', help='Compte cible (par défaut : email du manifeste)')
+def restore_command(archive, email):
+    """Restaure une archive utilisateur (/export/archive) dans cette instance."""
+    manifest = backup.read_manifest(archive)
+    profile = manifest.get('user')
+    if not profile:
+        raise click.ClickException("Archive sans profil utilisateur (export d'instance ?)")
+
+    email = email or profile['email']
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        username = profile['username']
+        counter = 1
+        while User.query.filter_by(username=username).first():
+            username = f"{profile['username']}{counter}"
+            counter += 1
+        user = User(username=username, email=email)
+        for field in PROFILE_FIELDS:
+            if field not in ('username', 'email') and profile.get(field) is not None:
+                value = profile[field]
+                if field == 'birth_date':
+                    value = datetime.strptime(value, '%Y-%m-%d').date()
+                setattr(user, field, value)
+        db.session.add(user)
+        db.session.commit()
+        click.echo(f'Compte créé : {user.username} ({email})')
 
-    fav = MealFavorite(user_id=user_id, name=name, meal_type=meal_type)
-    fav.set_foods_list(foods)
-    db.session.add(fav)
+    stats, copied = backup.restore_archive(
+        db.session, archive, EXPORT_TABLES, RESTORE_KEYS, user.id,
+        os.path.join(UPLOAD_FOLDER, str(user.id))
+    )
+    backfill_meal_foods()
+    # 'epoch' : invalide d'un coup tous les fragments mis en cache
+    for scope in ('meals', 'weights', 'activities', 'measurements', 'epoch'):
+        bump_data_version(user.id, scope)
+    refresh_daily_summaries(user)
     db.session.commit()
-    return jsonify({'success': True, 'id': fav.id, 'name': fav.name})
+    total_rows = sum(inserted for inserted, _, _ in stats.values())
+    total_time = sum(elapsed for _, _, elapsed in stats.values())
+    for name, (inserted, skipped, elapsed) in stats.items():
+        rate = inserted / elapsed if elapsed else 0
+        click.echo(f'{name:<13} {inserted:>8} insérées  {skipped:>8} ignorées  {rate:>10.0f} lignes/s')
+    click.echo(f'Total : {total_rows} lignes en {total_time:.2f}s '
+               f'({total_rows / total_time if total_time else 0:.0f} lignes/s), {copied} photo(s) copiée(s)')
+
+@click.command('build-assets')
+@with_appcontext
+@click.option('--no-fetch', is_flag=True, help='Ne pas télécharger les bibliothèques tierces manquantes')
+@click.option('--print-hashes', is_flag=True, help='Afficher le SHA-256 vérifié des bibliothèques tierces, sans rien écrire')
+def build_assets_command(no_fetch, print_hashes):
+    """Télécharge les bibliothèques tierces et précompresse les fichiers statiques (.gz, .br)."""
+    if print_hashes:
+        for name, url in assets.VENDOR.items():
+            digest = assets.download(url)[1]
+            if digest != assets.expected_sha256(name, echo=lambda message: None):
+                raise click.ClickException(f'{name} : le fichier téléchargé ne correspond pas à son empreinte')
+            click.echo(f"'{name}': '{digest}',")
+        return
+    try:
+        assets.build(current_app.static_folder, fetch=not no_fetch, echo=click.echo)
+    except ValueError as e:
+        raise click.ClickException(str(e))
 
-@app.route('/api/meal-favorites/<int:fav_id>', methods=['DELETE'])
-@login_required
-def delete_meal_favorite(fav_id):
-    user_id = session['user_id']
-    fav = MealFavorite.query.get_or_404(fav_id)
-    if fav.user_id != user_id:
-        return jsonify({'error': 'Non autorisé'}), 403
-    db.session.delete(fav)
-    db.session.commit()
-    return jsonify({'success': True})
+def inject_user():
+    if 'user_id' in session:
+        user = User.query.get(session['user_id'])
+        return dict(current_user=user)
+    return dict(current_user=None)
 
 # ========================================
-# ROUTES PHOTOS
+# FABRIQUE DE L'APPLICATION
 # ========================================
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-def compress_and_save(file, filepath, max_size=(1200, 1600), quality=85):
-    """Compresse et sauvegarde une image. Retourne True si succès."""
-    if PILLOW_AVAILABLE:
-        try:
-            img = Image.open(file)
-            # Corriger l'orientation EXIF
-            try:
-                from PIL import ImageOps
-                img = ImageOps.exif_transpose(img)
-            except Exception:
-                pass
-            # Convertir RGBA en RGB si nécessaire
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-            img.thumbnail(max_size, Image.LANCZOS)
-            img.save(filepath, 'JPEG', quality=quality, optimize=True)
-            return True
-        except Exception:
-            pass
-    # Fallback sans Pillow : sauvegarde brute
-    file.seek(0)
-    with open(filepath, 'wb') as f:
-        f.write(file.read())
-    return True
-
-@app.route('/photos')
-@login_required
-def photos():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    if not user.track_photos:
-        flash('Le suivi photos n\'est pas activé.', 'warning')
-        return redirect(url_for('dashboard'))
-
-    today = datetime.utcnow().date()
-
-    # Toutes les photos de l'utilisateur
-    all_photos = PhotoEntry.query.filter_by(user_id=user_id).order_by(PhotoEntry.date.desc()).all()
-
-    # Organiser par mois
-    photos_by_month = {}
-    for photo in all_photos:
-        month_key = photo.date.strftime('%Y-%m')
-        month_label = photo.date.strftime('%B %Y').capitalize()
-        if month_key not in photos_by_month:
-            photos_by_month[month_key] = {'label': month_label, 'photos': {}}
-        photos_by_month[month_key]['photos'][photo.angle] = photo
-
-    # Photo ce mois-ci ?
-    first_day_month = today.replace(day=1)
-    photo_this_month = PhotoEntry.query.filter(
-        PhotoEntry.user_id == user_id,
-        PhotoEntry.date >= first_day_month
-    ).first()
-
-    # Données pour comparaison avant/après
-    months_list = sorted(photos_by_month.keys())
-    first_month = photos_by_month.get(months_list[0]) if months_list else None
-    last_month = photos_by_month.get(months_list[-1]) if len(months_list) > 1 else None
-
-    return render_template('photos.html',
-                         photos_by_month=photos_by_month,
-                         photo_this_month=photo_this_month,
-                         photo_angles=PHOTO_ANGLES,
-                         first_month=first_month,
-                         last_month=last_month,
-                         months_list=months_list,
-                         today=today,
-                         user=user,
-                         theme=user.theme)
-
-@app.route('/photos/upload', methods=['POST'])
-@login_required
-def upload_photo():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
-
-    if not user.track_photos:
-        flash('Le suivi photos n\'est pas activé.', 'warning')
-        return redirect(url_for('dashboard'))
-
-    today = datetime.utcnow().date()
-    uploaded = 0
-    errors = 0
-
-    for angle, _, _ in PHOTO_ANGLES:
-        file = request.files.get(f'photo_{angle}')
-        if not file or not file.filename:
-            continue
-        if not allowed_file(file.filename):
-            errors += 1
-            continue
-
-        # Dossier utilisateur/mois
-        user_folder = os.path.join(UPLOAD_FOLDER, str(user_id), today.strftime('%Y-%m'))
-        os.makedirs(user_folder, exist_ok=True)
-
-        # Nom de fichier unique
-        ext = 'jpg'  # On sauvegarde toujours en JPEG après compression
-        filename = f"{today.isoformat()}_{angle}_{uuid.uuid4().hex[:8]}.{ext}"
-        filepath = os.path.join(user_folder, filename)
-
-        # Supprimer ancienne photo du même angle ce mois-ci si elle existe
-        first_day_month = today.replace(day=1)
-        existing = PhotoEntry.query.filter(
-            PhotoEntry.user_id == user_id,
-            PhotoEntry.angle == angle,
-            PhotoEntry.date >= first_day_month
-        ).first()
-        if existing:
-            old_path = os.path.join(UPLOAD_FOLDER, str(user_id),
-                                    existing.date.strftime('%Y-%m'), existing.filename)
-            if os.path.exists(old_path):
-                os.remove(old_path)
-            db.session.delete(existing)
-
-        # Compresser et sauvegarder
-        compress_and_save(file, filepath)
-
-        # Enregistrer en BDD
-        photo = PhotoEntry(
-            user_id=user_id,
-            date=today,
-            angle=angle,
-            filename=filename
-        )
-        db.session.add(photo)
-        uploaded += 1
-
-    db.session.commit()
-
-    if uploaded > 0:
-        flash(f'✅ {uploaded} photo(s) enregistrée(s) !', 'success')
-    if errors > 0:
-        flash(f'⚠️ {errors} fichier(s) ignoré(s) (format non supporté).', 'warning')
-
-    return redirect(url_for('photos'))
-
-@app.route('/photos/delete/<int:photo_id>', methods=['POST'])
-@login_required
-def delete_photo(photo_id):
-    user_id = session['user_id']
-    photo = PhotoEntry.query.get_or_404(photo_id)
-
-    if photo.user_id != user_id:
-        flash('Action non autorisée.', 'danger')
-        return redirect(url_for('photos'))
-
-    # Supprimer le fichier
-    filepath = os.path.join(UPLOAD_FOLDER, str(user_id),
-                            photo.date.strftime('%Y-%m'), photo.filename)
-    if os.path.exists(filepath):
-        os.remove(filepath)
-
-    db.session.delete(photo)
-    db.session.commit()
-
-    flash('Photo supprimée.', 'info')
-    return redirect(url_for('photos'))
-
-@app.route('/photos/file/<int:user_id>/<month>/<filename>')
-@login_required
-def serve_photo(user_id, month, filename):
-    """Sert les photos de façon sécurisée (seul l'utilisateur peut voir ses photos)."""
-    from flask import send_from_directory, abort
-    if session['user_id'] != user_id:
-        abort(403)
-    folder = os.path.join(UPLOAD_FOLDER, str(user_id), month)
-    return send_from_directory(folder, filename)
+def create_app(config=None):
+    """Crée l'application ; config surcharge la configuration issue de l'environnement."""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///wellness.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['GOOGLE_CLIENT_ID'] = os.environ.get('GOOGLE_CLIENT_ID')
+    app.config['GOOGLE_CLIENT_SECRET'] = os.environ.get('GOOGLE_CLIENT_SECRET')
+    app.config['PROFILING'] = os.environ.get('PROFILING') == '1'
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['QUERY_CHECK'] = os.environ.get('QUERY_CHECK') == '1' or os.environ.get('FLASK_DEBUG') == '1'
+    app.config['GARMIN_ENABLED'] = os.environ.get('GARMIN_ENABLED', '1') == '1'
+    app.config['PHOTOS_ENABLED'] = os.environ.get('PHOTOS_ENABLED', '1') == '1'
+    app.config['ASSETS_FINGERPRINT'] = os.environ.get('ASSETS_FINGERPRINT', '1') == '1'
+    app.config['COMPRESSION'] = os.environ.get('COMPRESSION', '1') == '1'
+    app.config['HTML_MINIFY'] = os.environ.get('HTML_MINIFY') == '1'
+    if config:
+        app.config.update(config)
+
+    # Fix pour Render.com qui utilise postgres:// au lieu de postgresql://
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    db.init_app(app)
+    # Pragmas sur le seul moteur de l'application (pas sur les autres moteurs du processus)
+    with app.app_context():
+        if DB_PROFILE == 'tuned' and db.engine.url.get_backend_name() == 'sqlite':
+            event.listen(db.engine, 'connect', apply_sqlite_pragmas)
+    # Fichiers statiques : noms avec empreinte, cache d'un an, versions .gz/.br
+    assets.init_app(app)
+    # Pages et API compressées (gzip / Brotli) ; enregistré avant les autres hooks
+    # after_request, il s'exécute après eux, sur la réponse finale
+    if app.config['COMPRESSION']:
+        compression.init_app(app, minify=app.config['HTML_MINIFY'])
+
+    # Instrumentation des requêtes (Server-Timing, log JSON, /metrics) : PROFILING=1.
+    # Pic mémoire (tracemalloc, global au processus) par défaut seulement sans threads
+    if app.config['PROFILING']:
+        trace_memory = os.environ.get('SERVING_PROFILE', 'gthread') == 'sync'
+        profiling.init_app(app, trace_memory=os.environ.get('PROFILING_MEMORY', '1' if trace_memory else '0') == '1')
+
+    # Détection des N+1 et requêtes lentes (développement / tests) : QUERY_CHECK=1
+    if app.config['QUERY_CHECK']:
+        querycheck.init_app(app,
+                            threshold=int(os.environ.get('QUERY_CHECK_REPEAT', querycheck.REPEAT_THRESHOLD)),
+                            slow_ms=int(os.environ.get('SLOW_QUERY_MS', querycheck.SLOW_QUERY_MS)))
+
+    for name in BLUEPRINTS + tuple(name for name, flag in OPTIONAL_BLUEPRINTS.items() if app.config[flag]):
+        app.register_blueprint(importlib.import_module(f'blueprints.{name}').bp)
+
+    app.before_request(create_tables)
+    app.context_processor(inject_user)
+    for command in (backfill_foods_command, rebuild_summaries_command, backup_command, restore_command,
+                    build_assets_command):
+        app.cli.add_command(command)
+    return app
+
+# Instance utilisée par gunicorn (app:app) et `flask --app app`
+app = create_app()
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
-
-@app.context_processor
-def inject_user():
-    if 'user_id' in session:
-        user = User.query.get(session['user_id'])
-        return dict(current_user=user)
-    return dict(current_user=None)
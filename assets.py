@@ -0,0 +1,246 @@
+"""Fichiers statiques : empreinte de contenu, précompression, cache long.
+
+`url_for('static', filename='responsive.css')` donne
+/static/responsive.3f2a9c1b7d.css : le nom change avec le contenu, le
+navigateur garde donc le fichier un an sans revalider (Cache-Control
+immutable) et une visite suivante ne fait aucune requête de fichier statique.
+
+`flask build-assets` (à l'étape de build du déploiement) télécharge les
+bibliothèques tierces dans static/vendor/, après vérification de leur
+SHA-256 (figé dans VENDOR_SHA256, sinon publié par jsDelivr), et écrit à côté de chaque fichier
+texte ses versions .gz et .br (Brotli si le paquet `brotli` est installé),
+servies selon l'en-tête Accept-Encoding.
+
+Le service worker (templates/sw.js) est servi à la racine (/sw.js, portée
+de tout le site) avec la liste des fichiers à précacher.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import urllib.request
+
+from flask import abort, current_app, make_response, render_template, request, send_from_directory, url_for
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+HASH_LENGTH = 10
+ONE_YEAR = 365 * 24 * 3600
+# Photos des utilisateurs : servies par leurs routes
+EXCLUDED = ('uploads/',)
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.map', '.html'}
+# Page affichée hors ligne pour une page jamais visitée
+OFFLINE_PAGE = 'offline.html'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Bibliothèques tierces servies localement (téléchargées par flask build-assets) :
+# (paquet npm, version, fichier)
+VENDOR_PACKAGES = {
+    'vendor/chart.umd.min.js': ('chart.js', '4.4.0', 'dist/chart.umd.min.js'),
+}
+VENDOR = {name: f'https://cdn.jsdelivr.net/npm/{package}@{version}/{path}'
+          for name, (package, version, path) in VENDOR_PACKAGES.items()}
+# Liste des fichiers d'un paquet avec leur SHA-256 (base64), publiée par jsDelivr
+VENDOR_METADATA_URL = 'https://data.jsdelivr.com/v1/packages/npm/{package}@{version}?structure=flat'
+# SHA-256 figés (hexadécimal), prioritaires sur l'empreinte publiée : valeurs données
+# par `flask build-assets --print-hashes`
+VENDOR_SHA256 = {}
+
+HASHED_NAME = re.compile(rf'^(.+)\.[0-9a-f]{{{HASH_LENGTH}}}(\.[^./]+)$')
+
+
+def static_files(folder):
+    """Chemins relatifs (séparateur /) des fichiers statiques à publier."""
+    for root, dirs, files in os.walk(folder):
+        if root == folder:
+            dirs[:] = [d for d in dirs if d != 'uploads']
+        dirs.sort()
+        for filename in sorted(files):
+            name = os.path.relpath(os.path.join(root, filename), folder).replace(os.sep, '/')
+            if name.startswith(EXCLUDED) or name.endswith(('.gz', '.br')):
+                continue
+            yield name
+
+
+def hashed_name(name, content):
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}'
+
+
+def build_manifest(folder):
+    """{'files': nom → nom avec empreinte, 'originals': inverse, 'encodings': nom → (br, gzip)}."""
+    files, encodings = {}, {}
+    for name in static_files(folder):
+        path = os.path.join(folder, name)
+        with open(path, 'rb') as f:
+            files[name] = hashed_name(name, f.read())
+        # Versions précompressées, ignorées si plus anciennes que le fichier
+        mtime = os.path.getmtime(path)
+        available = tuple(encoding for encoding, suffix in ENCODINGS
+                          if os.path.exists(path + suffix) and os.path.getmtime(path + suffix) >= mtime)
+        if available:
+            encodings[name] = available
+    version = hashlib.sha256(''.join(sorted(files.values())).encode()).hexdigest()[:HASH_LENGTH]
+    return {'files': files, 'originals': {v: k for k, v in files.items()}, 'encodings': encodings,
+            'version': version}
+
+
+def asset_url(name):
+    """URL d'un fichier statique, ou du CDN pour une bibliothèque pas encore téléchargée."""
+    if name in VENDOR and name not in current_app.extensions['assets']['files']:
+        return VENDOR[name]
+    return url_for('static', filename=name)
+
+
+def init_app(app):
+    """Empreintes dans url_for('static') et service des fichiers avec cache long."""
+    manifest = app.extensions['assets'] = build_manifest(app.static_folder)
+    if not app.config.get('ASSETS_FINGERPRINT', True):
+        # Développement : noms inchangés, fichiers revalidés à chaque page
+        manifest['files'] = {name: name for name in manifest['files']}
+        manifest['originals'] = {}
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest['files']:
+            values['filename'] = manifest['files'][values['filename']]
+
+    def serve_static(filename):
+        # Photos des utilisateurs : seulement par leurs routes, connexion requise
+        if posixpath.normpath(filename).startswith(EXCLUDED):
+            abort(404)
+        name = manifest['originals'].get(filename)
+        immutable = name is not None
+        if name is None:
+            # Empreinte périmée (page ou fragment en cache d'un déploiement
+            # précédent) : fichier actuel, sans cache long
+            match = HASHED_NAME.match(filename)
+            current = match.group(1) + match.group(2) if match else None
+            name = current if current in manifest['files'] else filename
+
+        encoding = next((encoding for encoding in manifest['encodings'].get(name, ())
+                         if request.accept_encodings[encoding]), None)
+        if encoding:
+            suffix = dict(ENCODINGS)[encoding]
+            response = send_from_directory(app.static_folder, name + suffix,
+                                           mimetype=mimetypes.guess_type(name)[0])
+            response.content_encoding = encoding
+        else:
+            response = app.send_static_file(name)
+        if os.path.splitext(name)[1] in COMPRESSIBLE:
+            response.vary.add('Accept-Encoding')
+        if immutable:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = ONE_YEAR
+            response.cache_control.immutable = True
+        return response
+
+    def service_worker():
+        # Fichiers texte (CSS, JS, icônes, page hors ligne) ; les images restent en cache à la demande
+        precache = [asset_url(name) for name in manifest['files']
+                    if os.path.splitext(name)[1] in COMPRESSIBLE]
+        precache += [url for url in map(asset_url, VENDOR) if url not in precache]
+        response = make_response(render_template(
+            'sw.js', version=manifest['version'], precache_urls=precache,
+            offline_url=url_for('static', filename=OFFLINE_PAGE),
+            login_path=url_for('auth.login'), logout_path=url_for('auth.logout'),
+        ))
+        response.mimetype = 'text/javascript'
+        # Toujours revalidé : le navigateur détecte ainsi chaque nouvelle version
+        response.cache_control.no_cache = True
+        response.add_etag()
+        return response.make_conditional(request)
+
+    @app.context_processor
+    def inject_icons_url():
+        # Sprite des icônes : <use href="{{ icons_url }}#icon-…">
+        return {'icons_url': url_for('static', filename='icons.svg')}
+
+    app.view_functions['static'] = serve_static
+    app.add_url_rule('/sw.js', 'service_worker', service_worker)
+    app.add_template_global(asset_url)
+
+
+def download(url):
+    """Contenu d'une bibliothèque tierce et son SHA-256."""
+    with urllib.request.urlopen(url, timeout=30) as response:
+        content = response.read()
+    return content, hashlib.sha256(content).hexdigest()
+
+
+def published_sha256(name):
+    """SHA-256 (hexadécimal) du fichier d'après les métadonnées du paquet sur jsDelivr."""
+    package, version, path = VENDOR_PACKAGES[name]
+    url = VENDOR_METADATA_URL.format(package=package, version=version)
+    with urllib.request.urlopen(url, timeout=30) as response:
+        files = json.load(response)['files']
+    for entry in files:
+        if entry['name'].lstrip('/') == path:
+            return base64.b64decode(entry['hash']).hex()
+    raise ValueError(f'{name} : {path} absent des métadonnées de {package}@{version}')
+
+
+def expected_sha256(name, echo=print):
+    """Empreinte figée dans VENDOR_SHA256, sinon celle publiée pour la version du paquet."""
+    if VENDOR_SHA256.get(name):
+        return VENDOR_SHA256[name]
+    digest = published_sha256(name)
+    echo(f"{name} : SHA-256 publié {digest} (à figer dans assets.VENDOR_SHA256)")
+    return digest
+
+
+def fetch_vendor(folder, echo=print):
+    """Télécharge les bibliothèques manquantes, vérifiées avant écriture (expected_sha256).
+
+    Lève ValueError si un fichier téléchargé, ou déjà présent et figé, ne correspond pas.
+    """
+    for name, url in VENDOR.items():
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            pinned = VENDOR_SHA256.get(name)
+            if pinned:
+                with open(path, 'rb') as f:
+                    if hashlib.sha256(f.read()).hexdigest() != pinned:
+                        raise ValueError(f'{name} : empreinte SHA-256 inattendue (supprimer le fichier '
+                                         f'pour le télécharger à nouveau)')
+            continue
+        expected = expected_sha256(name, echo)
+        content, digest = download(url)
+        if digest != expected:
+            raise ValueError(f'{name} : empreinte SHA-256 {digest} au lieu de {expected}, fichier non écrit')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        echo(f'{name} : téléchargé et vérifié ({len(content) // 1024} Kio)')
+
+
+def build(folder, fetch=True, echo=print):
+    """Télécharge les bibliothèques manquantes puis précompresse les fichiers texte."""
+    if fetch:
+        fetch_vendor(folder, echo)
+
+    if not BROTLI_AVAILABLE:
+        echo('Paquet brotli absent : versions .gz seulement')
+    for name in static_files(folder):
+        if os.path.splitext(name)[1] not in COMPRESSIBLE:
+            continue
+        path = os.path.join(folder, name)
+        with open(path, 'rb') as f:
+            content = f.read()
+        variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if BROTLI_AVAILABLE:
+            variants['.br'] = brotli.compress(content, quality=11)
+        for suffix, data in variants.items():
+            with open(path + suffix, 'wb') as f:
+                f.write(data)
+        sizes = ', '.join(f'{suffix[1:]} {len(data)}' for suffix, data in variants.items())
+        echo(f'{name} : {len(content)} octets → {sizes}')
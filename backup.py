@@ -0,0 +1,355 @@
+"""Sauvegarde / export NutriStep : archives ZIP produites en streaming.
+
+L'archive n'est jamais construite en mémoire : chaque entrée est écrite
+par petits blocs dans un tampon vidé au fur et à mesure (générateur de
+bytes), ce qui convient aussi bien à une réponse Flask qu'à un fichier.
+"""
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+from datetime import date, datetime
+
+from sqlalchemy import insert, select
+
+ARCHIVE_VERSION = 1
+CHUNK_SIZE = 64 * 1024
+ROWS_PER_CHUNK = 1000
+BACKUP_PREFIX = 'nutristep-backup-'
+INCREMENTAL_SUFFIX = '-incr'
+BACKUP_NAME = re.compile(rf'^{BACKUP_PREFIX}(\d{{8}}-\d{{6}})({INCREMENTAL_SUFFIX})?\.zip$')
+
+
+class _ZipBuffer(io.RawIOBase):
+    """Flux non « seekable » : zipfile écrit alors des data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """Génère les octets d'un ZIP à partir de (nom, itérable de bytes, mtime, compresser)."""
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for arcname, chunks, mtime, compress in entries:
+            info = zipfile.ZipInfo(arcname, date_time=(mtime or datetime.now()).timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            with zf.open(info, 'w', force_zip64=True) as dest:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # Répertoire central écrit à la fermeture
+    yield buffer.drain()
+
+
+def json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def iter_table_rows(session, model, user_id=None, start=None, end=None, columns=None):
+    """Lignes d'une table en dictionnaires, lues par lots (curseur serveur)."""
+    table = model.__table__
+    selected = [table.c[name] for name in columns] if columns else [table]
+    query = select(*selected)
+    if user_id is not None:
+        query = query.where(table.c.user_id == user_id)
+    if start is not None or end is not None:
+        if start is not None:
+            query = query.where(table.c.date >= start)
+        if end is not None:
+            query = query.where(table.c.date <= end)
+        query = query.order_by(table.c.date, table.c.id)
+    else:
+        query = query.order_by(table.c.id)
+    result = session.execute(query.execution_options(yield_per=ROWS_PER_CHUNK))
+    for row in result.mappings():
+        yield {key: json_value(value) for key, value in row.items()}
+
+
+def encode_rows(rows, columns, fmt='ndjson'):
+    """Encode des lignes en blocs de bytes NDJSON ou CSV."""
+    out = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+    count = 0
+    for row in rows:
+        if writer:
+            writer.writerow(row)
+        else:
+            out.write(json.dumps(row, ensure_ascii=False))
+            out.write('\n')
+        count += 1
+        if count % ROWS_PER_CHUNK == 0:
+            yield out.getvalue().encode('utf-8')
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode('utf-8')
+
+
+def iter_file_chunks(path):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def iter_photo_files(root, since=None):
+    """(chemin, chemin relatif, mtime) des fichiers sous root, modifiés après since."""
+    if not os.path.isdir(root):
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            mtime = datetime.fromtimestamp(os.path.getmtime(path))
+            if since and mtime <= since:
+                continue
+            yield path, os.path.relpath(path, root).replace(os.sep, '/'), mtime
+
+
+def archive_entries(session, tables, photo_root, user_id=None, fmt='ndjson',
+                    since=None, manifest=None, extra_files=()):
+    """Entrées de l'archive : manifeste, une entrée par table, fichiers, photos."""
+    now = datetime.now()
+    manifest = dict(manifest or {})
+    manifest.update({
+        'version': ARCHIVE_VERSION,
+        'created_at': now.isoformat(),
+        'format': fmt,
+        'incremental_since': since.isoformat() if since else None,
+        'tables': sorted(tables),
+    })
+    yield 'manifest.json', [json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')], now, True
+
+    extension = 'csv' if fmt == 'csv' else 'ndjson'
+    for name, model in tables.items():
+        columns = [column.name for column in model.__table__.columns]
+        rows = iter_table_rows(session, model, user_id)
+        yield f'tables/{name}.{extension}', encode_rows(rows, columns, fmt), now, True
+
+    for arcname, path in extra_files:
+        yield arcname, iter_file_chunks(path), now, True
+
+    # Les JPEG sont déjà compressés : stockage brut
+    for path, relpath, mtime in iter_photo_files(photo_root, since):
+        yield f'photos/{relpath}', iter_file_chunks(path), mtime, False
+
+
+def sqlite_snapshot(db_path, dest_path):
+    """Copie cohérente d'une base SQLite via l'API backup (sans bloquer les écritures)."""
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(dest_path)
+    try:
+        # Copie par pages : le verrou est relâché entre deux lots
+        source.backup(target, pages=256)
+    finally:
+        target.close()
+        source.close()
+
+
+def list_backups(dest_dir):
+    """[(nom, date, incrémentale)] des archives de dest_dir, de la plus ancienne à la plus récente."""
+    backups = []
+    for name in sorted(os.listdir(dest_dir)):
+        match = BACKUP_NAME.match(name)
+        if match:
+            backups.append((name, datetime.strptime(match.group(1), '%Y%m%d-%H%M%S'), bool(match.group(2))))
+    return backups
+
+
+def last_full_backup(dest_dir):
+    """Date de la dernière archive complète encore présente, ou None."""
+    full = [started for _, started, incremental in list_backups(dest_dir) if not incremental]
+    return full[-1] if full else None
+
+
+def rotate_backups(dest_dir, keep=30):
+    """Ne conserve que les `keep` archives les plus récentes. Retourne les supprimées.
+
+    La dernière archive complète et les incrémentales qui en dépendent ne
+    sont jamais supprimées, même au-delà de `keep`.
+    """
+    if keep <= 0:
+        return []
+    backups = list_backups(dest_dir)
+    full = [index for index, (_, _, incremental) in enumerate(backups) if not incremental]
+    protected_from = full[-1] if full else 0
+    # Moins d'archives que keep : borne négative, rien à supprimer
+    removed = [name for name, _, _ in backups[:max(0, min(len(backups) - keep, protected_from))]]
+    for name in removed:
+        os.remove(os.path.join(dest_dir, name))
+    return removed
+
+
+def write_backup(session, tables, photo_root, dest_dir, db_path=None, fmt='ndjson',
+                 incremental=False, keep=30):
+    """Écrit une archive complète de l'instance dans dest_dir puis applique la rotation."""
+    os.makedirs(dest_dir, exist_ok=True)
+    started = datetime.now()
+    # Incrémentale : photos modifiées depuis la dernière archive *complète*, qui
+    # suffit donc avec elle à tout restaurer (complète sinon)
+    since = last_full_backup(dest_dir) if incremental else None
+    suffix = INCREMENTAL_SUFFIX if since else ''
+    archive_path = os.path.join(dest_dir, f"{BACKUP_PREFIX}{started.strftime('%Y%m%d-%H%M%S')}{suffix}.zip")
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        extra_files = []
+        if db_path:
+            snapshot = os.path.join(tmp_dir, 'wellness.db')
+            sqlite_snapshot(db_path, snapshot)
+            extra_files.append(('wellness.db', snapshot))
+
+        entries = archive_entries(session, tables, photo_root, fmt=fmt, since=since,
+                                  extra_files=extra_files)
+        with open(archive_path + '.tmp', 'wb') as f:
+            for chunk in stream_zip(entries):
+                f.write(chunk)
+        os.replace(archive_path + '.tmp', archive_path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    removed = rotate_backups(dest_dir, keep)
+    return archive_path, removed
+
+
+# ----------------------------------------
+# RESTAURATION
+# ----------------------------------------
+
+def read_manifest(archive_path):
+    with zipfile.ZipFile(archive_path) as zf:
+        return json.loads(zf.read('manifest.json'))
+
+
+def _column_converter(column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return lambda value: value
+    if python_type is bool:
+        return lambda value: value if isinstance(value, bool) else str(value).lower() in ('true', '1')
+    if python_type is datetime:
+        return datetime.fromisoformat
+    if python_type is date:
+        return date.fromisoformat
+    return python_type
+
+
+def _iter_archive_rows(zf, arcname, fmt):
+    with zf.open(arcname) as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8', newline='' if fmt == 'csv' else None)
+        if fmt == 'csv':
+            yield from csv.DictReader(text)
+        else:
+            for line in text:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def restore_archive(session, archive_path, tables, natural_keys, user_id, photo_root,
+                    chunk_size=5000):
+    """Réimporte une archive utilisateur pour user_id (idempotent).
+
+    Les ids d'origine sont abandonnés (nouvelle clé primaire, user_id
+    remplacé) ; une ligne dont la clé naturelle existe déjà est ignorée.
+    Retourne {table: (insérées, ignorées, secondes)} et le nombre de
+    photos copiées.
+    """
+    manifest = read_manifest(archive_path)
+    fmt = manifest.get('format', 'ndjson')
+    extension = 'csv' if fmt == 'csv' else 'ndjson'
+    stats = {}
+
+    with zipfile.ZipFile(archive_path) as zf:
+        names = set(zf.namelist())
+        for name, model in tables.items():
+            arcname = f'tables/{name}.{extension}'
+            if arcname not in names:
+                continue
+            started = time.perf_counter()
+            table = model.__table__
+            converters = {
+                column.name: _column_converter(column)
+                for column in table.columns if column.name not in ('id', 'user_id')
+            }
+            keys = natural_keys[name]
+            existing = set(session.execute(
+                select(*[table.c[k] for k in keys]).where(table.c.user_id == user_id)
+            ).all())
+
+            inserted = skipped = 0
+            chunk = []
+            for row in _iter_archive_rows(zf, arcname, fmt):
+                values = {'user_id': user_id}
+                for column_name, convert in converters.items():
+                    value = row.get(column_name)
+                    values[column_name] = None if value in (None, '') else convert(value)
+                key = tuple(values[k] for k in keys)
+                if key in existing:
+                    skipped += 1
+                    continue
+                existing.add(key)
+                chunk.append(values)
+                if len(chunk) >= chunk_size:
+                    session.execute(insert(table), chunk)
+                    session.commit()
+                    inserted += len(chunk)
+                    chunk = []
+            if chunk:
+                session.execute(insert(table), chunk)
+                session.commit()
+                inserted += len(chunk)
+            stats[name] = (inserted, skipped, time.perf_counter() - started)
+
+        copied = 0
+        for arcname in sorted(names):
+            if not arcname.startswith('photos/') or arcname.endswith('/'):
+                continue
+            parts = arcname[len('photos/'):].split('/')
+            if any(part in ('', '.', '..') for part in parts):
+                continue
+            dest = os.path.join(photo_root, *parts)
+            if os.path.exists(dest):
+                continue
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with zf.open(arcname) as src, open(dest, 'wb') as out:
+                shutil.copyfileobj(src, out, CHUNK_SIZE)
+            copied += 1
+
+    return stats, copied
@@ -0,0 +1,111 @@
+"""Octets transférés par les pages les plus lourdes, avec et sans compression.
+
+Remplit une base synthétique (bench/synthetic.py), puis pour chaque route
+compare la taille brute, minifiée (HTML_MINIFY), gzip et Brotli (si le
+paquet `brotli` est installé), ainsi que le temps de compression :
+
+    python bench/bytes_on_wire.py --years 3
+    python bench/bytes_on_wire.py --routes meals,recap_quarter --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pages  # noqa: E402
+
+
+def routes(today):
+    """Pages HTML et réponses d'API volumineuses (nom → chemin)."""
+    quarter = (today - timedelta(days=90)).isoformat()
+    return {
+        'meals': '/meals',
+        'meals_past_month': '/meals?month_offset=-6',
+        'recap_2_weeks': '/meals/recap',
+        'recap_quarter': f'/meals/recap?start_date={quarter}',
+        'dashboard': '/dashboard',
+        'weight': '/weight',
+        'activities': '/activities',
+        'api_weight_trend': '/api/weight-trend?days=all',
+        'api_food_analytics': f'/api/food-analytics?start={quarter}',
+        'export_meals_ndjson': '/api/export/meals',
+    }
+
+
+def timed(function, data, repeat):
+    durations = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = function(data)
+        durations.append(time.perf_counter() - t0)
+    return result, statistics.median(durations) * 1000
+
+
+def measure(client, compression, path, repeat):
+    """Tailles (octets) et durées (ms) d'une route pour chaque variante."""
+    raw = client.get(path, headers={'Accept-Encoding': 'identity'}).get_data()
+    wire = client.get(path, headers={'Accept-Encoding': 'gzip, deflate, br'})
+    row = {'raw': len(raw), 'wire': len(wire.get_data()),
+           'wire_encoding': wire.headers.get('Content-Encoding', 'identity')}
+
+    minified = raw
+    if wire.mimetype == 'text/html':
+        text, row['minify_ms'] = timed(compression.minify_html, raw.decode(), repeat)
+        minified = text.encode()
+    row['minified'] = len(minified)
+    for encoding in compression.available_encodings():
+        data, row[f'{encoding}_ms'] = timed(lambda d: compression.compress(d, encoding), raw, repeat)
+        row[encoding] = len(data)
+        row[f'minified_{encoding}'] = len(compression.compress(minified, encoding))
+    return row
+
+
+def print_results(results, encodings):
+    columns = ['raw', 'minified'] + [name for encoding in encodings
+                                     for name in (encoding, f'minified_{encoding}')]
+    print(f"{'route':<22}" + ''.join(f'{name:>14}' for name in columns)
+          + f"{'minify ms':>10}" + ''.join(f"{encoding + ' ms':>9}" for encoding in encodings)
+          + f"{'transféré':>16}")
+    for name, row in results.items():
+        print(f'{name:<22}' + ''.join(f'{row[column] / 1024:>12.1f}Ki' for column in columns)
+              + (f"{row['minify_ms']:>10.2f}" if 'minify_ms' in row else f"{'-':>10}")
+              + ''.join(f"{row[f'{encoding}_ms']:>9.2f}" for encoding in encodings)
+              + f"{row['wire'] / 1024:>9.1f}Ki {row['wire_encoding']:<5}")
+    raw = sum(row['raw'] for row in results.values())
+    wire = sum(row['wire'] for row in results.values())
+    print(f'Total : {raw / 1024:.0f} Kio bruts → {wire / 1024:.0f} Kio transférés '
+          f'({(1 - wire / raw) * 100:.0f} % de moins)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=20, help='mesures du temps de compression')
+    parser.add_argument('--routes', help='sous-ensemble de routes, séparées par des virgules')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='nutristep-bench-')
+    nutristep = pages.load_app(os.path.join(tmp_dir, 'bench.db'), os.path.join(tmp_dir, 'photos'))
+    import compression
+    import synthetic
+
+    with nutristep.app.app_context():
+        ids, totals = synthetic.seed(1, args.years)
+        print(f'Base synthétique : {totals}')
+
+    client = nutristep.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = ids[0]
+    paths = routes(datetime.utcnow().date())
+    if args.routes:
+        paths = {name: paths[name] for name in args.routes.split(',')}
+    results = {name: measure(client, compression, path, args.repeat) for name, path in paths.items()}
+    print_results(results, compression.available_encodings())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Test de charge : écrivains concurrents sur SQLite, profil stock vs tuned.
+
+Chaque processus imite un worker gunicorn : il importe l'application et
+enchaîne des sauvegardes de journée de repas, des imports de pas Garmin
+(grosse transaction) et des lectures du calendrier sur une base SQLite
+partagée.
+
+Un processus supplémentaire garde le verrou d'écriture `--hold` secondes
+par transaction, comme un gros import ou une restauration. Au-delà des 5 s
+d'attente par défaut du pilote sqlite3, le profil stock renvoie des
+« database is locked » (erreurs 500) ; le profil tuned (WAL, busy_timeout
+de 15 s) les fait attendre sans erreur. `--hold 0` désactive ce processus.
+
+    python bench/concurrent_writers.py --workers 6 --duration 15 --hold 6
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_app(db_url, profile):
+    os.environ['DATABASE_URL'] = db_url
+    os.environ['DB_PROFILE'] = profile
+    sys.path.insert(0, ROOT)
+    import app as nutristep
+    nutristep.app.logger.disabled = True
+    return nutristep
+
+
+def _setup(db_url, profile, workers):
+    nutristep = _load_app(db_url, profile)
+    with nutristep.app.app_context():
+        nutristep.db.create_all()
+        for i in range(workers):
+            nutristep.db.session.add(nutristep.User(username=f'bench{i}', email=f'bench{i}@example.com'))
+        nutristep.db.session.commit()
+
+
+def _long_writer(db_url, profile, duration, hold, results):
+    """Transactions d'écriture de `hold` secondes, verrou gardé pendant l'attente."""
+    nutristep = _load_app(db_url, profile)
+    table = nutristep.User.__table__.name
+    transactions = 0
+    deadline = time.perf_counter() + duration
+    try:
+        with nutristep.app.app_context():
+            while time.perf_counter() < deadline - hold:
+                connection = nutristep.db.engine.raw_connection()
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute('BEGIN IMMEDIATE')
+                    cursor.execute(f'UPDATE "{table}" SET theme = theme WHERE id = 1')
+                    time.sleep(hold)
+                    connection.commit()
+                    transactions += 1
+                except Exception:
+                    # Verrou non obtenu (profil stock) : nouvelle tentative
+                    connection.rollback()
+                finally:
+                    connection.close()
+                time.sleep(0.5)
+    finally:
+        results.put(('long', transactions))
+
+
+def _worker(db_url, profile, index, duration, results):
+    nutristep = _load_app(db_url, profile)
+    # L'exception remonte au client de test : on distingue ainsi les verrous des autres erreurs
+    nutristep.app.config['PROPAGATE_EXCEPTIONS'] = True
+    client = nutristep.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = index + 1
+    rng = random.Random(index)
+    latencies, errors, locked = [], 0, 0
+
+    def request(method, url, **kwargs):
+        nonlocal errors, locked
+        started = time.perf_counter()
+        try:
+            response = getattr(client, method)(url, **kwargs)
+            errors += response.status_code >= 500
+        except Exception as exc:
+            errors += 1
+            locked += 'database is locked' in str(exc)
+        latencies.append(time.perf_counter() - started)
+
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        day = date(2024, 1, 1) + timedelta(days=rng.randrange(730))
+        roll = rng.random()
+        if roll < 0.3:
+            # Lecture lourde concurrente (grille du mois)
+            request('get', f'/meals?month_offset=-{rng.randrange(24)}')
+        elif roll < 0.85:
+            request('post', '/meals/save-day', data={
+                'date': day.isoformat(),
+                'lunch_food[]': [rng.choice(['pâtes', 'salade', 'poulet', 'riz'])],
+                'dinner_food[]': ['soupe', 'pain'],
+            })
+        else:
+            request('post', '/garmin-csv/confirm', data={
+                f'steps_{(day + timedelta(days=d)).isoformat()}': str(rng.randrange(2000, 15000))
+                for d in range(30)
+            })
+    results.put(('worker', (latencies, errors, locked)))
+
+
+def run(profile, workers, duration, hold):
+    tmp_dir = tempfile.mkdtemp()
+    db_url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    ctx = multiprocessing.get_context('spawn')
+
+    setup = ctx.Process(target=_setup, args=(db_url, profile, workers))
+    setup.start()
+    setup.join()
+
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_worker, args=(db_url, profile, i, duration, results))
+                 for i in range(workers)]
+    if hold > 0:
+        processes.append(ctx.Process(target=_long_writer, args=(db_url, profile, duration, hold, results)))
+    for process in processes:
+        process.start()
+    latencies, errors, locked, long_transactions = [], 0, 0, 0
+    for _ in processes:
+        kind, result = results.get()
+        if kind == 'long':
+            long_transactions = result
+            continue
+        latencies.extend(result[0])
+        errors += result[1]
+        locked += result[2]
+    for process in processes:
+        process.join()
+
+    latencies.sort()
+    # Les lectures comptent aussi : un écrivain qui bloque les lecteurs se voit ici
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    return {
+        'profile': profile,
+        'requests': len(latencies),
+        'throughput': len(latencies) / duration,
+        'errors': errors,
+        'locked': locked,
+        'long_transactions': long_transactions,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0,
+        'p95_ms': p95 * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=6)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--hold', type=float, default=6,
+                        help='durée (s) des transactions longues, 0 pour les désactiver')
+    parser.add_argument('--profiles', default='stock,tuned')
+    args = parser.parse_args()
+
+    print(f"{'profil':<8} {'requêtes':>9} {'req/s':>8} {'erreurs':>8} {'verrous':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'tx longues':>11}")
+    for profile in args.profiles.split(','):
+        r = run(profile, args.workers, args.duration, args.hold)
+        print(f"{r['profile']:<8} {r['requests']:>9} {r['throughput']:>8.1f} {r['errors']:>8} "
+              f"{r['locked']:>8} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['long_transactions']:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""Micro-benchmarks des chemins chauds d'import et de décodage.
+
+Mesure, hors requête HTTP et hors base :
+
+- `parse_garmin_steps_csv` / `parse_garmin_activities_csv` : exports
+  Garmin générés (en-têtes anglais et français), 1k et 100k lignes ;
+- `map_garmin_activity` : types Garmin réels, correspondances exactes,
+  partielles et inconnues ;
+- `compress_and_save` : photos de téléphone (12 Mpx, orientation EXIF),
+  capture PNG avec transparence, photo déjà petite ;
+- `MealEntry.get_foods_list` : décodage JSON des aliments.
+
+Pour chaque cas : médiane du temps, temps par élément et pic
+d'allocations (tracemalloc, mesuré sur une exécution séparée pour ne pas
+fausser le chronomètre). tracemalloc ne voit que les allocations Python :
+les tampons C de Pillow n'apparaissent pas dans le pic des images.
+
+    python bench/hot_paths.py
+    python bench/hot_paths.py --sizes 1000 --only csv,foods
+    python bench/hot_paths.py --compare bench/results/20250101-120000-hot_paths.json
+"""
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'bench', 'results')
+
+GARMIN_TYPES = [
+    'running', 'Course à pied', 'trail_running', 'Cyclisme', 'road_biking', 'indoor_cycling',
+    'lap_swimming', 'Natation en piscine', 'strength_training', 'Musculation', 'walking',
+    'Marche', 'hiking', 'yoga', 'elliptical', 'resort_skiing_snowboarding', 'Padel', 'Escalade',
+]
+
+HEADERS = {
+    'en': {
+        'steps': ['Date', 'Steps', 'Goal'],
+        'activities': ['Activity Type', 'Date', 'Title', 'Distance', 'Calories', 'Time', 'Avg HR'],
+    },
+    'fr': {
+        'steps': ['Date', 'Pas', 'Objectif'],
+        'activities': ["Type d'activité", 'Date', 'Titre', 'Distance', 'Calories', 'Durée', 'FC moyenne'],
+    },
+}
+
+
+# ---------------------------------------------------------------------------
+# Jeux de données générés
+# ---------------------------------------------------------------------------
+
+def steps_csv(rows, lang, seed=42):
+    """Export des pas (octets avec BOM) : une ligne par jour, formats de la langue."""
+    rng = random.Random(seed)
+    out = io.StringIO()
+    out.write(','.join(HEADERS[lang]['steps']) + '\n')
+    start = date(2000, 1, 1)
+    for offset in range(rows):
+        day = start + timedelta(days=offset)
+        steps = rng.randint(0, 25000)
+        if lang == 'en':
+            out.write(f'{day.isoformat()},"{steps:,}",10000\n')
+        else:
+            # Séparateur de milliers : espace insécable
+            grouped = f'{steps:,}'.replace(',', '\xa0')
+            out.write(f'{day:%d/%m/%Y},{grouped},10000\n')
+    return out.getvalue().encode('utf-8-sig')
+
+
+def activities_csv(rows, lang, seed=42):
+    """Export des activités (octets avec BOM) : horodatage, durée HH:MM:SS, calories avec séparateur."""
+    rng = random.Random(seed)
+    out = io.StringIO()
+    out.write(','.join(f'"{h}"' for h in HEADERS[lang]['activities']) + '\n')
+    start = datetime(2000, 1, 1, 7, 30)
+    for index in range(rows):
+        moment = start + timedelta(hours=index * 9)
+        seconds = rng.randint(600, 14400)
+        duration = f'{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+        calories = rng.randint(50, 2500)
+        activity = rng.choice(GARMIN_TYPES)
+        if lang == 'en':
+            stamp, cal, dist = moment.strftime('%Y-%m-%d %H:%M:%S'), f'{calories:,}', f'{rng.uniform(1, 80):.2f}'
+        else:
+            stamp, cal, dist = moment.strftime('%d/%m/%Y %H:%M'), f'{calories:,}'.replace(',', ' '), \
+                f'{rng.uniform(1, 80):.2f}'.replace('.', ',')
+        out.write(f'"{activity}","{stamp}","Séance {index}","{dist}","{cal}","{duration}","{rng.randint(90, 170)}"\n')
+    return out.getvalue().encode('utf-8-sig')
+
+
+def garmin_types(count, seed=42):
+    """Types d'activité tels que reçus : casse et espaces variables, quelques inconnus."""
+    rng = random.Random(seed)
+    unknown = ['Kitesurf', 'Pétanque', 'breathwork', 'Unknown Activity']
+    values = []
+    for _ in range(count):
+        value = rng.choice(unknown) if rng.random() < 0.15 else rng.choice(GARMIN_TYPES)
+        values.append(rng.choice([value, value.upper(), f' {value} ']))
+    return values
+
+
+def photo_bytes(size, fmt='JPEG', orientation=None, alpha=False, seed=42):
+    """Image au contenu photographique (dégradés + bruit), encodée comme par un téléphone."""
+    from PIL import Image
+    rng = random.Random(seed)
+    width, height = size
+    # Bruit à basse résolution agrandi (grandes zones) + bruit fin (texture, coût JPEG réaliste)
+    base = Image.effect_noise((width // 16, height // 16), 60).resize(size, Image.BICUBIC)
+    grain = Image.effect_noise(size, 25)
+    gradient = Image.linear_gradient('L').resize(size)
+    channels = [Image.blend(base, grain, rng.uniform(0.2, 0.4)), gradient, Image.blend(gradient, grain, 0.3)]
+    mode = 'RGBA' if alpha else 'RGB'
+    if alpha:
+        channels.append(Image.radial_gradient('L').resize(size))
+    image = Image.merge(mode, channels)
+    out = io.BytesIO()
+    if fmt == 'JPEG':
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        image.save(out, 'JPEG', quality=92, exif=exif.tobytes())
+    else:
+        image.save(out, fmt)
+    return out.getvalue()
+
+
+def meal_foods(count, seed=42):
+    rng = random.Random(seed)
+    foods = ['pain complet', 'café', 'yaourt nature', 'pomme', 'riz basmati', 'poulet rôti', 'salade verte',
+             'pâtes', 'soupe de légumes', 'fromage', 'crème brûlée', 'jus d\'orange', 'œufs brouillés']
+    values = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.1:
+            values.append(None)
+        elif roll < 0.2:
+            values.append('[]')
+        else:
+            values.append(json.dumps(rng.sample(foods, rng.randint(1, 6)), ensure_ascii=roll < 0.6))
+    return values
+
+
+# ---------------------------------------------------------------------------
+# Mesure
+# ---------------------------------------------------------------------------
+
+def measure(func, items, repeat):
+    """Médiane du temps (s) et pic d'allocations (Kio) d'un appel de func()."""
+    func()  # échauffement (imports paresseux, caches)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    median = statistics.median(timings)
+    return {
+        'items': items,
+        'median_ms': median * 1000,
+        'per_item_us': median / items * 1e6,
+        'peak_kib': peak / 1024,
+    }
+
+
+def csv_cases(garmin, sizes):
+    # Le décodage fait partie du coût, comme dans la route
+    for rows in sizes:
+        for lang in ('en', 'fr'):
+            content = steps_csv(rows, lang)
+            yield f'steps_csv_{lang}_{rows}', rows, lambda c=content: garmin.parse_garmin_steps_csv(c.decode('utf-8-sig'))
+            content = activities_csv(rows, lang)
+            yield f'activities_csv_{lang}_{rows}', rows, lambda c=content: garmin.parse_garmin_activities_csv(c.decode('utf-8-sig'))
+
+
+def map_cases(garmin, sizes):
+    for count in sizes:
+        values = garmin_types(count)
+        yield f'map_activity_{count}', count, lambda v=values: [garmin.map_garmin_activity(x) for x in v]
+
+
+def foods_cases(models, sizes):
+    for count in sizes:
+        entries = [models.MealEntry(foods=foods) for foods in meal_foods(count)]
+        yield f'get_foods_list_{count}', count, lambda e=entries: [entry.get_foods_list() for entry in e]
+
+
+def image_cases(photos, out_dir):
+    if not photos.PILLOW_AVAILABLE:
+        print('Pillow absent : compress_and_save non mesuré')
+        return
+    images = {
+        'photo_12mpx_jpeg_rot': photo_bytes((4032, 3024), orientation=6),
+        'photo_12mpx_jpeg': photo_bytes((3024, 4032)),
+        'screenshot_png_rgba': photo_bytes((1170, 2532), fmt='PNG', alpha=True),
+        'photo_small_jpeg': photo_bytes((900, 1200)),
+    }
+    for name, data in images.items():
+        target = os.path.join(out_dir, f'{name}.jpg')
+        yield f'compress_{name}', 1, lambda d=data, t=target: photos.compress_and_save(io.BytesIO(d), t)
+
+
+def load_modules():
+    """Modules mesurés : aucun besoin d'application ni de base."""
+    sys.path.insert(0, ROOT)
+    import models
+    from blueprints import garmin, photos
+    return garmin, photos, models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000', help='tailles des jeux de données, séparées par des virgules')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='sous-ensemble parmi csv,map,images,foods')
+    parser.add_argument('--compare', help='résultats précédents (JSON) à comparer')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    groups = set(args.only.split(',')) if args.only else {'csv', 'map', 'images', 'foods'}
+    tmp_dir = tempfile.mkdtemp(prefix='nutristep-hot-')
+    garmin, photos, models = load_modules()
+
+    cases = []
+    if 'csv' in groups:
+        cases += csv_cases(garmin, sizes)
+    if 'map' in groups:
+        cases += map_cases(garmin, sizes)
+    if 'images' in groups:
+        cases += image_cases(photos, tmp_dir)
+    if 'foods' in groups:
+        cases += foods_cases(models, sizes)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+
+    results = {}
+    print(f"{'cas':<32} {'éléments':>9} {'médiane ms':>11} {'µs/élément':>11} {'pic Kio':>9}"
+          + (f" {'Δ temps':>8}" if previous else ''))
+    try:
+        for name, items, func in cases:
+            r = results[name] = measure(func, items, args.repeat)
+            line = (f"{name:<32} {items:>9} {r['median_ms']:>11.2f} {r['per_item_us']:>11.2f} "
+                    f"{r['peak_kib']:>9.0f}")
+            if previous and previous.get(name, {}).get('median_ms'):
+                before = previous[name]['median_ms']
+                line += f" {(r['median_ms'] - before) / before * 100:>+7.0f}%"
+            print(line, flush=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if not args.no_save:
+        sys.path.insert(0, os.path.join(ROOT, 'bench'))
+        from pages import git_revision
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-hot_paths.json")
+        with open(path, 'w') as f:
+            json.dump({'revision': git_revision(), 'created_at': datetime.now().isoformat(),
+                       'params': vars(args), 'results': results}, f, indent=2)
+        print(f"Résultats enregistrés : {os.path.relpath(path, ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
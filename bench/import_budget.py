@@ -0,0 +1,90 @@
+"""Budget de temps de démarrage : `python -X importtime -c "import app"`.
+
+Lance l'import de l'application dans un interpréteur neuf (base SQLite
+temporaire), affiche le temps cumulé et les modules les plus coûteux, et
+échoue (code de sortie 1) si :
+
+- le temps d'import dépasse le budget (médiane de plusieurs essais) ;
+- un module chargé à la demande (garminconnect, Pillow, Authlib, pytest)
+  est importé au démarrage.
+
+    python bench/import_budget.py
+    python bench/import_budget.py --budget-ms 600 --runs 5 --top 15
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules importés seulement par les routes qui en ont besoin
+LAZY_MODULES = ('garminconnect', 'PIL', 'authlib', 'pytest')
+DEFAULT_BUDGET_MS = 800
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def import_profile(db_path):
+    """[(module, profondeur, self µs, cumulé µs)] des imports faits par app.
+
+    -X importtime liste les sous-modules avant leur parent : on garde les
+    lignes entre l'import précédent de premier niveau (site…) et « app ».
+    """
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"Échec de l'import de app :\n{result.stderr}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            rows.append((match.group(4), depth, int(match.group(1)), int(match.group(2))))
+            if depth == 0 and match.group(4) == 'app':
+                return rows
+            if depth == 0:
+                rows = []
+    sys.exit("Import de app absent de la sortie -X importtime")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    totals, profile = [], []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for _ in range(args.runs):
+            profile = import_profile(os.path.join(tmp_dir, 'import.db'))
+            totals.append(profile[-1][3] / 1000)
+    total = statistics.median(totals)
+
+    # Dépendances directes de app : profondeur 1 sous l'entrée « app »
+    print(f"{'module':<32} {'cumulé ms':>10}")
+    direct = [(name, cumulative) for name, depth, _, cumulative in profile if depth == 1]
+    for name, cumulative in sorted(direct, key=lambda row: -row[1])[:args.top]:
+        print(f"{name:<32} {cumulative / 1000:>10.1f}")
+    print(f"{'import app (médiane)':<32} {total:>10.1f}  (budget {args.budget_ms:.0f} ms, essais : "
+          + ', '.join(f'{t:.0f}' for t in totals) + ')')
+
+    failures = []
+    loaded = {name.split('.')[0] for name, _, _, _ in profile}
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    if eager:
+        failures.append(f"modules importés au démarrage au lieu d'être chargés à la demande : {', '.join(eager)}")
+    if total > args.budget_ms:
+        failures.append(f"import de app en {total:.0f} ms, au-delà du budget de {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"ÉCHEC : {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""Benchmark des pages principales sur une base synthétique.
+
+Remplit une base SQLite temporaire (bench/synthetic.py), puis mesure les
+routes principales :
+
+- `client` : client de test Flask, une requête à la fois (coût serveur pur) ;
+- `http` : serveur WSGI local multithread et N clients HTTP concurrents.
+
+Affiche p50/p95/p99 et le débit par route, et enregistre les résultats
+dans bench/results/ pour comparer deux versions :
+
+    python bench/pages.py --years 3 --requests 30
+    python bench/pages.py --mode http --concurrency 8 --requests 200
+    python bench/pages.py --compare bench/results/20250101-120000-client.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'bench', 'results')
+
+
+def routes(today):
+    """Routes mesurées (nom → chemin)."""
+    quarter = (today - timedelta(days=90)).isoformat()
+    two_years = (today - timedelta(days=730)).isoformat()
+    return {
+        'dashboard': '/dashboard',
+        'meals': '/meals',
+        'meals_past_month': '/meals?month_offset=-6',
+        'recap_2_weeks': '/meals/recap',
+        'recap_quarter': f'/meals/recap?start_date={quarter}',
+        'activities': '/activities',
+        'weight': '/weight',
+        'api_weight_data': '/api/weight-data?days=365',
+        'api_weight_trend': '/api/weight-trend?days=all',
+        'api_goal_projection': '/api/goal-projection',
+        'api_food_analytics': f'/api/food-analytics?start={quarter}',
+        'api_steps_series': f'/api/steps-series?start={two_years}&bucket=week',
+        'api_measurements': '/api/measurements-data?days=all',
+        'api_daily_summary': f'/api/daily-summary?start={quarter}',
+    }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def load_app(db_path, photo_root):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    # Les photos générées ne vont pas dans static/ du dépôt
+    os.environ['UPLOAD_FOLDER'] = photo_root
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, 'bench'))
+    import app as nutristep
+    nutristep.app.logger.disabled = True
+    return nutristep
+
+
+def run_client(nutristep, user_id, paths, count, warmup):
+    client = nutristep.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+    results = {}
+    for name, path in paths.items():
+        for _ in range(warmup):
+            client.get(path)
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for _ in range(count):
+            t0 = time.perf_counter()
+            response = client.get(path)
+            latencies.append(time.perf_counter() - t0)
+            errors += response.status_code >= 400
+        results[name] = summarize(latencies, time.perf_counter() - started, errors)
+    return results
+
+
+def run_http(nutristep, user_id, paths, count, warmup, concurrency):
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, nutristep.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    # Cookie de session signé comme le ferait la connexion
+    serializer = nutristep.app.session_interface.get_signing_serializer(nutristep.app)
+    cookie = f"{nutristep.app.config.get('SESSION_COOKIE_NAME', 'session')}={serializer.dumps({'user_id': user_id})}"
+
+    def fetch(path):
+        request = urllib.request.Request(base + path, headers={'Cookie': cookie})
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                ok = response.status < 400
+        except Exception:
+            ok = False
+        return time.perf_counter() - t0, ok
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for name, path in paths.items():
+                list(pool.map(fetch, [path] * warmup))
+                started = time.perf_counter()
+                samples = list(pool.map(fetch, [path] * count))
+                elapsed = time.perf_counter() - started
+                results[name] = summarize([s[0] for s in samples], elapsed,
+                                          sum(1 for _, ok in samples if not ok))
+    finally:
+        server.shutdown()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous=None):
+    print(f"{'route':<22} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err':>4}"
+          + (f" {'Δ p50':>8}" if previous else ''))
+    for name, r in results.items():
+        line = (f"{name:<22} {r['throughput']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                f"{r['p99_ms']:>8.1f} {r['errors']:>4}")
+        if previous and name in previous:
+            before = previous[name]['p50_ms']
+            line += f" {(r['p50_ms'] - before) / before * 100:>+7.0f}%" if before else ''
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['client', 'http'], default='client')
+    parser.add_argument('--users', type=int, default=1)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=30, help='requêtes mesurées par route')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--photos', action='store_true', help='générer aussi les photos mensuelles')
+    parser.add_argument('--routes', help='sous-ensemble de routes, séparées par des virgules')
+    parser.add_argument('--compare', help='résultats précédents (JSON) à comparer')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='nutristep-bench-')
+    photo_root = os.path.join(tmp_dir, 'photos')
+    nutristep = load_app(os.path.join(tmp_dir, 'bench.db'), photo_root)
+    import synthetic
+
+    with nutristep.app.app_context():
+        started = time.perf_counter()
+        ids, totals = synthetic.seed(args.users, args.years,
+                                     photo_root=photo_root if args.photos else None)
+        print(f"Base synthétique : {totals} en {time.perf_counter() - started:.1f} s")
+
+    paths = routes(datetime.utcnow().date())
+    if args.routes:
+        paths = {name: paths[name] for name in args.routes.split(',')}
+    if args.mode == 'client':
+        results = run_client(nutristep, ids[0], paths, args.requests, args.warmup)
+    else:
+        results = run_http(nutristep, ids[0], paths, args.requests, args.warmup, args.concurrency)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+    print_results(results, previous)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.mode}.json")
+        with open(path, 'w') as f:
+            json.dump({
+                'revision': git_revision(),
+                'created_at': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'params': vars(args),
+                'dataset': totals,
+                'results': results,
+            }, f, indent=2)
+        print(f"Résultats enregistrés : {os.path.relpath(path, ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark du moteur de récap sur une période d'un an.
+
+Données synthétiques : 5 repas par jour, des pas quotidiens et une
+activité sportive un jour sur trois.
+
+    python bench/recap_year.py --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import recap  # noqa: E402
+
+FOODS = ['pain', 'café', 'yaourt', 'pomme', 'riz', 'poulet', 'salade', 'pâtes', 'soupe', 'fromage']
+
+
+def synthetic_year(start, days=365, seed=42):
+    """Lignes telles que les renvoient les requêtes du récap (repas, aliments, activités)."""
+    rng = random.Random(seed)
+    meals, foods, activities = [], [], []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for meal_type in recap.MEAL_TYPES:
+            meal_id = len(meals) + 1
+            is_none = meal_type in recap.SNACK_MEALS and rng.random() < 0.4
+            names = [] if is_none else rng.sample(FOODS, rng.randint(1, 4))
+            qualification = rng.choices(['normal', 'exception', 'equilibrage'], [8, 1, 1])[0]
+            meals.append((meal_id, day, meal_type, qualification, is_none))
+            foods.extend((meal_id, name) for name in names)
+        activities.append((day, 'Pas', 0, rng.randint(2000, 15000), None, 'Import Garmin CSV'))
+        if offset % 3 == 0:
+            activities.append((day, 'Vélo', rng.randint(20, 90), None, rng.randint(150, 600), ''))
+    return meals, foods, activities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+
+    start = date(2025, 1, 1)
+    end = start + timedelta(days=args.days - 1)
+    meals, foods, activities = synthetic_year(start, args.days)
+    # Agrégats calculés en SQL par la route (GROUP BY, jointure sur meal_food)
+    qualification_counts = Counter(qualification for _, _, _, qualification, _ in meals)
+    with_foods = {meal_id for meal_id, _ in foods}
+    snack_types = {meal_type for meal_id, _, meal_type, _, is_none in meals
+                   if meal_type in recap.SNACK_MEALS and not is_none and meal_id in with_foods}
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = recap.build_recap(start, end, meals, foods, activities, end,
+                                   qualification_counts, snack_types)
+        timings.append(time.perf_counter() - started)
+
+    print(f"{args.days} jours, {len(meals)} repas, {len(activities)} activités")
+    print(f"build_recap : médiane {statistics.median(timings) * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms ({args.repeat} essais)")
+    print(f"stats : {result['stats']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""Test de charge du serveur : les routes lentes affament-elles les rapides ?
+
+Lance gunicorn avec gunicorn.conf.py pour chaque profil (sync, gthread,
+gevent si installé) sur une base synthétique, puis mesure la latence des
+pages rapides (tableau de bord, API poids) :
+
+- seules ;
+- pendant que des clients enchaînent des requêtes lentes : import Garmin
+  (`/garmin/fetch`, Garmin Connect simulé : chaque appel attend
+  --upstream-ms, comme un appel réseau) et envoi d'une photo 12 Mpx
+  (`/photos/upload`, compression Pillow réelle).
+
+Avec un seul worker sync, chaque page rapide attend la fin des requêtes
+lentes en file ; avec gthread, elle est servie par un thread libre.
+
+    python bench/serving.py
+    python bench/serving.py --profiles sync,gthread --workers 1 --slow-clients 4 --duration 15
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import uuid
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'bench', 'results')
+
+FAST_PATHS = ['/dashboard', '/api/weight-data?days=90']
+SECRET_KEY = 'bench-serving'
+
+
+# ---------------------------------------------------------------------------
+# Application servie par gunicorn (serving:bench_app())
+# ---------------------------------------------------------------------------
+
+class FakeGarmin:
+    """Garmin Connect simulé : chaque appel attend BENCH_UPSTREAM_MS."""
+
+    def __init__(self, email, password):
+        self.delay = int(os.environ.get('BENCH_UPSTREAM_MS', 100)) / 1000
+
+    def login(self):
+        time.sleep(self.delay)
+
+    def get_steps_data(self, day):
+        time.sleep(self.delay)
+        return [{'steps': 450}] * 20
+
+    def get_activities_by_date(self, start, end):
+        time.sleep(self.delay)
+        return [{'activityId': 1, 'activityType': {'typeKey': 'running'}, 'duration': 1800,
+                 'calories': 320, 'startTimeLocal': f'{end} 07:30:00'}]
+
+
+def bench_app():
+    """Application réelle, Garmin Connect remplacé par FakeGarmin."""
+    sys.modules['garminconnect'] = types.SimpleNamespace(Garmin=FakeGarmin)
+    from app import app
+    return app
+
+
+# ---------------------------------------------------------------------------
+# Client HTTP
+# ---------------------------------------------------------------------------
+
+def multipart(files):
+    """Corps multipart/form-data : {champ: (nom de fichier, octets)}."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for field, (filename, data) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+                     f'filename="{filename}"\r\nContent-Type: image/jpeg\r\n\r\n'.encode() + data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def request(port, cookie, method, path, body=None, content_type=None):
+    """(durée s, statut) ; les redirections ne sont pas suivies."""
+    headers = {'Cookie': cookie}
+    if content_type:
+        headers['Content-Type'] = content_type
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+    except OSError:
+        status = 0
+    finally:
+        conn.close()
+    return time.perf_counter() - started, status
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(profile, args, env, log_path):
+    port = free_port()
+    env = dict(env, SERVING_PROFILE=profile, GUNICORN_THREADS=str(args.threads),
+               BENCH_UPSTREAM_MS=str(args.upstream_ms))
+    env.pop('PORT', None)
+    with open(log_path, 'ab') as log:
+        proc = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+             '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+             '--pythonpath', f"{ROOT},{os.path.join(ROOT, 'bench')}", 'serving:bench_app()'],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            break
+        _, status = request(port, '', 'GET', '/login')
+        if status:
+            return proc, port
+        time.sleep(0.2)
+    proc.kill()
+    with open(log_path) as log:
+        sys.exit(f'gunicorn ({profile}) ne démarre pas :\n{log.read()[-2000:]}')
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def run_load(port, cookie, duration, fast_clients, slow_requests, slow_clients):
+    """Latences des pages rapides (et des requêtes lentes) pendant duration secondes."""
+    stop = threading.Event()
+    fast, slow, errors = [], [], [0]
+
+    def fast_loop(offset):
+        index = offset
+        while not stop.is_set():
+            elapsed, status = request(port, cookie, 'GET', FAST_PATHS[index % len(FAST_PATHS)])
+            index += 1
+            fast.append(elapsed)
+            errors[0] += not status or status >= 400
+
+    def slow_loop(offset):
+        index = offset
+        while not stop.is_set():
+            method, path, body, content_type = slow_requests[index % len(slow_requests)]
+            index += 1
+            elapsed, status = request(port, cookie, method, path, body, content_type)
+            slow.append(elapsed)
+            errors[0] += not status or status >= 400
+
+    threads = [threading.Thread(target=slow_loop, args=(i,)) for i in range(slow_clients)]
+    for thread in threads:
+        thread.start()
+    if slow_clients:
+        time.sleep(0.2)  # les requêtes lentes occupent le serveur avant les premières pages rapides
+    threads += [threading.Thread(target=fast_loop, args=(i,)) for i in range(fast_clients)]
+    for thread in threads[slow_clients:]:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return fast, slow, errors[0]
+
+
+# ---------------------------------------------------------------------------
+# Programme principal
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    default_profiles = 'sync,gthread' + (',gevent' if importlib.util.find_spec('gevent') else '')
+    parser.add_argument('--profiles', default=default_profiles)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8, help='threads par worker (gthread)')
+    parser.add_argument('--duration', type=float, default=10, help='secondes par mesure')
+    parser.add_argument('--fast-clients', type=int, default=2)
+    parser.add_argument('--slow-clients', type=int, default=4)
+    parser.add_argument('--slow', default='garmin,upload', help='requêtes lentes parmi garmin,upload')
+    parser.add_argument('--upstream-ms', type=int, default=100, help='latence simulée par appel Garmin')
+    parser.add_argument('--import-days', type=int, default=14)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(ROOT, 'bench'))
+    from pages import git_revision, load_app, summarize
+
+    tmp_dir = tempfile.mkdtemp(prefix='nutristep-serving-')
+    db_path = os.path.join(tmp_dir, 'serving.db')
+    photo_root = os.path.join(tmp_dir, 'photos')
+    os.environ['SECRET_KEY'] = SECRET_KEY
+    nutristep = load_app(db_path, photo_root)
+    import synthetic
+
+    with nutristep.app.app_context():
+        ids, totals = synthetic.seed(1, args.years)
+        models = synthetic.models
+        models.db.session.get(models.User, ids[0]).track_photos = True
+        models.db.session.commit()
+    print(f'Base synthétique : {totals}')
+
+    serializer = nutristep.app.session_interface.get_signing_serializer(nutristep.app)
+    cookie = f"{nutristep.app.config['SESSION_COOKIE_NAME']}={serializer.dumps({'user_id': ids[0]})}"
+
+    slow_requests = []
+    kinds = args.slow.split(',')
+    if 'garmin' in kinds:
+        form = f'garmin_email=bench%40example.com&garmin_password=x&import_days={args.import_days}'
+        slow_requests.append(('POST', '/garmin/fetch', form, 'application/x-www-form-urlencoded'))
+    if 'upload' in kinds:
+        if importlib.util.find_spec('PIL'):
+            from hot_paths import photo_bytes
+            angle = synthetic.models.PHOTO_ANGLES[0][0]
+            body, content_type = multipart({f'photo_{angle}': ('photo.jpg', photo_bytes((4032, 3024), orientation=6))})
+            slow_requests.append(('POST', '/photos/upload', body, content_type))
+        else:
+            print('Pillow absent : envoi de photos non mesuré')
+    if not slow_requests:
+        sys.exit('Aucune requête lente à mesurer')
+
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', UPLOAD_FOLDER=photo_root)
+    log_path = os.path.join(tmp_dir, 'gunicorn.log')
+    results = {}
+    print(f"{'profil':<9} {'charge':<10} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'err':>4} {'lentes':>7} {'p50 lentes':>11}")
+    for profile in args.profiles.split(','):
+        proc, port = start_server(profile, args, env, log_path)
+        try:
+            for path in FAST_PATHS:
+                request(port, cookie, 'GET', path)  # échauffement (tables, caches)
+            for load in ('seules', 'lentes'):
+                slow_clients = args.slow_clients if load == 'lentes' else 0
+                fast, slow, errors = run_load(port, cookie, args.duration, args.fast_clients,
+                                              slow_requests, slow_clients)
+                r = summarize(fast, args.duration, errors)
+                r['max_ms'] = max(fast) * 1000 if fast else 0.0
+                r['slow'] = summarize(slow, args.duration, 0) if slow else None
+                results[f'{profile}_{load}'] = r
+                slow_info = f"{len(slow):>7} {r['slow']['p50_ms']:>11.0f}" if slow else f"{'-':>7} {'-':>11}"
+                print(f"{profile:<9} {load:<10} {r['throughput']:>7.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                      f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['errors']:>4} {slow_info}", flush=True)
+        finally:
+            stop_server(proc)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-serving.json")
+        with open(path, 'w') as f:
+            json.dump({'revision': git_revision(), 'created_at': datetime.now().isoformat(),
+                       'params': vars(args), 'dataset': totals, 'results': results}, f, indent=2)
+        print(f"Résultats enregistrés : {os.path.relpath(path, ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
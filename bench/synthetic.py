@@ -0,0 +1,153 @@
+"""Générateur de données synthétiques réalistes pour les benchmarks.
+
+Par utilisateur et sur plusieurs années : une pesée quasi quotidienne
+(tendance lente + bruit), cinq repas par jour, des pas importés chaque
+jour façon Garmin, une activité sportive tous les deux ou trois jours,
+des mensurations et trois photos par mois.
+
+Utilisé par bench/pages.py ; peut aussi remplir une base de dev :
+
+    DATABASE_URL=sqlite:////tmp/dev.db python bench/synthetic.py --users 3 --years 2
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import models  # noqa: E402
+
+FOODS = {
+    'breakfast': ['pain', 'beurre', 'confiture', 'café', 'thé', 'yaourt', 'céréales', 'jus d\'orange', 'banane'],
+    'snack_morning': ['pomme', 'amandes', 'compote', 'barre de céréales'],
+    'lunch': ['poulet', 'riz', 'pâtes', 'salade', 'steak', 'haricots verts', 'poisson', 'quiche', 'fromage', 'pain'],
+    'snack_afternoon': ['yaourt', 'chocolat', 'fruit', 'gâteau', 'biscuits'],
+    'dinner': ['soupe', 'omelette', 'légumes', 'pizza', 'jambon', 'purée', 'salade', 'pain', 'fromage'],
+}
+SPORTS = [('Course', 30, 60, 8), ('Vélo', 40, 120, 7), ('Natation', 30, 60, 9), ('Musculation', 30, 75, 5)]
+
+
+def _photo_bytes(rng, size=(900, 1200)):
+    """JPEG de taille réaliste (bruit coloré), ou quelques octets sans Pillow."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return b'\xff\xd8\xff\xd9'
+    image = Image.effect_noise(size, rng.randint(20, 80)).convert('RGB')
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=80)
+    return out.getvalue()
+
+
+def seed_user(user, days, rng, photo_root=None):
+    """Insère l'historique d'un utilisateur (insertions groupées). Retourne les compteurs."""
+    db = models.db
+    today = datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+    weights, meals, activities, measurements, photos = [], [], [], [], []
+    weight = rng.uniform(70, 110)
+    photo = _photo_bytes(rng) if photo_root else None
+
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        weight += rng.gauss(-0.004, 0.05)
+        if rng.random() < 0.9:
+            weights.append({'user_id': user.id, 'weight': round(weight + rng.gauss(0, 0.5), 1), 'date': day})
+
+        for meal_type, choices in FOODS.items():
+            snack = meal_type.startswith('snack')
+            if snack and rng.random() < 0.3:
+                continue
+            is_none = snack and rng.random() < 0.3
+            foods = [] if is_none else rng.sample(choices, rng.randint(1, 3))
+            meals.append({
+                'user_id': user.id, 'meal_type': meal_type, 'date': day,
+                'foods': json.dumps(foods, ensure_ascii=False),
+                'qualification': rng.choices(['normal', 'exception', 'equilibrage'], [8, 1, 1])[0],
+                'is_none': is_none,
+            })
+
+        activities.append({'user_id': user.id, 'activity_type': 'Pas', 'duration': 0,
+                           'steps': rng.randint(2000, 16000), 'calories_burned': None,
+                           'date': day, 'note': 'Import Garmin CSV'})
+        if rng.random() < 0.4:
+            sport, low, high, kcal = rng.choice(SPORTS)
+            duration = rng.randint(low, high)
+            activities.append({'user_id': user.id, 'activity_type': sport, 'duration': duration, 'steps': None,
+                               'calories_burned': duration * kcal, 'date': day, 'note': 'Import Garmin'})
+
+        if day.day == 1:
+            measurements.append({
+                'user_id': user.id, 'date': day,
+                'waist': round(weight * 0.95 + rng.gauss(0, 1), 1), 'hips': round(weight + 15 + rng.gauss(0, 1), 1),
+                'thigh': round(weight * 0.6 + rng.gauss(0, 1), 1), 'arm': round(weight * 0.35, 1),
+                'chest': None, 'calf': None,
+            })
+            if photo_root:
+                for angle, _, _ in models.PHOTO_ANGLES:
+                    # Nom unique comme à l'envoi (blueprints/photos.py)
+                    filename = f'{day.isoformat()}_{angle}_{uuid.uuid4().hex[:8]}.jpg'
+                    folder = os.path.join(photo_root, str(user.id), day.strftime('%Y-%m'))
+                    os.makedirs(folder, exist_ok=True)
+                    with open(os.path.join(folder, filename), 'wb') as f:
+                        f.write(photo)
+                    photos.append({'user_id': user.id, 'date': day, 'angle': angle, 'filename': filename})
+
+    for model, rows in ((models.WeightEntry, weights), (models.MealEntry, meals),
+                        (models.ActivityEntry, activities), (models.BodyMeasurement, measurements),
+                        (models.PhotoEntry, photos)):
+        if rows:
+            db.session.execute(db.insert(model), rows)
+    db.session.commit()
+    return {'weights': len(weights), 'meals': len(meals), 'activities': len(activities),
+            'measurements': len(measurements), 'photos': len(photos)}
+
+
+def seed(users=1, years=3, seed_value=42, photo_root=None):
+    """Crée `users` comptes avec `years` ans d'historique (dans un contexte d'application)."""
+    db = models.db
+    rng = random.Random(seed_value)
+    db.create_all()
+    ids, totals = [], {}
+    for index in range(users):
+        user = models.User(
+            username=f'bench{index}', email=f'bench{index}@example.com',
+            height=rng.randint(155, 190), gender=rng.choice('MF'),
+            birth_date=date(rng.randint(1960, 2000), rng.randint(1, 12), 1),
+            target_weight=rng.randint(60, 80),
+            track_measurements=True, track_photos=bool(photo_root),
+        )
+        db.session.add(user)
+        db.session.commit()
+        for name, count in seed_user(user, years * 365, rng, photo_root).items():
+            totals[name] = totals.get(name, 0) + count
+        ids.append(user.id)
+    models.backfill_meal_foods()
+    for user in models.User.query.filter(models.User.id.in_(ids)):
+        models.refresh_daily_summaries(user)
+    db.session.commit()
+    return ids, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from app import app
+    started = time.perf_counter()
+    with app.app_context():
+        ids, totals = seed(args.users, args.years, args.seed)
+    print(f"{len(ids)} utilisateur(s) en {time.perf_counter() - started:.1f} s : {totals}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark du moteur de tendance du poids sur une série quotidienne de 10 ans.
+
+Compare le calcul complet (ce que fait un worker sans cache) à l'ajout
+incrémental d'une pesée dans la tendance déjà calculée.
+
+    python bench/weight_trend.py --years 10 --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import trends  # noqa: E402
+
+
+def synthetic_series(start, days, seed=42):
+    """Pesées quotidiennes avec dérive lente, bruit et quelques jours manqués."""
+    rng = random.Random(seed)
+    weight = 90.0
+    rows = []
+    for offset in range(days):
+        weight += rng.gauss(-0.003, 0.05)
+        if rng.random() < 0.15:
+            continue
+        rows.append((start + timedelta(days=offset), round(weight + rng.gauss(0, 0.6), 1)))
+    return rows
+
+
+def _timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = synthetic_series(date(2016, 1, 1), args.years * 365)
+    full = _timed(lambda: trends.compute_trend(rows), args.repeat)
+    # Les 365 dernières pesées ajoutées une à une sur la tendance existante
+    engine = trends.compute_trend(rows[:-365])
+    started = time.perf_counter()
+    for day, weight in rows[-365:]:
+        engine.update(day, weight)
+    single = (time.perf_counter() - started) / 365
+    last_date = rows[-1][0]
+    series = _timed(lambda: engine.series(last_date - timedelta(days=365)), args.repeat)
+
+    print(f"{len(rows)} pesées sur {args.years} ans")
+    print(f"calcul complet     : {full * 1000:.2f} ms")
+    print(f"pesée incrémentale : {single * 1e6:.1f} µs")
+    print(f"série d'un an      : {series * 1000:.2f} ms")
+    print(f"dernier point      : {engine.summary()}")
+
+
+if __name__ == '__main__':
+    main()
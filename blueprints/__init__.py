@@ -0,0 +1 @@
+"""Blueprints de l'application, enregistrés par app.create_app."""
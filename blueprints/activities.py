@@ -0,0 +1,201 @@
+"""Activités et pas (séries quotidiennes, hebdomadaires ou mensuelles)."""
+from datetime import datetime, timedelta
+
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from sqlalchemy import case, cast, func
+
+import recap
+from models import ActivityEntry, User, bump_period_versions, db, refresh_daily_summaries
+from blueprints.auth import login_required
+
+bp = Blueprint('activities', __name__)
+
+# ========================================
+# ROUTES ACTIVITÉS
+# ========================================
+
+@bp.route('/activities')
+@login_required
+def activities():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+    today = datetime.utcnow().date()
+    entries = ActivityEntry.query.filter_by(user_id=user_id).order_by(
+        ActivityEntry.date.desc(),
+        ActivityEntry.created_at.desc()
+    ).all()
+
+    # Statistiques générales
+    week_ago = today - timedelta(days=7)
+    week_count = ActivityEntry.query.filter(
+        ActivityEntry.user_id == user_id,
+        ActivityEntry.date >= week_ago
+    ).count()
+    total_steps = sum(entry.steps or 0 for entry in entries)
+    total_calories = sum(entry.calories_burned or 0 for entry in entries)
+    stats = {
+        'week_count': week_count,
+        'total_steps': total_steps,
+        'total_calories': total_calories
+    }
+
+    # Données graphique pas (30 derniers jours, aujourd'hui compris)
+    chart_start = today - timedelta(days=29)
+    series = steps_series(user_id, chart_start, today)
+
+    # Autres activités par date ISO pour enrichir le tooltip
+    activities_by_date = {}
+    for entry in ActivityEntry.query.filter(
+        ActivityEntry.user_id == user_id,
+        ActivityEntry.date >= chart_start,
+        ActivityEntry.activity_type != 'Pas'
+    ).order_by(ActivityEntry.date.asc()):
+        activities_by_date.setdefault(entry.date.isoformat(), []).append({
+            'type': entry.activity_type,
+            'duration': entry.duration,
+            'calories': entry.calories_burned
+        })
+
+    all_steps = series['steps']
+    steps_data = {
+        'dates': series['dates'],
+        'labels': [datetime.strptime(d, '%Y-%m-%d').strftime('%d/%m') for d in series['dates']],
+        'steps': all_steps
+    }
+
+    non_zero = [s for s in all_steps if s > 0]
+    steps_stats = {'average': int(sum(non_zero) / len(non_zero)) if non_zero else 0}
+
+    return render_template('activities.html',
+                         entries=entries,
+                         today=today,
+                         stats=stats,
+                         steps_data=steps_data,
+                         steps_stats=steps_stats,
+                         activities_by_date=activities_by_date,
+                         user=user,
+                         theme=user.theme)
+
+@bp.route('/activities/add', methods=['POST'])
+@login_required
+def add_activity():
+    user_id = session['user_id']
+    activity_type = request.form.get('activity_type')
+    date_str = request.form.get('date')
+    note = request.form.get('note', '')
+
+    date = datetime.strptime(date_str, '%Y-%m-%d').date()
+
+    # Pour le type "Pas"
+    if activity_type == 'Pas':
+        steps = int(request.form.get('steps', 0))
+        duration = 0
+        calories_burned = None
+
+        new_entry = ActivityEntry(
+            user_id=user_id,
+            activity_type=activity_type,
+            duration=duration,
+            steps=steps,
+            calories_burned=calories_burned,
+            date=date,
+            note=note
+        )
+    else:
+        # Pour les autres activités
+        duration = int(request.form.get('duration', 0))
+        calories_burned = request.form.get('calories_burned')
+
+        new_entry = ActivityEntry(
+            user_id=user_id,
+            activity_type=activity_type,
+            duration=duration,
+            steps=None,
+            calories_burned=int(calories_burned) if calories_burned else None,
+            date=date,
+            note=note
+        )
+
+    db.session.add(new_entry)
+    bump_period_versions(user_id, 'activities', [date])
+    refresh_daily_summaries(User.query.get(user_id), [date])
+    db.session.commit()
+
+    flash('Activité enregistrée !', 'success')
+    return redirect(url_for('activities.activities'))
+
+@bp.route('/activities/delete/<int:id>')
+@login_required
+def delete_activity(id):
+    entry = ActivityEntry.query.get_or_404(id)
+    if entry.user_id != session['user_id']:
+        flash('Action non autorisée.', 'danger')
+        return redirect(url_for('activities.activities'))
+
+    db.session.delete(entry)
+    bump_period_versions(entry.user_id, 'activities', [entry.date])
+    refresh_daily_summaries(entry.user, [entry.date])
+    db.session.commit()
+    flash('Activité supprimée.', 'info')
+    return redirect(url_for('activities.activities'))
+
+
+
+STEPS_BUCKETS = ('day', 'week', 'month')
+# Période maximale par taille de seau : quelques centaines de points au plus
+STEPS_MAX_DAYS = {'day': recap.MAX_RECAP_DAYS, 'week': 5 * 366, 'month': 20 * 366}
+
+def bucket_start(day, bucket):
+    """Premier jour du seau (lundi pour une semaine, 1er pour un mois)."""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_bucket(day, bucket):
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    if bucket == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+def bucket_expression(column, bucket):
+    """Expression SQL du début de seau, selon le moteur de base."""
+    if bucket == 'day':
+        return column
+    if db.engine.dialect.name == 'postgresql':
+        return cast(func.date_trunc(bucket, column), db.Date)
+    if bucket == 'week':
+        # SQLite : avancer au dimanche de la semaine puis reculer au lundi
+        return func.date(column, 'weekday 0', '-6 days')
+    return func.date(column, 'start of month')
+
+def steps_series(user_id, start, end, bucket='day'):
+    """Pas et minutes d'activité agrégés par seau, complétés par des zéros.
+
+    La période est limitée aux STEPS_MAX_DAYS[bucket] derniers jours avant end."""
+    start, end, truncated = recap.clamp_period(start, end, STEPS_MAX_DAYS[bucket])
+    key = bucket_expression(ActivityEntry.date, bucket).label('bucket')
+    rows = db.session.query(
+        key,
+        func.coalesce(func.sum(ActivityEntry.steps), 0),
+        func.coalesce(func.sum(case((ActivityEntry.activity_type != 'Pas', ActivityEntry.duration), else_=0)), 0)
+    ).filter(
+        ActivityEntry.user_id == user_id,
+        ActivityEntry.date >= start,
+        ActivityEntry.date <= end
+    ).group_by(key).all()
+    # SQLite renvoie le seau en texte : clés normalisées en ISO
+    totals = {str(day)[:10]: (steps, minutes) for day, steps, minutes in rows}
+
+    series = {'bucket': bucket, 'start': start.isoformat(), 'end': end.isoformat(),
+              'truncated': truncated, 'dates': [], 'steps': [], 'active_minutes': []}
+    current = bucket_start(start, bucket)
+    while current <= end:
+        steps, minutes = totals.get(current.isoformat(), (0, 0))
+        series['dates'].append(current.isoformat())
+        series['steps'].append(int(steps))
+        series['active_minutes'].append(int(minutes))
+        current = next_bucket(current, bucket)
+    return series
@@ -0,0 +1,308 @@
+"""API JSON des graphiques et exports (CSV, NDJSON, archive ZIP)."""
+import json
+import os
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, request, Response, session, stream_with_context
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import aliased
+
+import backup
+import measures
+from cache import LRUCache
+from models import (
+    ActivityEntry, BodyMeasurement, DailySummary, EXPORT_TABLES, Food, MealEntry, MealFood,
+    PROFILE_FIELDS, UPLOAD_FOLDER, User, WeightEntry, db, ensure_daily_summaries, get_data_version
+)
+from blueprints.auth import login_required
+from blueprints.weight import PROJECTION_WINDOW_DAYS, get_goal_projection, get_weight_trend
+from blueprints.meals import MEAL_QUALIFICATIONS, MEAL_TYPES
+from blueprints.activities import STEPS_BUCKETS, steps_series
+from blueprints.measurements import measurement_series
+
+bp = Blueprint('api', __name__)
+
+# ========================================
+# API POUR LES GRAPHIQUES
+# ========================================
+
+@bp.route('/api/weight-data')
+@login_required
+def weight_data():
+    user_id = session['user_id']
+    days = int(request.args.get('days', 30))
+
+    start_date = datetime.utcnow().date() - timedelta(days=days)
+    entries = WeightEntry.query.filter(
+        WeightEntry.user_id == user_id,
+        WeightEntry.date >= start_date
+    ).order_by(WeightEntry.date).all()
+
+    data = {
+        'dates': [entry.date.strftime('%Y-%m-%d') for entry in entries],
+        'weights': [entry.weight for entry in entries]
+    }
+
+    return jsonify(data)
+
+@bp.route('/api/weight-trend')
+@login_required
+def weight_trend():
+    """Tendance lissée, moyennes 7/30 jours et rythme hebdomadaire (days=N ou all)."""
+    user_id = session['user_id']
+    days = request.args.get('days', '30')
+    start_date = None
+    if days != 'all':
+        try:
+            start_date = datetime.utcnow().date() - timedelta(days=int(days))
+        except ValueError:
+            return jsonify({'error': 'Paramètre days invalide'}), 400
+
+    trend = get_weight_trend(user_id)
+    data = trend.series(start_date)
+    data['summary'] = trend.summary()
+    if data['summary']:
+        data['summary']['date'] = data['summary']['date'].isoformat()
+    return jsonify(data)
+
+@bp.route('/api/goal-projection')
+@login_required
+def goal_projection():
+    """Projection vers le poids cible (window=jours de pesées pris en compte)."""
+    user = User.query.get(session['user_id'])
+    window_days = request.args.get('window', PROJECTION_WINDOW_DAYS, type=int)
+    if not 7 <= window_days <= 730:
+        return jsonify({'error': 'La fenêtre doit être entre 7 et 730 jours'}), 400
+
+    result = dict(get_goal_projection(user, window_days))
+    for key in ('eta', 'eta_earliest', 'eta_latest'):
+        if result.get(key):
+            result[key] = result[key].isoformat()
+    return jsonify(result)
+
+@bp.route('/api/measurements-data')
+@login_required
+def measurements_data():
+    """Mesures alignées, moyennes glissantes, ratio taille/hanches et évolutions.
+
+    Paramètres : days (N ou all), rolling (jours), deltas (ex. 7,30,90).
+    """
+    user_id = session['user_id']
+    try:
+        days = request.args.get('days', '90')
+        start_date = None if days == 'all' else datetime.utcnow().date() - timedelta(days=int(days))
+        rolling_days = int(request.args.get('rolling', measures.ROLLING_DAYS))
+        delta_windows = tuple(int(d) for d in request.args.get('deltas', '7,30,90').split(',') if d)
+    except ValueError:
+        return jsonify({'error': 'Paramètres invalides'}), 400
+    if rolling_days < 1 or any(d < 1 for d in delta_windows):
+        return jsonify({'error': 'Paramètres invalides'}), 400
+
+    return jsonify(measurement_series(user_id, start_date, rolling_days, delta_windows))
+
+@bp.route('/api/daily-summary')
+@login_required
+def daily_summary_data():
+    """Résumés quotidiens précalculés (poids, IMC, métabolisme, dépense) entre start et end."""
+    user_id = session['user_id']
+    today = datetime.utcnow().date()
+    try:
+        start = datetime.strptime(request.args.get('start', (today - timedelta(days=30)).isoformat()), '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('end', today.isoformat()), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Dates invalides (format AAAA-MM-JJ)'}), 400
+
+    ensure_daily_summaries(User.query.get(user_id))
+    rows = DailySummary.query.filter(
+        DailySummary.user_id == user_id,
+        DailySummary.date >= start,
+        DailySummary.date <= end
+    ).order_by(DailySummary.date).all()
+    return jsonify([row.to_dict() for row in rows])
+
+@bp.route('/api/steps-series')
+@login_required
+def steps_series_data():
+    """Pas et minutes d'activité entre start et end (AAAA-MM-JJ), par jour, semaine ou mois."""
+    user_id = session['user_id']
+    today = datetime.utcnow().date()
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in STEPS_BUCKETS:
+        return jsonify({'error': 'bucket doit valoir day, week ou month'}), 400
+    try:
+        start = datetime.strptime(request.args.get('start', (today - timedelta(days=29)).isoformat()), '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('end', today.isoformat()), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Dates invalides (format AAAA-MM-JJ)'}), 400
+    # Pas de pas dans le futur ; évite aussi de dépasser date.max en complétant les seaux
+    end = min(end, today)
+    if start > end:
+        return jsonify({'error': 'start doit précéder end'}), 400
+
+    return jsonify(steps_series(user_id, start, end, bucket))
+
+# Résultats d'analyse par (utilisateur, période, version des repas)
+analytics_cache = LRUCache(maxsize=512)
+
+def compute_food_analytics(user_id, start, end, limit=10):
+    """Statistiques aliments d'une période, agrégées par la base."""
+    in_period = [
+        MealEntry.user_id == user_id,
+        MealEntry.date >= start,
+        MealEntry.date <= end
+    ]
+    meal_count = func.count(func.distinct(MealFood.meal_entry_id))
+    exceptions = func.count(func.distinct(case((MealEntry.qualification == 'exception', MealFood.meal_entry_id))))
+    equilibrages = func.count(func.distinct(case((MealEntry.qualification == 'equilibrage', MealFood.meal_entry_id))))
+
+    foods_query = db.session.query(
+        Food.name, meal_count.label('count'), exceptions.label('exceptions'), equilibrages.label('equilibrages')
+    ).join(MealFood, MealFood.food_id == Food.id).join(
+        MealEntry, MealEntry.id == MealFood.meal_entry_id
+    ).filter(*in_period).group_by(Food.id, Food.name)
+
+    def food_rows(query):
+        return [{'name': name, 'count': count, 'exceptions': exc, 'equilibrages': equ}
+                for name, count, exc, equ in query.limit(limit)]
+
+    top_foods = food_rows(foods_query.order_by(meal_count.desc(), Food.name))
+    exception_foods = food_rows(
+        foods_query.having(exceptions > 0).order_by(exceptions.desc(), meal_count.desc(), Food.name)
+    )
+
+    # Paires d'aliments présentes dans le même repas
+    link_a, link_b = aliased(MealFood), aliased(MealFood)
+    food_a, food_b = aliased(Food), aliased(Food)
+    pair_count = func.count(func.distinct(link_a.meal_entry_id))
+    pairs = db.session.query(food_a.name, food_b.name, pair_count).select_from(link_a).join(
+        link_b, and_(link_b.meal_entry_id == link_a.meal_entry_id, link_b.food_id > link_a.food_id)
+    ).join(MealEntry, MealEntry.id == link_a.meal_entry_id).join(
+        food_a, food_a.id == link_a.food_id
+    ).join(food_b, food_b.id == link_b.food_id).filter(*in_period).group_by(
+        food_a.id, food_b.id, food_a.name, food_b.name
+    ).order_by(pair_count.desc(), food_a.name, food_b.name).limit(limit)
+    co_occurrence = [{'foods': [a, b], 'count': count} for a, b, count in pairs]
+
+    # Qualifications par type de repas
+    qualifications = {meal_type: {q: 0 for q in MEAL_QUALIFICATIONS} for meal_type in MEAL_TYPES}
+    for meal_type, qualification, count in db.session.query(
+        MealEntry.meal_type, MealEntry.qualification, func.count(MealEntry.id)
+    ).filter(*in_period).group_by(MealEntry.meal_type, MealEntry.qualification):
+        qualifications.setdefault(meal_type, {})[qualification] = count
+
+    # Fréquence de chaque type de repas (jours avec au moins un aliment)
+    total_days = (end - start).days + 1
+    frequency = {meal_type: {'days': 0, 'rate': 0.0} for meal_type in MEAL_TYPES}
+    for meal_type, days in db.session.query(
+        MealEntry.meal_type, func.count(func.distinct(MealEntry.date))
+    ).join(MealFood).filter(*in_period, MealEntry.is_none.isnot(True)).group_by(MealEntry.meal_type):
+        frequency[meal_type] = {'days': days, 'rate': round(days / total_days, 3)}
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': total_days,
+        'top_foods': top_foods,
+        'exception_foods': exception_foods,
+        'co_occurrence': co_occurrence,
+        'qualifications': qualifications,
+        'meal_frequency': frequency,
+    }
+
+@bp.route('/api/food-analytics')
+@login_required
+def food_analytics():
+    user_id = session['user_id']
+    today = datetime.utcnow().date()
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else today - timedelta(days=30)
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else today
+        # Au moins 1 : LIMIT négatif = sans limite pour SQLite, erreur pour PostgreSQL
+        limit = max(1, min(int(request.args.get('limit', 10)), 50))
+    except ValueError:
+        return jsonify({'error': 'Paramètres invalides'}), 400
+    if start > end:
+        return jsonify({'error': 'start doit précéder end'}), 400
+
+    key = ('food-analytics', user_id, start, end, limit, get_data_version(user_id, 'meals'))
+    result = analytics_cache.get(key)
+    if result is None:
+        result = compute_food_analytics(user_id, start, end, limit)
+        analytics_cache.set(key, result)
+    return jsonify(result)
+
+# ========================================
+# SAUVEGARDE / EXPORT
+# ========================================
+
+@bp.route('/export/archive')
+@login_required
+def export_archive():
+    """Archive ZIP des données et photos de l'utilisateur, envoyée en streaming."""
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+    fmt = 'csv' if request.args.get('format') == 'csv' else 'ndjson'
+
+    since = None
+    since_str = request.args.get('since')
+    if since_str:
+        try:
+            since = datetime.strptime(since_str, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'error': 'Date invalide (YYYY-MM-DD)'}), 400
+
+    manifest = {'user': {field: backup.json_value(getattr(user, field)) for field in PROFILE_FIELDS}}
+    entries = backup.archive_entries(db.session, EXPORT_TABLES,
+                                     os.path.join(UPLOAD_FOLDER, str(user_id)),
+                                     user_id=user_id, fmt=fmt, since=since, manifest=manifest)
+    filename = f"nutristep-{user.username}-{datetime.utcnow().strftime('%Y%m%d')}.zip"
+    return Response(stream_with_context(backup.stream_zip(entries)),
+                    mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+# Ressources exportables via /api/export/<resource>
+EXPORT_RESOURCES = {
+    'weights': WeightEntry,
+    'meals': MealEntry,
+    'activities': ActivityEntry,
+    'measurements': BodyMeasurement,
+}
+
+def expand_meal_rows(rows, fmt):
+    """Décode les aliments : liste en NDJSON, une ligne par aliment en CSV."""
+    for row in rows:
+        foods = json.loads(row.pop('foods') or '[]')
+        if fmt == 'csv':
+            for food in foods or ['']:
+                yield dict(row, food=food)
+        else:
+            row['foods'] = foods
+            yield row
+
+@bp.route('/api/export/<resource>')
+@login_required
+def export_resource(resource):
+    """Exporte une ressource en CSV ou NDJSON, en streaming (mémoire constante)."""
+    user_id = session['user_id']
+    model = EXPORT_RESOURCES.get(resource)
+    if model is None:
+        return jsonify({'error': 'Ressource inconnue'}), 404
+    fmt = 'csv' if request.args.get('format') == 'csv' else 'ndjson'
+
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'Date invalide (YYYY-MM-DD)'}), 400
+
+    columns = [column.name for column in model.__table__.columns if column.name != 'user_id']
+    rows = backup.iter_table_rows(db.session, model, user_id, start=start, end=end, columns=columns)
+    if model is MealEntry:
+        rows = expand_meal_rows(rows, fmt)
+        columns = [('food' if name == 'foods' else name) for name in columns]
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    filename = f'nutristep-{resource}.{"csv" if fmt == "csv" else "ndjson"}'
+    return Response(stream_with_context(backup.encode_rows(rows, columns, fmt)),
+                    mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
@@ -0,0 +1,333 @@
+"""Connexion (Google ou identifiants), déconnexion, thème et profil."""
+import hashlib
+import hmac
+from datetime import datetime
+from functools import wraps
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, session, url_for
+
+from models import User, WeightEntry, db, refresh_daily_summaries
+
+bp = Blueprint('auth', __name__)
+
+# ========================================
+# DÉCORATEUR POUR PROTÉGER LES ROUTES
+# ========================================
+
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('Veuillez vous connecter pour accéder à cette page.', 'warning')
+            return redirect(url_for('auth.login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+# ========================================
+# COMPTE DE LA SESSION (SERVICE WORKER)
+# ========================================
+
+# Compte connecté, sous forme opaque : le service worker rattache ses caches et
+# sa boîte d'envoi à cet identifiant et les isole d'un compte à l'autre
+USER_HEADER = 'X-NutriStep-User'
+# Saisie hors ligne rejouée : compte qui l'avait faite
+QUEUED_USER_HEADER = 'X-Queued-User'
+
+def user_token(user_id):
+    key = current_app.config['SECRET_KEY'].encode()
+    return hmac.new(key, f'user:{user_id}'.encode(), hashlib.sha256).hexdigest()[:16]
+
+@bp.before_app_request
+def refuse_foreign_replay():
+    """Saisie hors ligne d'un autre compte que celui de la session : refusée sans effet."""
+    queued_user = request.headers.get(QUEUED_USER_HEADER)
+    if queued_user is None or 'user_id' not in session:
+        return None
+    if not hmac.compare_digest(queued_user, user_token(session['user_id'])):
+        return jsonify({'error': 'other_user',
+                        'message': 'Saisie faite hors ligne avec un autre compte'}), 409
+    return None
+
+@bp.after_app_request
+def add_user_header(response):
+    # Pas sur les fichiers statiques : lire la session y ajouterait Vary: Cookie
+    if request.endpoint not in ('static', 'service_worker') and 'user_id' in session:
+        response.headers[USER_HEADER] = user_token(session['user_id'])
+    return response
+
+# ========================================
+# ROUTES D'AUTHENTIFICATION GOOGLE
+# ========================================
+
+def get_google():
+    """Client OAuth Google, enregistré à la première connexion Google.
+
+    Authlib n'est importé qu'ici, et les métadonnées OpenID de Google ne
+    sont téléchargées qu'au premier authorize_redirect.
+    """
+    client = current_app.extensions.get('google_oauth')
+    if client is None:
+        from authlib.integrations.flask_client import OAuth
+        client = OAuth(current_app).register(
+            name='google',
+            client_id=current_app.config['GOOGLE_CLIENT_ID'],
+            client_secret=current_app.config['GOOGLE_CLIENT_SECRET'],
+            server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+            client_kwargs={
+                'scope': 'openid email profile'
+            }
+        )
+        current_app.extensions['google_oauth'] = client
+    return client
+
+@bp.route('/login/google')
+def google_login():
+    redirect_uri = url_for('auth.google_authorized', _external=True)
+    return get_google().authorize_redirect(redirect_uri)
+
+
+@bp.route('/login/google/authorized')
+def google_authorized():
+    try:
+        token = get_google().authorize_access_token()
+        user_info = token.get('userinfo')
+
+        if not user_info:
+            flash('Impossible de récupérer les informations depuis Google.', 'danger')
+            return redirect(url_for('auth.login'))
+
+        google_id = user_info['sub']
+        email = user_info['email']
+        name = user_info.get('name', email.split('@')[0])
+
+        # Chercher si l'utilisateur existe déjà
+        user = User.query.filter_by(google_id=google_id).first()
+
+        if not user:
+            # Chercher par email (au cas où l'utilisateur a créé un compte classique avant)
+            user = User.query.filter_by(email=email).first()
+            if user:
+                # Lier le compte existant à Google
+                user.google_id = google_id
+            else:
+                # Créer un nouveau compte
+                # Générer un username unique
+                base_username = name.lower().replace(' ', '')
+                username = base_username
+                counter = 1
+                while User.query.filter_by(username=username).first():
+                    username = f"{base_username}{counter}"
+                    counter += 1
+
+                user = User(
+                    username=username,
+                    email=email,
+                    google_id=google_id,
+                    password_hash=None  # Pas de mot de passe pour les comptes Google
+                )
+                db.session.add(user)
+
+            db.session.commit()
+
+        # Connecter l'utilisateur
+        session['user_id'] = user.id
+        session['username'] = user.username
+        flash(f'Bienvenue {user.username} !', 'success')
+        return redirect(url_for('weight.dashboard'))
+
+    except Exception as e:
+        flash(f'Erreur lors de la connexion avec Google: {str(e)}', 'danger')
+        return redirect(url_for('auth.login'))
+
+# ========================================
+# ROUTES D'AUTHENTIFICATION CLASSIQUES
+# ========================================
+
+@bp.route('/')
+def index():
+    if 'user_id' in session:
+        return redirect(url_for('weight.dashboard'))
+    return redirect(url_for('auth.login'))
+
+@bp.route('/login')
+def login():
+    # Si déjà connecté, rediriger vers le dashboard
+    if 'user_id' in session:
+        return redirect(url_for('weight.dashboard'))
+
+    # Afficher la page de login Google uniquement
+    return render_template('login.html', theme='green')
+
+
+
+"""
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        username = request.form.get('username')
+        email = request.form.get('email')
+        password = request.form.get('password')
+        password_confirm = request.form.get('password_confirm')
+
+        if password != password_confirm:
+            flash('Les mots de passe ne correspondent pas.', 'danger')
+            return render_template('register.html', theme='green')
+
+        if User.query.filter_by(username=username).first():
+            flash('Ce nom d\'utilisateur existe déjà.', 'danger')
+            return render_template('register.html', theme='green')
+
+        if User.query.filter_by(email=email).first():
+            flash('Cet email est déjà utilisé.', 'danger')
+            return render_template('register.html', theme='green')
+
+        new_user = User(
+            username=username,
+            email=email,
+            password_hash=generate_password_hash(password)
+        )
+        db.session.add(new_user)
+        db.session.commit()
+
+        flash('Compte créé avec succès ! Vous pouvez maintenant vous connecter.', 'success')
+        return redirect(url_for('auth.login'))
+
+    return render_template('register.html', theme='green')
+"""
+@bp.route('/logout')
+def logout():
+    session.clear()
+    flash('Vous êtes déconnecté.', 'info')
+    return redirect(url_for('auth.login'))
+
+
+@bp.route('/api/change-theme', methods=['POST'])
+@login_required
+def change_theme():
+    data = request.get_json()
+    theme = data.get('theme', 'green')
+
+    # Valider le thème
+    if theme not in ['green', 'ocean', 'sunset']:
+        return jsonify({'error': 'Invalid theme'}), 400
+
+    # Mettre à jour le thème de l'utilisateur
+    user = User.query.get(session['user_id'])
+    user.theme = theme
+    db.session.commit()
+
+    return jsonify({'success': True})
+
+# ----------------------------------------
+# 3. ROUTE : PAGE PROFIL
+# ----------------------------------------
+
+@bp.route('/profile')
+@login_required
+def profile():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+
+    # Dernier poids
+    latest_weight = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.desc()).first()
+
+    # Premier poids
+    first_weight = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.asc()).first()
+
+    # Calculer les stats
+    weight_stats = None
+    if first_weight and latest_weight and first_weight.id != latest_weight.id:
+        total_loss = latest_weight.weight - first_weight.weight
+        days_tracking = (latest_weight.date - first_weight.date).days
+
+        if days_tracking > 0:
+            avg_per_day = total_loss / days_tracking
+            avg_per_week = avg_per_day * 7
+            avg_per_month = avg_per_day * 30
+
+            weight_stats = {
+                'total_loss': total_loss,
+                'days_tracking': days_tracking,
+                'avg_per_week': avg_per_week,
+                'avg_per_month': avg_per_month
+            }
+
+    today = datetime.utcnow().date()
+
+    return render_template('profile.html',
+                         user=user,
+                         latest_weight=latest_weight,
+                         first_weight=first_weight,
+                         weight_stats=weight_stats,
+                         today=today,
+                         theme=user.theme)
+
+
+# ----------------------------------------
+# 4. ROUTE : MISE À JOUR PROFIL
+# ----------------------------------------
+
+@bp.route('/profile/update', methods=['POST'])
+@login_required
+def profile_update():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+
+    # Thème (AJOUTER EN PREMIER)
+    theme = request.form.get('theme', '').strip()
+    if theme in ['healthy', 'ocean', 'sunset']:
+        user.theme = theme
+
+    user.track_meals = bool(request.form.get('track_meals'))
+    user.track_activities = bool(request.form.get('track_activities'))
+    user.track_measurements = bool(request.form.get('track_measurements'))
+    user.enable_secondary_measurements = bool(request.form.get('enable_secondary_measurements'))
+    # Options absentes du formulaire quand le sous-système est désactivé : on garde le choix
+    if current_app.config['GARMIN_ENABLED']:
+        user.enable_garmin_import = bool(request.form.get('enable_garmin_import'))
+    if current_app.config['PHOTOS_ENABLED']:
+        user.track_photos = bool(request.form.get('track_photos'))
+    body_profile = (user.birth_date, user.height, user.gender)
+
+    # Date de naissance
+    birth_date_str = request.form.get('birth_date', '').strip()
+    if birth_date_str:
+        try:
+            user.birth_date = datetime.strptime(birth_date_str, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    else:
+        user.birth_date = None
+
+    # Taille
+    height_str = request.form.get('height', '').strip()
+    if height_str:
+        try:
+            user.height = float(height_str)
+        except ValueError:
+            pass
+    else:
+        user.height = None
+
+    # Sexe
+    gender = request.form.get('gender', '').strip()
+    user.gender = gender if gender in ['M', 'F'] else None
+
+    # Poids cible
+    target_weight_str = request.form.get('target_weight', '').strip()
+    if target_weight_str:
+        try:
+            user.target_weight = float(target_weight_str)
+        except ValueError:
+            pass
+    else:
+        user.target_weight = None
+
+    # IMC et métabolisme dépendent de la taille, de l'âge et du sexe
+    if (user.birth_date, user.height, user.gender) != body_profile:
+        refresh_daily_summaries(user)
+
+    db.session.commit()
+
+    flash('✅ Profil mis à jour !', 'success')
+    return redirect(url_for('auth.profile'))
@@ -0,0 +1,438 @@
+"""Calendrier des repas, saisie d'une journée, récapitulatif et favoris."""
+import os
+from datetime import datetime, timedelta
+
+from flask import Blueprint, flash, jsonify, render_template, request, session
+from markupsafe import Markup
+from sqlalchemy import func
+
+import recap
+from cache import make_cache
+from models import (
+    ActivityEntry, Food, MealEntry, MealFavorite, MealFood, User, bump_period_versions, db,
+    period_versions
+)
+from blueprints.auth import login_required
+
+bp = Blueprint('meals', __name__)
+
+# Fragments HTML rendus (calendrier, récap) : mémoire par défaut,
+# FRAGMENT_CACHE_URL=file:///chemin ou redis://… pour partager entre workers
+fragment_cache = make_cache(os.environ.get('FRAGMENT_CACHE_URL'), maxsize=256)
+
+# ========================================
+# ROUTES REPAS
+# ========================================
+
+@bp.route('/meals')
+@login_required
+def meals():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+
+    # Gérer l'offset de mois (navigation)
+    month_offset = int(request.args.get('month_offset', 0))
+
+    # Calculer le mois à afficher
+    today = datetime.utcnow().date()
+
+    # Premier jour du mois actuel + offset
+    first_day_current_month = today.replace(day=1)
+
+    # Ajouter l'offset de mois
+    target_month = first_day_current_month.month + month_offset
+    target_year = first_day_current_month.year
+
+    while target_month > 12:
+        target_month -= 12
+        target_year += 1
+    while target_month < 1:
+        target_month += 12
+        target_year -= 1
+
+    first_day_month = first_day_current_month.replace(year=target_year, month=target_month, day=1)
+
+    # Dernier jour du mois
+    if target_month == 12:
+        last_day_month = first_day_month.replace(year=target_year + 1, month=1, day=1) - timedelta(days=1)
+    else:
+        last_day_month = first_day_month.replace(month=target_month + 1, day=1) - timedelta(days=1)
+
+    # Trouver le lundi avant le 1er du mois (pour la grille)
+    days_since_monday = first_day_month.weekday()
+    grid_start = first_day_month - timedelta(days=days_since_monday)
+
+    # Trouver le dimanche après la fin du mois
+    days_until_sunday = 6 - last_day_month.weekday()
+    grid_end = last_day_month + timedelta(days=days_until_sunday)
+
+    # Grille déjà rendue ? La clé change dès qu'un mois affiché est modifié ;
+    # « aujourd'hui » n'y figure que si la grille le contient (surlignage)
+    cache_key = ('meals-calendar', user_id, grid_start, grid_end,
+                 today if grid_start <= today <= grid_end else None,
+                 period_versions(user_id, ['meals'], grid_start, grid_end))
+    calendar_html = fragment_cache.get(cache_key)
+    if calendar_html is None:
+        # Repas de toute la grille en une requête, regroupés par jour
+        meals_by_date = {}
+        for meal in MealEntry.query.filter(
+            MealEntry.user_id == user_id,
+            MealEntry.date >= grid_start,
+            MealEntry.date <= grid_end
+        ).order_by(MealEntry.id):
+            meals_by_date.setdefault(meal.date, []).append(meal)
+
+        # Préparer les données pour chaque jour de la grille
+        month_days = []
+        current_date = grid_start
+
+        while current_date <= grid_end:
+            day_meals = meals_by_date.get(current_date, [])
+
+            # Organiser par type de repas
+            meals_by_type = {
+                'breakfast': None,
+                'snack_morning': None,
+                'lunch': None,
+                'snack_afternoon': None,
+                'dinner': None
+            }
+
+            for meal in day_meals:
+                meals_by_type[meal.meal_type] = {
+                    'foods': meal.get_foods_list(),
+                    'qualification': meal.qualification,
+                    'is_none': meal.is_none
+                }
+
+            # Critère VERT : Les 3 repas principaux (breakfast, lunch, dinner) sont remplis
+            main_meals = ['breakfast', 'lunch', 'dinner']
+            main_meals_filled = all(meals_by_type[t] is not None for t in main_meals)
+            is_complete = main_meals_filled
+
+            # A des repas = au moins un repas rempli
+            has_meals = any(meals_by_type[t] is not None for t in meals_by_type)
+
+            # Compter les exceptions et équilibrages
+            exception_count = sum(1 for m in day_meals if m.qualification == 'exception')
+            equilibrage_count = sum(1 for m in day_meals if m.qualification == 'equilibrage')
+
+            month_days.append({
+                'date': current_date,
+                'is_today': current_date == today,
+                'other_month': current_date.month != target_month,
+                'meals': meals_by_type,
+                'is_complete': is_complete,
+                'has_meals': has_meals,
+                'exception_count': exception_count,
+                'equilibrage_count': equilibrage_count
+            })
+
+            current_date += timedelta(days=1)
+
+        calendar_html = render_template('partials/meals_calendar.html', month_days=month_days)
+        fragment_cache.set(cache_key, calendar_html)
+
+    # Récupérer l'historique des aliments pour l'autocomplétion
+    food_history = [name for (name,) in db.session.query(Food.name).join(MealFood).join(MealEntry).filter(
+        MealEntry.user_id == user_id
+    ).distinct()]
+
+    # Noms des mois en français
+    month_names = ['', 'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
+                   'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
+
+    return render_template('meals.html',
+                         calendar_html=Markup(calendar_html),
+                         month_name=month_names[target_month],
+                         year=target_year,
+                         month_offset=month_offset,
+                         food_history=food_history,
+                         theme=user.theme)
+
+@bp.route('/meals/recap')
+@login_required
+def meals_recap():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+
+    # Récupérer les dates depuis les paramètres (par défaut: 2 dernières semaines)
+    today = datetime.utcnow().date()
+    default_start = today - timedelta(days=14)
+
+    start_date_str = request.args.get('start_date')
+    end_date_str = request.args.get('end_date')
+
+    if start_date_str:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+    else:
+        start_date = default_start
+
+    if end_date_str:
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+    else:
+        end_date = today
+
+    # Période bornée : au-delà d'un an, on garde les jours les plus récents
+    start_date, end_date, truncated = recap.clamp_period(start_date, end_date)
+    if truncated:
+        flash(f'Période limitée aux {recap.MAX_RECAP_DAYS} derniers jours (à partir du {start_date.strftime("%d/%m/%Y")}).', 'warning')
+
+    # Tableau déjà rendu pour cette période et ces versions ?
+    cache_key = ('recap-table', user_id, start_date, end_date,
+                 today if start_date <= today <= end_date else None,
+                 user.track_activities,
+                 period_versions(user_id, ['meals', 'activities'], start_date, end_date))
+    recap_html = fragment_cache.get(cache_key)
+    if recap_html is None:
+        in_period = [
+            MealEntry.user_id == user_id,
+            MealEntry.date >= start_date,
+            MealEntry.date <= end_date
+        ]
+        # Seules les colonnes utiles, sans objets ORM
+        meals_rows = db.session.query(
+            MealEntry.id, MealEntry.date, MealEntry.meal_type, MealEntry.qualification, MealEntry.is_none
+        ).filter(*in_period).order_by(MealEntry.id).all()
+        # Aliments lus dans meal_food (pas de décodage JSON)
+        foods_rows = db.session.query(MealFood.meal_entry_id, Food.name).join(
+            Food, Food.id == MealFood.food_id
+        ).join(MealEntry, MealEntry.id == MealFood.meal_entry_id).filter(*in_period).order_by(
+            MealFood.meal_entry_id, MealFood.position
+        ).all()
+        qualification_counts = dict(db.session.query(
+            MealEntry.qualification, func.count(MealEntry.id)
+        ).filter(*in_period).group_by(MealEntry.qualification).all())
+        # Encas ou goûters AVEC DES ALIMENTS (pas juste "rien")
+        snack_types = {meal_type for (meal_type,) in db.session.query(MealEntry.meal_type).join(MealFood).filter(
+            *in_period,
+            MealEntry.meal_type.in_(recap.SNACK_MEALS),
+            MealEntry.is_none.isnot(True)
+        ).distinct()}
+
+        activities_rows = db.session.query(
+            ActivityEntry.date, ActivityEntry.activity_type, ActivityEntry.duration,
+            ActivityEntry.steps, ActivityEntry.calories_burned, ActivityEntry.note
+        ).filter(
+            ActivityEntry.user_id == user_id,
+            ActivityEntry.date >= start_date,
+            ActivityEntry.date <= end_date
+        ).order_by(ActivityEntry.date, ActivityEntry.id).all()
+
+        result = recap.build_recap(start_date, end_date, meals_rows, foods_rows, activities_rows, today,
+                                   qualification_counts, snack_types)
+
+        recap_html = render_template('partials/recap_table.html',
+                                     days_data=result['days_data'],
+                                     stats=result['stats'],
+                                     has_snack_morning=result['has_snack_morning'],
+                                     has_snack_afternoon=result['has_snack_afternoon'],
+                                     current_user=user)
+        fragment_cache.set(cache_key, recap_html)
+
+    return render_template('meals_recap.html',
+                         recap_html=Markup(recap_html),
+                         start_date=start_date,
+                         end_date=end_date,
+                         current_user=user,
+                         theme=user.theme)
+
+
+
+
+@bp.route('/api/get-day-meals')
+@login_required
+def get_day_meals():
+    user_id = session['user_id']
+    date_str = request.args.get('date')
+    date = datetime.strptime(date_str, '%Y-%m-%d').date()
+
+    # Récupérer les repas de ce jour
+    day_meals = MealEntry.query.filter_by(
+        user_id=user_id,
+        date=date
+    ).all()
+
+    # Organiser par type
+    meals_by_type = {
+        'breakfast': {'foods': [], 'qualification': 'normal', 'is_none': False},
+        'snack_morning': {'foods': [], 'qualification': 'normal', 'is_none': False},
+        'lunch': {'foods': [], 'qualification': 'normal', 'is_none': False},
+        'snack_afternoon': {'foods': [], 'qualification': 'normal', 'is_none': False},
+        'dinner': {'foods': [], 'qualification': 'normal', 'is_none': False}
+    }
+
+    for meal in day_meals:
+        meals_by_type[meal.meal_type] = {
+            'foods': meal.get_foods_list(),
+            'qualification': meal.qualification,
+            'is_none': meal.is_none
+        }
+
+    return jsonify({
+        'date': date_str,
+        'meals': meals_by_type
+    })
+
+MEAL_TYPES = ['breakfast', 'snack_morning', 'lunch', 'snack_afternoon', 'dinner']
+MEAL_QUALIFICATIONS = ['normal', 'exception', 'equilibrage']
+
+def apply_meal_slot(user_id, date, meal_type, existing, is_none, foods, qualification):
+    """Aligne les lignes stockées d'un créneau sur la saisie.
+
+    N'émet que l'INSERT, l'UPDATE ou le DELETE nécessaire et retourne
+    'inserted', 'updated', 'deleted' ou 'unchanged'.
+    """
+    # Doublons éventuels (anciennes sauvegardes) : on ne garde que la première ligne
+    entry = existing[0] if existing else None
+    duplicates = existing[1:]
+    for duplicate in duplicates:
+        db.session.delete(duplicate)
+
+    # Un créneau n'existe que si "rien" OU au moins un aliment
+    if not is_none and not foods:
+        if entry:
+            db.session.delete(entry)
+            return 'deleted'
+        return 'unchanged'
+
+    if entry is None:
+        entry = MealEntry(
+            user_id=user_id,
+            meal_type=meal_type,
+            date=date,
+            is_none=is_none,
+            qualification=qualification
+        )
+        entry.set_foods_list(foods)
+        db.session.add(entry)
+        return 'inserted'
+
+    if (entry.is_none == is_none and entry.qualification == qualification
+            and entry.get_foods_list() == foods and not duplicates):
+        return 'unchanged'
+    entry.is_none = is_none
+    entry.qualification = qualification
+    entry.set_foods_list(foods)
+    return 'updated'
+
+@bp.route('/meals/save-day', methods=['POST'])
+@login_required
+def save_day_meals():
+    user_id = session['user_id']
+    date_str = request.form.get('date')
+    date = datetime.strptime(date_str, '%Y-%m-%d').date()
+
+    # Repas déjà enregistrés ce jour, par type
+    existing_by_type = {}
+    for meal in MealEntry.query.filter_by(user_id=user_id, date=date).order_by(MealEntry.id).all():
+        existing_by_type.setdefault(meal.meal_type, []).append(meal)
+
+    changes = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    for meal_type in MEAL_TYPES:
+        # Vérifier si "rien"
+        is_none = request.form.get(f'{meal_type}_none') == 'on'
+
+        # Récupérer les aliments
+        foods = request.form.getlist(f'{meal_type}_food[]')
+        foods = [f.strip() for f in foods if f.strip()]
+
+        # Récupérer la qualification
+        qualification = request.form.get(f'{meal_type}_qualification', 'normal')
+
+        change = apply_meal_slot(user_id, date, meal_type, existing_by_type.get(meal_type, []),
+                                 is_none, foods, qualification)
+        changes[change] += 1
+
+    if changes['inserted'] or changes['updated'] or changes['deleted']:
+        bump_period_versions(user_id, 'meals', [date])
+        db.session.commit()
+
+    return jsonify({'success': True, 'changes': changes})
+
+@bp.route('/api/meals/<date_str>/<meal_type>', methods=['PATCH'])
+@login_required
+def patch_meal_slot(date_str, meal_type):
+    """Modifie un seul créneau de repas (JSON : foods, qualification, is_none)."""
+    user_id = session['user_id']
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Date invalide'}), 400
+    if meal_type not in MEAL_TYPES:
+        return jsonify({'error': 'Type de repas inconnu'}), 404
+
+    data = request.get_json(silent=True) or {}
+    foods = data.get('foods', [])
+    qualification = data.get('qualification', 'normal')
+    if not isinstance(foods, list) or qualification not in MEAL_QUALIFICATIONS:
+        return jsonify({'error': 'Données invalides'}), 400
+    foods = [str(f).strip() for f in foods if str(f).strip()]
+    is_none = bool(data.get('is_none', False))
+
+    existing = MealEntry.query.filter_by(
+        user_id=user_id, date=date, meal_type=meal_type
+    ).order_by(MealEntry.id).all()
+    change = apply_meal_slot(user_id, date, meal_type, existing, is_none, foods, qualification)
+    if change != 'unchanged':
+        bump_period_versions(user_id, 'meals', [date])
+        db.session.commit()
+
+    return jsonify({'success': True, 'change': change})
+
+
+# ========================================
+# ROUTES FAVORIS REPAS
+# ========================================
+
+@bp.route('/api/meal-favorites')
+@login_required
+def get_meal_favorites():
+    user_id = session['user_id']
+    meal_type = request.args.get('meal_type')
+    query = MealFavorite.query.filter_by(user_id=user_id)
+    if meal_type:
+        query = query.filter_by(meal_type=meal_type)
+    favorites = query.order_by(MealFavorite.name).all()
+    return jsonify([{
+        'id': f.id,
+        'name': f.name,
+        'meal_type': f.meal_type,
+        'foods': f.get_foods_list()
+    } for f in favorites])
+
+@bp.route('/api/meal-favorites/save', methods=['POST'])
+@login_required
+def save_meal_favorite():
+    user_id = session['user_id']
+    data = request.get_json()
+    name = data.get('name', '').strip()
+    meal_type = data.get('meal_type', '')
+    foods = data.get('foods', [])
+
+    if not name or not meal_type or not foods:
+        return jsonify({'error': 'Données manquantes'}), 400
+
+    # Vérifier doublon nom + type
+    existing = MealFavorite.query.filter_by(
+        user_id=user_id, name=name, meal_type=meal_type
+    ).first()
+    if existing:
+        return jsonify({'error': 'Un favori avec ce nom existe déjà pour ce type de repas'}), 409
+
+    fav = MealFavorite(user_id=user_id, name=name, meal_type=meal_type)
+    fav.set_foods_list(foods)
+    db.session.add(fav)
+    db.session.commit()
+    return jsonify({'success': True, 'id': fav.id, 'name': fav.name})
+
+@bp.route('/api/meal-favorites/<int:fav_id>', methods=['DELETE'])
+@login_required
+def delete_meal_favorite(fav_id):
+    user_id = session['user_id']
+    fav = MealFavorite.query.get_or_404(fav_id)
+    if fav.user_id != user_id:
+        return jsonify({'error': 'Non autorisé'}), 403
+    db.session.delete(fav)
+    db.session.commit()
+    return jsonify({'success': True})
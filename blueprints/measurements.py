@@ -0,0 +1,153 @@
+"""Mensurations : saisie, séries lissées et variations."""
+from datetime import datetime, timedelta
+
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+
+import measures
+from models import BodyMeasurement, User, db
+from blueprints.auth import login_required
+
+bp = Blueprint('measurements', __name__)
+
+# ----------------------------------------
+# 5. ROUTE : PAGE MESURES (après route /activities)
+# ----------------------------------------
+
+def measurement_series(user_id, start=None, rolling_days=measures.ROLLING_DAYS,
+                       delta_windows=measures.DELTA_WINDOWS):
+    """Séries des six mesures depuis start, en une seule requête."""
+    query = db.session.query(
+        BodyMeasurement.date, *[getattr(BodyMeasurement, name) for name in measures.MEASURES]
+    ).filter(BodyMeasurement.user_id == user_id)
+    if start is not None:
+        query = query.filter(BodyMeasurement.date >= start)
+    rows = query.order_by(BodyMeasurement.date, BodyMeasurement.id).all()
+    return measures.build_series(rows, rolling_days, delta_windows)
+
+@bp.route('/measurements')
+@login_required
+def measurements():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+
+    if not user.track_measurements:
+        flash('Le suivi des mesures n\'est pas activé.', 'warning')
+        return redirect(url_for('weight.dashboard'))
+
+    today = datetime.utcnow().date()
+
+    # Mesure du jour
+    measurement_today = BodyMeasurement.query.filter_by(
+        user_id=user_id,
+        date=today
+    ).first()
+
+    # Dernière mesure si pas aujourd'hui
+    latest_measurement = BodyMeasurement.query.filter_by(
+        user_id=user_id
+    ).order_by(BodyMeasurement.date.desc()).first()
+
+    # Historique (90 derniers jours pour graphique)
+    ninety_days_ago = today - timedelta(days=90)
+    measurements = BodyMeasurement.query.filter(
+        BodyMeasurement.user_id == user_id,
+        BodyMeasurement.date >= ninety_days_ago
+    ).order_by(BodyMeasurement.date.desc()).all()
+
+    # Séries alignées sur les dates (None = mesure non saisie ce jour-là)
+    series = measurement_series(user_id, ninety_days_ago)
+    dates = [m.date.strftime('%d/%m') for m in reversed(measurements)]
+
+    # Évolutions sur la période affichée
+    stats = {}
+    for name, diff in series['deltas']['90'].items():
+        if diff is not None:
+            stats[f'{name}_diff'] = diff
+
+    # Calculer ratio taille/hanches si dispo
+    waist_hip_ratio = None
+    if latest_measurement and latest_measurement.waist and latest_measurement.hips:
+        waist_hip_ratio = round(latest_measurement.waist / latest_measurement.hips, 2)
+
+    return render_template('measurements.html',
+                         measurement_today=measurement_today,
+                         latest_measurement=latest_measurement,
+                         measurements=measurements,
+                         dates=dates,
+                         series=series,
+                         measure_labels=measures.MEASURE_LABELS,
+                         stats=stats,
+                         waist_hip_ratio=waist_hip_ratio,
+                         today=today,
+                         user=user,
+                         theme=user.theme)
+
+
+# ----------------------------------------
+# 6. ROUTE : AJOUTER MESURE
+# ----------------------------------------
+
+@bp.route('/measurements/add', methods=['POST'])
+@login_required
+def add_measurement():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+
+    if not user.track_measurements:
+        flash('Le suivi des mesures n\'est pas activé.', 'warning')
+        return redirect(url_for('weight.dashboard'))
+
+    today = datetime.utcnow().date()
+
+    # Vérifier si déjà saisi aujourd'hui
+    existing = BodyMeasurement.query.filter_by(
+        user_id=user_id,
+        date=today
+    ).first()
+
+    if existing:
+        # Mise à jour
+        existing.waist = float(request.form.get('waist')) if request.form.get('waist') else None
+        existing.hips = float(request.form.get('hips')) if request.form.get('hips') else None
+        existing.thigh = float(request.form.get('thigh')) if request.form.get('thigh') else None
+        existing.arm = float(request.form.get('arm')) if request.form.get('arm') else None
+        existing.chest = float(request.form.get('chest')) if request.form.get('chest') else None
+        existing.calf = float(request.form.get('calf')) if request.form.get('calf') else None
+        existing.note = request.form.get('note', '').strip()
+
+        flash('✅ Mesures mises à jour !', 'success')
+    else:
+        # Création
+        new_measurement = BodyMeasurement(
+            user_id=user_id,
+            date=today,
+            waist=float(request.form.get('waist')) if request.form.get('waist') else None,
+            hips=float(request.form.get('hips')) if request.form.get('hips') else None,
+            thigh=float(request.form.get('thigh')) if request.form.get('thigh') else None,
+            arm=float(request.form.get('arm')) if request.form.get('arm') else None,
+            chest=float(request.form.get('chest')) if request.form.get('chest') else None,
+            calf=float(request.form.get('calf')) if request.form.get('calf') else None,
+            note=request.form.get('note', '').strip()
+        )
+        db.session.add(new_measurement)
+        flash('✅ Mesures enregistrées !', 'success')
+
+    db.session.commit()
+    return redirect(url_for('measurements.measurements'))
+
+@bp.route('/measurements/delete/<int:id>', methods=['POST'])
+@login_required
+def delete_measurement(id):
+    user_id = session['user_id']
+    measurement = BodyMeasurement.query.get_or_404(id)
+
+    # Vérifier que la mesure appartient bien à l'utilisateur
+    if measurement.user_id != user_id:
+        flash('Action non autorisée', 'error')
+        return redirect(url_for('measurements.measurements'))
+
+    db.session.delete(measurement)
+    db.session.commit()
+
+    flash('✅ Mesure supprimée !', 'success')
+    return redirect(url_for('measurements.measurements'))
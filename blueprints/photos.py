@@ -0,0 +1,352 @@
+"""Photos de progression : envoi, compression, montages avant/après.
+
+Enregistré seulement si PHOTOS_ENABLED est actif ; les dossiers de
+stockage sont créés à l'enregistrement."""
+import importlib.util
+import os
+import shutil
+import uuid
+from datetime import datetime
+
+from flask import Blueprint, current_app, flash, redirect, render_template, request, session, url_for
+
+from models import PHOTO_ANGLES, PhotoEntry, UPLOAD_FOLDER, User, db
+from blueprints.auth import login_required
+
+bp = Blueprint('photos', __name__)
+
+# Cache des montages avant/après, un sous-dossier par utilisateur, hors de static/ :
+# servi seulement par la route compare_photos (PHOTO_COMPARE_FOLDER, défaut instance/compare)
+LEGACY_COMPARE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'uploads', 'compare')
+COMPARE_MODES = {'side': 'jpg', 'gif': 'gif'}
+# Montages gardés par utilisateur (les moins récemment servis sont supprimés)
+COMPARE_MAX_PER_USER = int(os.environ.get('PHOTO_COMPARE_MAX_PER_USER', 24))
+ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'heic'}
+# Pillow est importé à la première utilisation (temps de démarrage)
+PILLOW_AVAILABLE = importlib.util.find_spec('PIL') is not None
+
+@bp.record_once
+def create_folders(state):
+    compare_folder = state.app.config.setdefault(
+        'PHOTO_COMPARE_FOLDER',
+        os.environ.get('PHOTO_COMPARE_FOLDER') or os.path.join(state.app.instance_path, 'compare'))
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(compare_folder, exist_ok=True)
+    # Ancien emplacement, sous static/ : accessible sans connexion
+    shutil.rmtree(LEGACY_COMPARE_FOLDER, ignore_errors=True)
+
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def compress_and_save(file, filepath, max_size=(1200, 1600), quality=85):
+    """Compresse et sauvegarde une image. Retourne True si succès."""
+    if PILLOW_AVAILABLE:
+        try:
+            from PIL import Image, ImageOps
+            img = Image.open(file)
+            # Corriger l'orientation EXIF
+            try:
+                img = ImageOps.exif_transpose(img)
+            except Exception:
+                pass
+            # Convertir RGBA en RGB si nécessaire
+            if img.mode in ('RGBA', 'P'):
+                img = img.convert('RGB')
+            img.thumbnail(max_size, Image.LANCZOS)
+            img.save(filepath, 'JPEG', quality=quality, optimize=True)
+            return True
+        except Exception:
+            pass
+    # Fallback sans Pillow : sauvegarde brute
+    file.seek(0)
+    with open(filepath, 'wb') as f:
+        f.write(file.read())
+    return True
+
+def photo_filepath(photo):
+    """Chemin disque d'une photo de progression."""
+    return os.path.join(UPLOAD_FOLDER, str(photo.user_id),
+                        photo.date.strftime('%Y-%m'), photo.filename)
+
+def month_bounds(month):
+    """Retourne (premier jour, premier jour du mois suivant) pour 'YYYY-MM'."""
+    start = datetime.strptime(month, '%Y-%m').date()
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+def comparison_folder(user_id):
+    return os.path.join(current_app.config['PHOTO_COMPARE_FOLDER'], str(int(user_id)))
+
+def comparison_filepath(user_id, angle, month_a, month_b, mode):
+    """Clé de cache d'un montage : (utilisateur, angle, paire de mois, mode)."""
+    filename = f"{angle}_{month_a}_{month_b}.{COMPARE_MODES[mode]}"
+    return os.path.join(comparison_folder(user_id), filename)
+
+def prune_comparisons(user_id, keep=COMPARE_MAX_PER_USER):
+    """Ne garde que les keep montages servis le plus récemment (date de modification)."""
+    folder = comparison_folder(user_id)
+    try:
+        entries = [entry for entry in os.scandir(folder) if entry.is_file()]
+    except OSError:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+def invalidate_comparisons(user_id, angle, month):
+    """Supprime les montages en cache qui utilisent la photo (angle, mois)."""
+    folder = comparison_folder(user_id)
+    if not os.path.isdir(folder):
+        return
+    for filename in os.listdir(folder):
+        parts = os.path.splitext(filename)[0].split('_')
+        if len(parts) == 3 and parts[0] == angle and month in parts[1:]:
+            try:
+                os.remove(os.path.join(folder, filename))
+            except OSError:
+                pass
+
+def build_comparison(path_a, path_b, dest, mode='side', labels=None, height=800):
+    """Construit un montage côte à côte (JPEG) ou animé (GIF) de deux photos."""
+    from PIL import Image, ImageDraw
+    images = []
+    for path in (path_a, path_b):
+        with Image.open(path) as img:
+            img = img.convert('RGB')
+            width = round(img.width * height / img.height)
+            images.append(img.resize((width, height), Image.LANCZOS))
+
+    if labels:
+        for img, label in zip(images, labels):
+            draw = ImageDraw.Draw(img)
+            draw.rectangle([0, 0, img.width, 28], fill=(0, 0, 0))
+            draw.text((10, 8), label, fill=(255, 255, 255))
+
+    # Écriture dans un fichier temporaire puis renommage : un autre worker
+    # ne peut jamais servir un montage à moitié écrit
+    tmp_path = f"{dest}.{uuid.uuid4().hex[:8]}.tmp"
+    if mode == 'gif':
+        width = max(img.width for img in images)
+        frames = []
+        for img in images:
+            frame = Image.new('RGB', (width, height), (255, 255, 255))
+            frame.paste(img, ((width - img.width) // 2, 0))
+            frames.append(frame)
+        frames[0].save(tmp_path, 'GIF', save_all=True, append_images=frames[1:],
+                       duration=1000, loop=0)
+    else:
+        gap = 8
+        canvas = Image.new('RGB', (images[0].width + gap + images[1].width, height), (255, 255, 255))
+        canvas.paste(images[0], (0, 0))
+        canvas.paste(images[1], (images[0].width + gap, 0))
+        canvas.save(tmp_path, 'JPEG', quality=85, optimize=True)
+    os.replace(tmp_path, dest)
+
+@bp.route('/photos')
+@login_required
+def photos():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+
+    if not user.track_photos:
+        flash('Le suivi photos n\'est pas activé.', 'warning')
+        return redirect(url_for('weight.dashboard'))
+
+    today = datetime.utcnow().date()
+
+    # Toutes les photos de l'utilisateur
+    all_photos = PhotoEntry.query.filter_by(user_id=user_id).order_by(PhotoEntry.date.desc()).all()
+
+    # Organiser par mois
+    photos_by_month = {}
+    for photo in all_photos:
+        month_key = photo.date.strftime('%Y-%m')
+        month_label = photo.date.strftime('%B %Y').capitalize()
+        if month_key not in photos_by_month:
+            photos_by_month[month_key] = {'label': month_label, 'photos': {}}
+        photos_by_month[month_key]['photos'][photo.angle] = photo
+
+    # Photo ce mois-ci ?
+    first_day_month = today.replace(day=1)
+    photo_this_month = PhotoEntry.query.filter(
+        PhotoEntry.user_id == user_id,
+        PhotoEntry.date >= first_day_month
+    ).first()
+
+    # Données pour comparaison avant/après
+    months_list = sorted(photos_by_month.keys())
+    first_month = photos_by_month.get(months_list[0]) if months_list else None
+    last_month = photos_by_month.get(months_list[-1]) if len(months_list) > 1 else None
+
+    return render_template('photos.html',
+                         photos_by_month=photos_by_month,
+                         photo_this_month=photo_this_month,
+                         photo_angles=PHOTO_ANGLES,
+                         first_month=first_month,
+                         last_month=last_month,
+                         months_list=months_list,
+                         compare_available=PILLOW_AVAILABLE,
+                         today=today,
+                         user=user,
+                         theme=user.theme)
+
+@bp.route('/photos/upload', methods=['POST'])
+@login_required
+def upload_photo():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+
+    if not user.track_photos:
+        flash('Le suivi photos n\'est pas activé.', 'warning')
+        return redirect(url_for('weight.dashboard'))
+
+    today = datetime.utcnow().date()
+    errors = 0
+    saved = []
+
+    # Compression d'abord, hors transaction : la base n'est verrouillée
+    # en écriture que pendant les quelques requêtes qui suivent, et la
+    # connexion retourne au pool pendant la réception et la compression
+    db.session.close()
+    for angle, _, _ in PHOTO_ANGLES:
+        file = request.files.get(f'photo_{angle}')
+        if not file or not file.filename:
+            continue
+        if not allowed_file(file.filename):
+            errors += 1
+            continue
+
+        # Dossier utilisateur/mois
+        user_folder = os.path.join(UPLOAD_FOLDER, str(user_id), today.strftime('%Y-%m'))
+        os.makedirs(user_folder, exist_ok=True)
+
+        # Nom de fichier unique
+        ext = 'jpg'  # On sauvegarde toujours en JPEG après compression
+        filename = f"{today.isoformat()}_{angle}_{uuid.uuid4().hex[:8]}.{ext}"
+        filepath = os.path.join(user_folder, filename)
+
+        # Compresser et sauvegarder
+        compress_and_save(file, filepath)
+        saved.append((angle, filename))
+
+    old_paths = []
+    first_day_month = today.replace(day=1)
+    for angle, filename in saved:
+        # Supprimer ancienne photo du même angle ce mois-ci si elle existe
+        existing = PhotoEntry.query.filter(
+            PhotoEntry.user_id == user_id,
+            PhotoEntry.angle == angle,
+            PhotoEntry.date >= first_day_month
+        ).first()
+        if existing:
+            old_paths.append(photo_filepath(existing))
+            db.session.delete(existing)
+
+        # Enregistrer en BDD
+        photo = PhotoEntry(
+            user_id=user_id,
+            date=today,
+            angle=angle,
+            filename=filename
+        )
+        db.session.add(photo)
+
+    db.session.commit()
+    uploaded = len(saved)
+
+    for old_path in old_paths:
+        if os.path.exists(old_path):
+            os.remove(old_path)
+    for angle, _ in saved:
+        invalidate_comparisons(user_id, angle, today.strftime('%Y-%m'))
+
+    if uploaded > 0:
+        flash(f'✅ {uploaded} photo(s) enregistrée(s) !', 'success')
+    if errors > 0:
+        flash(f'⚠️ {errors} fichier(s) ignoré(s) (format non supporté).', 'warning')
+
+    return redirect(url_for('photos.photos'))
+
+@bp.route('/photos/delete/<int:photo_id>', methods=['POST'])
+@login_required
+def delete_photo(photo_id):
+    user_id = session['user_id']
+    photo = PhotoEntry.query.get_or_404(photo_id)
+
+    if photo.user_id != user_id:
+        flash('Action non autorisée.', 'danger')
+        return redirect(url_for('photos.photos'))
+
+    # Supprimer le fichier
+    filepath = photo_filepath(photo)
+    if os.path.exists(filepath):
+        os.remove(filepath)
+    invalidate_comparisons(user_id, photo.angle, photo.date.strftime('%Y-%m'))
+
+    db.session.delete(photo)
+    db.session.commit()
+
+    flash('Photo supprimée.', 'info')
+    return redirect(url_for('photos.photos'))
+
+@bp.route('/photos/file/<int:user_id>/<month>/<filename>')
+@login_required
+def serve_photo(user_id, month, filename):
+    """Sert les photos de façon sécurisée (seul l'utilisateur peut voir ses photos)."""
+    from flask import send_from_directory, abort
+    if session['user_id'] != user_id:
+        abort(403)
+    folder = os.path.join(UPLOAD_FOLDER, str(user_id), month)
+    return send_from_directory(folder, filename)
+
+@bp.route('/photos/compare/<angle>/<month_a>/<month_b>')
+@login_required
+def compare_photos(angle, month_a, month_b):
+    """Sert le montage avant/après d'un angle pour deux mois (généré à la demande)."""
+    from flask import send_file, abort
+    user_id = session['user_id']
+    mode = request.args.get('mode', 'side')
+
+    if not PILLOW_AVAILABLE or mode not in COMPARE_MODES:
+        abort(404)
+    if angle not in [a for a, _, _ in PHOTO_ANGLES]:
+        abort(404)
+    try:
+        bounds = [month_bounds(month_a), month_bounds(month_b)]
+    except ValueError:
+        abort(404)
+    # strptime accepte '2024-1' : une seule forme d'URL, donc une seule clé de cache,
+    # celle que invalidate_comparisons retrouve ('%Y-%m')
+    canonical = [start.strftime('%Y-%m') for start, _ in bounds]
+    if canonical != [month_a, month_b]:
+        return redirect(url_for('photos.compare_photos', angle=angle, month_a=canonical[0],
+                                month_b=canonical[1], **request.args), code=301)
+
+    # Dossier de l'utilisateur de la session : jamais le montage d'un autre compte
+    dest = comparison_filepath(user_id, angle, month_a, month_b, mode)
+    if os.path.exists(dest):
+        # Servi à nouveau : le plus récent pour prune_comparisons
+        os.utime(dest)
+    else:
+        sources = []
+        for start, end in bounds:
+            photo = PhotoEntry.query.filter(
+                PhotoEntry.user_id == user_id,
+                PhotoEntry.angle == angle,
+                PhotoEntry.date >= start,
+                PhotoEntry.date < end
+            ).order_by(PhotoEntry.date.desc()).first()
+            if not photo or not os.path.exists(photo_filepath(photo)):
+                abort(404)
+            sources.append(photo_filepath(photo))
+
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        build_comparison(sources[0], sources[1], dest, mode=mode, labels=[month_a, month_b])
+        prune_comparisons(user_id)
+
+    return send_file(dest, max_age=0)
@@ -0,0 +1,294 @@
+"""Tableau de bord et suivi du poids (tendance lissée, projection vers l'objectif)."""
+import os
+from datetime import datetime, timedelta
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, session, url_for
+
+import trends
+from cache import LRUCache
+from models import (
+    BodyMeasurement, MealEntry, PhotoEntry, User, WeightEntry, bump_data_version, db, get_data_version,
+    latest_daily_summary, refresh_daily_summaries
+)
+from blueprints.auth import login_required
+
+bp = Blueprint('weight', __name__)
+
+# Tendance du poids par utilisateur : (version des pesées, moteur)
+trend_cache = LRUCache(maxsize=256)
+
+def get_weight_trend(user_id):
+    """Tendance à jour, recalculée seulement si les pesées ont changé."""
+    version = get_data_version(user_id, 'weights')
+    cached = trend_cache.get(user_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    rows = db.session.query(WeightEntry.date, WeightEntry.weight).filter(
+        WeightEntry.user_id == user_id
+    ).order_by(WeightEntry.date, WeightEntry.id).all()
+    engine = trends.compute_trend(rows)
+    trend_cache.set(user_id, (version, engine))
+    return engine
+
+# Projection vers l'objectif : recalculée à chaque nouvelle version des pesées
+projection_cache = LRUCache(maxsize=256)
+PROJECTION_WINDOW_DAYS = int(os.environ.get('PROJECTION_WINDOW_DAYS', trends.PROJECTION_WINDOW_DAYS))
+
+def get_goal_projection(user, window_days=PROJECTION_WINDOW_DAYS):
+    """Date estimée d'atteinte de user.target_weight (avec bornes de confiance)."""
+    key = (user.id, get_data_version(user.id, 'weights'), user.target_weight, window_days)
+    result = projection_cache.get(key)
+    if result is None:
+        result = trends.project_goal(get_weight_trend(user.id).points, user.target_weight, window_days)
+        projection_cache.set(key, result)
+    return result
+
+def extend_weight_trend(user_id, version, date, weight):
+    """Après une nouvelle pesée : prolonge la tendance en cache au lieu de la recalculer.
+
+    `version` : version des pesées produite par bump_data_version pour cette pesée.
+    """
+    cached = trend_cache.get(user_id)
+    # Une autre pesée validée entre-temps : la tendance en cache ne la contient pas
+    if not cached or cached[0] != version - 1:
+        return
+    if cached[1].last_date is not None and date <= cached[1].last_date:
+        return
+    # Copie puis remplacement : les autres threads lisent encore l'objet en cache
+    engine = cached[1].copy()
+    engine.update(date, weight)
+    trend_cache.set(user_id, (version, engine))
+
+# ========================================
+# ROUTES PRINCIPALES
+# ========================================
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+    today = datetime.utcnow().date()
+    thirty_days_ago = today - timedelta(days=30)
+
+    # IMC, métabolisme et dépense du jour, déjà calculés ; en premier, car compléter
+    # l'historique valide la session et expirerait les entrées chargées avant
+    daily_summary = latest_daily_summary(user, today)
+
+    # Poids actuel
+    latest_weight = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.desc()).first()
+
+    # Poids de départ
+    first_weight = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.asc()).first()
+
+    # Poids saisi aujourd'hui (pour afficher/masquer le bouton)
+    today_weight = WeightEntry.query.filter_by(user_id=user_id, date=today).first()
+
+    # Historique poids (30 derniers jours)
+    weight_history = WeightEntry.query.filter(
+        WeightEntry.user_id == user_id,
+        WeightEntry.date >= thirty_days_ago
+    ).order_by(WeightEntry.date).all()
+
+    # Statistiques d'évolution du poids (rythme tiré de la tendance lissée)
+    trend = get_weight_trend(user_id)
+    trend_summary = trend.summary()
+    weight_stats = None
+    if latest_weight and first_weight and first_weight.id != latest_weight.id:
+        days_tracking = (latest_weight.date - first_weight.date).days or 1
+        total_loss = latest_weight.weight - first_weight.weight
+        avg_per_week = trend_summary['weekly_rate'] or 0
+        avg_per_month = avg_per_week / 7 * 30
+        weight_stats = {
+            'total_loss': total_loss,
+            'avg_per_week': avg_per_week,
+            'avg_per_month': avg_per_month,
+            'days_tracking': days_tracking,
+            'trend': trend_summary['trend'],
+            'avg_7': trend_summary['avg_7'],
+            'avg_30': trend_summary['avg_30']
+        }
+
+    goal_projection = get_goal_projection(user) if user.target_weight else None
+
+    # Mesures corporelles (30 derniers jours)
+    latest_measurements = []
+    if user.track_measurements:
+        latest_measurements = BodyMeasurement.query.filter(
+            BodyMeasurement.user_id == user_id,
+            BodyMeasurement.date >= thirty_days_ago
+        ).order_by(BodyMeasurement.date).all()
+
+    # Repas d'aujourd'hui
+    today_meals = MealEntry.query.filter_by(user_id=user_id, date=today).all()
+
+    # Rappel photo mensuel
+    photo_reminder = False
+    if user.track_photos and current_app.config['PHOTOS_ENABLED']:
+        first_day_month = today.replace(day=1)
+        photo_this_month = PhotoEntry.query.filter(
+            PhotoEntry.user_id == user_id,
+            PhotoEntry.date >= first_day_month
+        ).first()
+        photo_reminder = photo_this_month is None
+
+    return render_template('dashboard.html',
+                         latest_weight=latest_weight,
+                         first_weight=first_weight,
+                         today_weight=today_weight,
+                         weight_history=weight_history,
+                         weight_trend=trend.series(thirty_days_ago)['trend'],
+                         weight_stats=weight_stats,
+                         goal_projection=goal_projection,
+                         daily_summary=daily_summary,
+                         today_meals=today_meals,
+                         latest_measurements=latest_measurements,
+                         photo_reminder=photo_reminder,
+                         user=user,
+                         today=today,
+                         theme=user.theme)
+
+# ========================================
+# ROUTES POIDS
+# ========================================
+
+@bp.route('/weight')
+@login_required
+def weight():
+    user_id = session['user_id']
+    user = User.query.get(user_id)
+    today = datetime.utcnow().date()
+
+    # Récupérer toutes les entrées
+    entries = WeightEntry.query.filter_by(user_id=user_id).order_by(WeightEntry.date.desc()).all()
+
+    # Vérifier si déjà saisi aujourd'hui
+    weight_today = WeightEntry.query.filter_by(user_id=user_id, date=today).first()
+
+    # Récupérer le dernier poids pour le pré-remplir
+    last_weight = entries[0].weight if entries else None
+
+    # Calculer le nombre de jours depuis la dernière saisie
+    days_since_last_entry = None
+    if entries and not weight_today:
+        last_entry_date = entries[0].date
+        days_since_last_entry = (today - last_entry_date).days
+
+    # Message d'encouragement basé sur l'évolution
+    weight_evolution_message = None
+    weight_evolution_style = None
+
+    # Évolution jugée sur la tendance lissée, pas sur l'écart entre deux pesées
+    trend = get_weight_trend(user_id)
+    trend_summary = trend.summary()
+    weekly_rate = trend_summary['weekly_rate'] if trend_summary else None
+
+    if len(entries) >= 7 and weekly_rate is not None:
+        if weekly_rate < -0.2:  # Baisse significative
+            weight_evolution_message = f"🎉 Bravo ! Ta tendance baisse de {abs(weekly_rate):.1f} kg par semaine ! Continue comme ça ! 💪"
+            weight_evolution_style = "background: linear-gradient(135deg, #dcfce7, #bbf7d0); border-left: 4px solid #10b981; color: #065f46"
+        elif weekly_rate > 0.2:  # Hausse
+            weight_evolution_message = f"💙 Pas de panique ! +{weekly_rate:.1f} kg par semaine sur ta tendance, ça arrive. L'important c'est de continuer, tu vas y arriver ! 🌟"
+            weight_evolution_style = "background: linear-gradient(135deg, #dbeafe, #bfdbfe); border-left: 4px solid #3b82f6; color: #1e3a8a"
+        else:  # Stable
+            weight_evolution_message = f"✨ Poids stable ! C'est bien, tu maintiens le cap. Continue tes efforts ! 🎯"
+            weight_evolution_style = "background: linear-gradient(135deg, #fef3c7, #fde68a); border-left: 4px solid #f59e0b; color: #92400e"
+
+    # Préparer les données pour le graphique (toutes les données)
+    all_dates = [point['date'].strftime('%d/%m') for point in trend.points]
+    all_weights = [point['weight'] for point in trend.points]
+    all_trend = [point['trend'] for point in trend.points]
+
+    return render_template('weight.html',
+                         entries=entries,
+                         weight_today=weight_today,
+                         last_weight=last_weight,
+                         days_since_last_entry=days_since_last_entry,
+                         weight_evolution_message=weight_evolution_message,
+                         weight_evolution_style=weight_evolution_style,
+                         all_dates=all_dates,
+                         all_weights=all_weights,
+                         all_trend=all_trend,
+                         trend_summary=trend_summary,
+                         today=today,
+                         theme=user.theme)
+
+# Saisie hors ligne rejouée : date d'origine acceptée jusqu'à ce nombre de jours
+MAX_QUEUED_DAYS = 14
+
+def days_through(start, end):
+    """Jours de start à end inclus : une pesée change le poids reporté sur les jours suivants."""
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+@bp.route('/weight/add', methods=['POST'])
+@login_required
+def add_weight():
+    user_id = session['user_id']
+    today = now = datetime.utcnow().date()
+    # Saisie faite hors ligne, rejouée plus tard par le service worker : date de la saisie
+    queued_at = request.headers.get('X-Queued-At')
+    if queued_at:
+        try:
+            today = min(today, datetime.fromisoformat(queued_at.replace('Z', '+00:00')).date())
+        except ValueError:
+            pass
+        if (now - today).days > MAX_QUEUED_DAYS:
+            return jsonify({'error': 'too_old',
+                            'message': f'Saisie hors ligne de plus de {MAX_QUEUED_DAYS} jours'}), 400
+
+    # Vérifier si déjà saisi aujourd'hui
+    existing_entry = WeightEntry.query.filter_by(user_id=user_id, date=today).first()
+    if existing_entry and queued_at:
+        # Rejeu : statut distinct, signalé par le service worker (pas de message flash égaré)
+        return jsonify({'error': 'duplicate',
+                        'message': f'Poids du {today.strftime("%d/%m/%Y")} déjà enregistré'}), 409
+    if existing_entry:
+        flash('Tu as déjà enregistré ton poids aujourd\'hui !', 'warning')
+        return redirect(url_for('weight.weight'))
+
+    weight = float(request.form.get('weight'))
+
+    # Validation
+    if weight < 30 or weight > 300:
+        flash('Le poids doit être entre 30 et 300 kg.', 'danger')
+        return redirect(url_for('weight.weight'))
+
+    new_entry = WeightEntry(
+        user_id=user_id,
+        weight=weight,
+        date=today,
+        note=None  # Plus de notes
+    )
+    db.session.add(new_entry)
+    version = bump_data_version(user_id, 'weights')
+    refresh_daily_summaries(User.query.get(user_id), days_through(today, now))
+    db.session.commit()
+    extend_weight_trend(user_id, version, today, weight)
+
+    flash('Poids enregistré avec succès ! 🎉', 'success')
+    return redirect(url_for('weight.weight'))
+
+@bp.route('/weight/delete/<int:entry_id>', methods=['POST'])
+@login_required
+def delete_weight(entry_id):
+    user_id = session['user_id']
+    today = datetime.utcnow().date()
+
+    entry = WeightEntry.query.get_or_404(entry_id)
+
+    # Vérifier que c'est bien l'utilisateur
+    if entry.user_id != user_id:
+        flash('Erreur : cette pesée ne vous appartient pas.', 'error')
+        return redirect(url_for('weight.weight'))
+
+    # Pesée du jour, ou saisie aujourd'hui (rejeu hors ligne daté d'un jour précédent)
+    if not entry.deletable(today):
+        flash('❌ Tu ne peux supprimer que la pesée du jour.', 'warning')
+        return redirect(url_for('weight.weight'))
+
+    db.session.delete(entry)
+    bump_data_version(user_id, 'weights')
+    refresh_daily_summaries(User.query.get(user_id), days_through(min(entry.date, today), today))
+    db.session.commit()
+
+    flash('✅ Pesée supprimée.', 'success')
+    return redirect(url_for('weight.weight'))
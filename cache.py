@@ -0,0 +1,135 @@
+"""Cache applicatif NutriStep (mémoire, fichiers ou Redis).
+
+Les clés incluent la version des données de l'utilisateur (table
+data_versions) : une écriture rend les anciennes entrées inaccessibles,
+elles sortent ensuite du LRU d'elles-mêmes. Aucune invalidation
+explicite n'est donc nécessaire entre workers.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class LRUCache:
+    """Cache mémoire borné (moins récemment utilisé évincé en premier)."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _key_digest(key):
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+class FileSystemCache:
+    """Cache partagé entre workers via un dossier (une entrée = un fichier)."""
+
+    def __init__(self, directory, max_entries=5000):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, _key_digest(key))
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self):
+        entries = os.listdir(self.directory)
+        if len(entries) <= self.max_entries:
+            return
+        # Les plus anciennes d'abord, jusqu'à revenir à la moitié
+        paths = sorted((os.path.join(self.directory, name) for name in entries), key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries // 2]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+
+
+class RedisCache:
+    """Cache partagé sur un serveur compatible Redis (entrées expirées après ttl)."""
+
+    def __init__(self, url, ttl=7 * 24 * 3600, prefix='nutristep:'):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError('Le paquet redis est requis pour un cache redis://')
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(self.prefix + _key_digest(key))
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + _key_digest(key),
+                        pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=self.ttl)
+
+    def clear(self):
+        for name in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(name)
+
+
+def make_cache(url=None, maxsize=256):
+    """Cache selon l'URL : vide → mémoire, redis://… → Redis, sinon dossier (file://… ou chemin)."""
+    if not url:
+        return LRUCache(maxsize)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url)
+    if url.startswith('file://'):
+        url = url[len('file://'):]
+    return FileSystemCache(url)
@@ -0,0 +1,131 @@
+"""Compression des réponses dynamiques (gzip, Brotli) et minification HTML.
+
+Les pages rendues par Jinja (calendrier des repas, récap, historique des
+aliments) et les réponses d'API sont compressées selon l'en-tête
+Accept-Encoding : Brotli si le paquet `brotli` est installé et accepté par le
+navigateur, gzip sinon. Les réponses en streaming (exports CSV / NDJSON)
+sont compressées au fil de l'eau, sans être chargées en mémoire.
+
+Les fichiers statiques ne passent pas par ici : assets.py sert leurs
+versions précompressées par `flask build-assets`.
+
+Avec HTML_MINIFY=1, l'indentation et les lignes vides des pages HTML sont
+retirées avant compression (hors <pre> et <textarea>).
+"""
+import re
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Réglages « dynamiques » : Brotli 11 / gzip 9 coûtent trop cher à chaque requête
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# En dessous, l'en-tête gzip et la latence coûtent plus que les octets gagnés
+MIN_SIZE = 512
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+    'application/xml', 'image/svg+xml',
+}
+
+PRESERVED_BLOCK = re.compile(r'(<(pre|textarea)\b.*?</\2>)', re.IGNORECASE | re.DOTALL)
+LEADING_WHITESPACE = re.compile(r'\n\s+')
+
+
+def minify_html(html):
+    """Retire indentation et lignes vides, sauf dans <pre> et <textarea>."""
+    parts = PRESERVED_BLOCK.split(html)
+    # split avec deux groupes : [texte, bloc, nom de balise, texte, …]
+    for index in range(0, len(parts), 3):
+        parts[index] = LEADING_WHITESPACE.sub('\n', parts[index])
+    return ''.join(part for index, part in enumerate(parts) if index % 3 != 2).strip()
+
+
+def available_encodings():
+    return ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+
+
+class StreamCompressor:
+    """Compresseur incrémental : feed() pour chaque morceau, finish() à la fin."""
+
+    def __init__(self, encoding):
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.feed = self._compressor.process
+            self.finish = self._compressor.finish
+        else:
+            # wbits=31 : format gzip (en-tête et CRC) plutôt que zlib brut
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.feed = self._compressor.compress
+            self.finish = self._compressor.flush
+
+
+def compress(data, encoding):
+    compressor = StreamCompressor(encoding)
+    return compressor.feed(data) + compressor.finish()
+
+
+def compress_stream(chunks, encoding):
+    """Compresse au fil de l'eau les morceaux d'une réponse en streaming (exports)."""
+    compressor = StreamCompressor(encoding)
+    try:
+        for chunk in chunks:
+            data = compressor.feed(chunk.encode() if isinstance(chunk, str) else chunk)
+            # zlib et Brotli gardent les petits morceaux en tampon jusqu'à un bloc complet
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        # Client déconnecté : fermer le générateur d'origine (contexte de requête, curseur SQL)
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def negotiate(response):
+    """Encodage à appliquer à response, ou None."""
+    # Succès seulement : redirections et pages d'erreur sont courtes
+    if (not 200 <= response.status_code < 300 or response.status_code in (204, 206)
+            or 'Content-Encoding' in response.headers or response.cache_control.no_transform):
+        return None
+    return next((encoding for encoding in available_encodings()
+                 if request.accept_encodings[encoding]), None)
+
+
+def init_app(app, minify=False, min_size=MIN_SIZE):
+    """Compresse les réponses textuelles ; minify retire aussi les blancs des pages HTML."""
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_TYPES or response.direct_passthrough:
+            return response
+        # Les caches intermédiaires distinguent les versions compressées ou non
+        response.vary.add('Accept-Encoding')
+
+        if minify and response.mimetype == 'text/html' and not response.is_streamed:
+            response.set_data(minify_html(response.get_data(as_text=True)))
+
+        encoding = negotiate(response)
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(data, encoding))
+        response.content_encoding = encoding
+        # ETag calculé sur le contenu non compressé : il ne désigne plus les mêmes octets
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
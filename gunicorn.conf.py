@@ -0,0 +1,48 @@
+"""Configuration gunicorn (chargée automatiquement depuis le dossier courant).
+
+Profils (SERVING_PROFILE) :
+
+- `gthread` (défaut) : chaque worker sert plusieurs requêtes à la fois dans
+  des threads. Un import Garmin (attente réseau) ou un envoi de photos
+  n'occupe qu'un thread, les autres pages restent servies ;
+- `gevent` : greenlets, pour beaucoup de connexions lentes (nécessite le
+  paquet `gevent`, et `psycogreen` avec PostgreSQL) ;
+- `sync` : ancien comportement, une requête à la fois par worker.
+
+La session SQLAlchemy est propre à chaque contexte d'application, donc à
+chaque requête (thread ou greenlet). Avec PostgreSQL, garder
+DB_POOL_SIZE + DB_MAX_OVERFLOW >= GUNICORN_THREADS.
+"""
+import os
+
+SERVING_PROFILE = os.environ.get('SERVING_PROFILE', 'gthread')
+
+if 'PORT' in os.environ:
+    bind = f"0.0.0.0:{os.environ['PORT']}"
+# Hébergeurs gratuits : 512 Mo, 1 ou 2 workers au plus
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Import Garmin de 30 jours : plusieurs dizaines d'appels réseau
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+if SERVING_PROFILE == 'gthread':
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 8))
+elif SERVING_PROFILE == 'gevent':
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+elif SERVING_PROFILE == 'sync':
+    worker_class = 'sync'
+else:
+    raise ValueError(f'SERVING_PROFILE inconnu : {SERVING_PROFILE} (gthread, gevent ou sync)')
+
+
+def post_fork(server, worker):
+    # gevent : psycopg2 bloque tout le worker pendant une requête SQL sans ce patch
+    if SERVING_PROFILE == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            return
+        patch_psycopg()
@@ -0,0 +1,83 @@
+"""Analyses des mensurations : séries alignées sur les dates, moyennes
+glissantes, ratio taille/hanches et évolutions.
+
+Tout est produit en colonnes (une liste par mesure, même longueur que
+`dates`, None pour une mesure non saisie ce jour-là) en un seul passage
+sur les lignes de la requête.
+"""
+from collections import deque
+from datetime import timedelta
+
+MEASURES = ('waist', 'hips', 'thigh', 'arm', 'chest', 'calf')
+MEASURE_LABELS = {
+    'waist': 'Taille',
+    'hips': 'Hanches',
+    'thigh': 'Cuisse',
+    'arm': 'Bras',
+    'chest': 'Poitrine',
+    'calf': 'Mollet',
+}
+ROLLING_DAYS = 30
+DELTA_WINDOWS = (7, 30, 90)
+
+
+def build_series(rows, rolling_days=ROLLING_DAYS, delta_windows=DELTA_WINDOWS):
+    """Séries en colonnes à partir de lignes (date, waist, hips, thigh, arm, chest, calf) triées par date."""
+    dates = []
+    values = {name: [] for name in MEASURES}
+    rolling = {name: [] for name in MEASURES}
+    windows = {name: (deque(), [0.0]) for name in MEASURES}
+    # (date, valeur) des mesures réellement saisies, pour les évolutions
+    observed = {name: [] for name in MEASURES}
+    ratio = []
+
+    for row in rows:
+        day = row[0]
+        dates.append(day)
+        limit = day - timedelta(days=rolling_days)
+        for name, value in zip(MEASURES, row[1:]):
+            values[name].append(value)
+            window, total = windows[name]
+            if value is not None:
+                window.append((day, value))
+                total[0] += value
+                observed[name].append((day, value))
+            while window and window[0][0] <= limit:
+                total[0] -= window.popleft()[1]
+            rolling[name].append(round(total[0] / len(window), 1) if window else None)
+        waist, hips = row[1], row[2]
+        ratio.append(round(waist / hips, 3) if waist and hips else None)
+
+    return {
+        'dates': [day.isoformat() for day in dates],
+        'values': values,
+        'rolling': rolling,
+        'rolling_days': rolling_days,
+        'waist_hip_ratio': ratio,
+        'deltas': compute_deltas(observed, delta_windows),
+        'latest': {name: points[-1][1] if points else None for name, points in observed.items()},
+    }
+
+
+def compute_deltas(observed, delta_windows=DELTA_WINDOWS):
+    """Évolution de chaque mesure sur chaque fenêtre (jours), depuis sa dernière saisie.
+
+    La référence est la dernière valeur saisie au moins `days` jours avant ;
+    avec un historique plus court, la première valeur disponible.
+    """
+    deltas = {}
+    for days in delta_windows:
+        deltas[str(days)] = window_deltas = {}
+        for name, points in observed.items():
+            if len(points) < 2:
+                window_deltas[name] = None
+                continue
+            latest_date, latest_value = points[-1]
+            limit = latest_date - timedelta(days=days)
+            baseline = points[0][1]
+            for day, value in points:
+                if day > limit:
+                    break
+                baseline = value
+            window_deltas[name] = round(latest_value - baseline, 1)
+    return deltas
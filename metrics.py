@@ -0,0 +1,53 @@
+"""Indicateurs corporels dérivés : IMC, métabolisme de base (Mifflin-St Jeor)
+et dépense énergétique totale de la journée (TDEE).
+
+Fonctions pures : l'application les appelle pour précalculer le résumé
+quotidien (table daily_summaries) à chaque pesée ou activité.
+"""
+
+# Métabolisme de base × 1,2 : dépense d'une journée sédentaire, hors activités saisies
+SEDENTARY_FACTOR = 1.2
+# Coût d'un pas ≈ 0,0005 kcal par kg de poids (≈ 0,04 kcal/pas à 80 kg)
+KCAL_PER_STEP_PER_KG = 0.0005
+
+
+def age_on(birth_date, day):
+    if birth_date is None:
+        return None
+    return day.year - birth_date.year - ((day.month, day.day) < (birth_date.month, birth_date.day))
+
+
+def bmi(weight, height_cm):
+    if not weight or not height_cm:
+        return None
+    return round(weight / (height_cm / 100) ** 2, 1)
+
+
+def bmr_mifflin(weight, height_cm, age, gender):
+    """Métabolisme de base en kcal/jour (None si une donnée manque)."""
+    if not weight or not height_cm or age is None or gender not in ('M', 'F'):
+        return None
+    base = 10 * weight + 6.25 * height_cm - 5 * age
+    return round(base + 5 if gender == 'M' else base - 161)
+
+
+def steps_calories(steps, weight):
+    if not steps or not weight:
+        return 0
+    return round(steps * weight * KCAL_PER_STEP_PER_KG)
+
+
+def day_metrics(weight, height_cm, birth_date, gender, day, steps=0, activity_calories=0):
+    """Indicateurs d'une journée à partir du dernier poids connu et des activités du jour."""
+    bmr = bmr_mifflin(weight, height_cm, age_on(birth_date, day), gender)
+    step_kcal = steps_calories(steps, weight)
+    burned = (activity_calories or 0) + step_kcal
+    return {
+        'weight': weight,
+        'bmi': bmi(weight, height_cm),
+        'bmr': bmr,
+        'steps': steps or 0,
+        'activity_calories': activity_calories or 0,
+        'step_calories': step_kcal,
+        'tdee': round(bmr * SEDENTARY_FACTOR + burned) if bmr is not None else None,
+    }
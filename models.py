@@ -0,0 +1,420 @@
+"""Modèles SQLAlchemy et données dérivées (versions des caches, résumés quotidiens)."""
+import bisect
+import json
+import os
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func
+
+import metrics
+
+db = SQLAlchemy()
+
+def conflict_insert(model):
+    """INSERT acceptant ON CONFLICT (SQLite et PostgreSQL) pour les créations concurrentes."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+# ========================================
+# MODÈLES DE BASE DE DONNÉES
+# ========================================
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(255), nullable=True)  # Nullable pour les comptes Google
+    google_id = db.Column(db.String(255), unique=True, nullable=True)  # ID Google
+    theme = db.Column(db.String(20), default='green')  # Thème préféré de l'utilisateur
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Nouvelles colonnes profil
+    birth_date = db.Column(db.Date, nullable=True)
+    height = db.Column(db.Float, nullable=True)  # en cm
+    gender = db.Column(db.String(1), nullable=True)  # M/F
+    target_weight = db.Column(db.Float, nullable=True)  # en kg
+    track_meals = db.Column(db.Boolean, default=True, nullable=False)
+    track_activities = db.Column(db.Boolean, default=True, nullable=False)
+    enable_garmin_import = db.Column(db.Boolean, default=True, nullable=False)
+    track_measurements = db.Column(db.Boolean, default=False, nullable=False)
+    enable_secondary_measurements = db.Column(db.Boolean, default=False, nullable=False)
+    track_photos = db.Column(db.Boolean, default=False, nullable=False)
+    # Relations
+    weight_entries = db.relationship('WeightEntry', backref='user', lazy=True, cascade='all, delete-orphan')
+    meal_entries = db.relationship('MealEntry', backref='user', lazy=True, cascade='all, delete-orphan')
+    activity_entries = db.relationship('ActivityEntry', backref='user', lazy=True, cascade='all, delete-orphan')
+    body_measurements = db.relationship('BodyMeasurement', backref='user', lazy=True, cascade='all, delete-orphan')
+    photo_entries = db.relationship('PhotoEntry', backref='user', lazy=True, cascade='all, delete-orphan')
+    meal_favorites = db.relationship('MealFavorite', backref='user', lazy=True, cascade='all, delete-orphan')
+
+class WeightEntry(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    weight = db.Column(db.Float, nullable=False)
+    date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
+    note = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def deletable(self, today):
+        """Pesée du jour, ou saisie aujourd'hui (rejeu hors ligne daté d'un jour précédent)."""
+        return self.date == today or (self.created_at is not None and self.created_at.date() == today)
+
+class MealEntry(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    # Nouveau: 5 types de repas
+    meal_type = db.Column(db.String(20), nullable=False)
+    # Valeurs: breakfast, snack_morning, lunch, snack_afternoon, dinner
+
+    date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
+
+    # Nouveau: aliments (liste JSON)
+    foods = db.Column(db.Text)  # Stocké comme JSON ["yaourt", "pomme", ...]
+
+    # Nouveau: qualification
+    qualification = db.Column(db.String(20), default='normal')  # normal, exception, equilibrage
+
+    # Nouveau: si "rien" pour ce repas
+    is_none = db.Column(db.Boolean, default=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Aliments normalisés (table meal_food), écrits en parallèle de la colonne JSON
+    food_links = db.relationship('MealFood', order_by='MealFood.position', lazy=True,
+                                 cascade='all, delete-orphan')
+
+    def get_foods_list(self):
+        """Retourne la liste des aliments"""
+        if self.foods:
+            return json.loads(self.foods)
+        return []
+
+    def set_foods_list(self, foods_list):
+        """Définit la liste des aliments (colonne JSON + table meal_food)"""
+        self.foods = json.dumps(foods_list)
+        foods_by_name = Food.lookup(foods_list)
+        # Mise à jour en place des positions existantes (pas de DELETE + INSERT)
+        for position, name in enumerate(foods_list):
+            if position < len(self.food_links):
+                self.food_links[position].food = foods_by_name[name]
+            else:
+                self.food_links.append(MealFood(position=position, food=foods_by_name[name]))
+        del self.food_links[len(foods_list):]
+
+class Food(db.Model):
+    """Dictionnaire des aliments saisis (un nom = une ligne)."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.Text, unique=True, nullable=False)
+
+    @classmethod
+    def lookup(cls, names):
+        """Retourne {nom: Food}, en créant les aliments inconnus."""
+        names = set(names)
+        if not names:
+            return {}
+        found = {food.name: food for food in cls.query.filter(cls.name.in_(names))}
+        missing = names - found.keys()
+        if missing:
+            # Deux requêtes qui créent le même aliment : l'une l'insère, l'autre ne fait rien
+            db.session.execute(conflict_insert(cls).on_conflict_do_nothing(index_elements=['name']),
+                               [{'name': name} for name in missing])
+            found.update((food.name, food) for food in cls.query.filter(cls.name.in_(missing)))
+        return found
+
+class MealFood(db.Model):
+    __tablename__ = 'meal_food'
+    meal_entry_id = db.Column(db.Integer, db.ForeignKey('meal_entry.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    food_id = db.Column(db.Integer, db.ForeignKey('food.id'), nullable=False, index=True)
+    food = db.relationship('Food')
+
+class ActivityEntry(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    activity_type = db.Column(db.String(100), nullable=False)
+    duration = db.Column(db.Integer, nullable=False)  # en minutes
+    steps = db.Column(db.Integer, nullable=True)  # Nombre de pas (pour type "Pas")
+    calories_burned = db.Column(db.Integer)
+    date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
+    note = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class BodyMeasurement(db.Model):
+    __tablename__ = 'body_measurements'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+
+    # Mesures essentielles
+    waist = db.Column(db.Float, nullable=True)      # Tour de taille (cm)
+    hips = db.Column(db.Float, nullable=True)       # Tour de hanches (cm)
+    thigh = db.Column(db.Float, nullable=True)      # Tour de cuisse (cm)
+
+    # Mesures secondaires (optionnelles)
+    arm = db.Column(db.Float, nullable=True)        # Tour de bras (cm)
+    chest = db.Column(db.Float, nullable=True)      # Tour de poitrine (cm)
+    calf = db.Column(db.Float, nullable=True)       # Tour de mollet (cm)
+
+    note = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PhotoEntry(db.Model):
+    __tablename__ = 'photo_entries'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    angle = db.Column(db.String(20), nullable=False)
+    # face, profil_g, profil_d, dos, ventre
+    filename = db.Column(db.String(200), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+PHOTO_ANGLES = [
+    ('visage',  'Visage',        'De face, cadre tête et épaules'),
+    ('ventre',  'Ventre',        'De profil, zone abdomen/taille'),
+    ('totale',  'Silhouette',    'De face, corps entier'),
+]
+
+# Photos de progression (aussi lues par l'export et la restauration)
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads', 'photos')
+
+
+class MealFavorite(db.Model):
+    __tablename__ = 'meal_favorites'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    meal_type = db.Column(db.String(20), nullable=False)
+    foods = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def get_foods_list(self):
+        return json.loads(self.foods) if self.foods else []
+
+    def set_foods_list(self, foods_list):
+        self.foods = json.dumps(foods_list, ensure_ascii=False)
+
+class DataVersion(db.Model):
+    """Compteur de modifications par utilisateur et par domaine (clé des caches)."""
+    __tablename__ = 'data_versions'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    scope = db.Column(db.String(40), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class DailySummary(db.Model):
+    """Indicateurs précalculés d'une journée (recalculés à chaque pesée ou activité)."""
+    __tablename__ = 'daily_summaries'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    weight = db.Column(db.Float, nullable=True)  # Dernier poids connu ce jour-là
+    bmi = db.Column(db.Float, nullable=True)
+    bmr = db.Column(db.Integer, nullable=True)
+    steps = db.Column(db.Integer, nullable=False, default=0)
+    activity_calories = db.Column(db.Integer, nullable=False, default=0)  # Activités saisies
+    step_calories = db.Column(db.Integer, nullable=False, default=0)  # Estimées d'après les pas
+    tdee = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'date': self.date.isoformat(),
+            'weight': self.weight,
+            'bmi': self.bmi,
+            'bmr': self.bmr,
+            'steps': self.steps,
+            'activity_calories': self.activity_calories,
+            'step_calories': self.step_calories,
+            'tdee': self.tdee,
+        }
+
+def get_data_version(user_id, scope):
+    # Lecture en base (pas la carte d'identité de la session : bump_data_version passe par un INSERT)
+    version = db.session.query(DataVersion.version).filter_by(user_id=user_id, scope=scope).scalar()
+    return version or 0
+
+def bump_data_version(user_id, scope):
+    """Incrémente la version dans la transaction en cours (à appeler avant commit).
+
+    Retourne la nouvelle version, celle que produit cette transaction.
+    """
+    # Upsert : deux premières écritures concurrentes ne se disputent pas la clé primaire
+    statement = conflict_insert(DataVersion).values(user_id=user_id, scope=scope, version=1)
+    return db.session.execute(statement.on_conflict_do_update(
+        index_elements=['user_id', 'scope'],
+        set_={'version': DataVersion.version + 1},
+    ).returning(DataVersion.version)).scalar_one()
+
+def get_data_versions(user_id, scopes):
+    """Versions de plusieurs domaines en une requête (tuple dans l'ordre de scopes)."""
+    rows = dict(db.session.query(DataVersion.scope, DataVersion.version).filter(
+        DataVersion.user_id == user_id,
+        DataVersion.scope.in_(scopes)
+    ).all())
+    return tuple(rows.get(scope, 0) for scope in scopes)
+
+def bump_period_versions(user_id, domain, dates):
+    """Incrémente le domaine et chaque mois touché ('meals:2025-03')."""
+    bump_data_version(user_id, domain)
+    for month in sorted({d.strftime('%Y-%m') for d in dates}):
+        bump_data_version(user_id, f'{domain}:{month}')
+
+def months_between(start, end):
+    """Mois 'YYYY-MM' couverts par [start, end]."""
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def period_versions(user_id, domains, start, end):
+    """Versions des mois de la période pour chaque domaine, plus l'époque (restaurations)."""
+    months = months_between(start, end)
+    scopes = [f'{domain}:{month}' for domain in domains for month in months] + ['epoch']
+    return get_data_versions(user_id, scopes)
+
+def refresh_daily_summaries(user, dates=None):
+    """Recalcule le résumé des jours donnés (tous les jours suivis si dates est None).
+
+    À appeler avant commit, après une pesée, une activité ou un changement de profil.
+    """
+    weights = db.session.query(WeightEntry.date, WeightEntry.weight).filter(
+        WeightEntry.user_id == user.id
+    ).order_by(WeightEntry.date, WeightEntry.id).all()
+    activity_query = db.session.query(
+        ActivityEntry.date,
+        func.coalesce(func.sum(ActivityEntry.steps), 0),
+        func.coalesce(func.sum(ActivityEntry.calories_burned), 0)
+    ).filter(ActivityEntry.user_id == user.id).group_by(ActivityEntry.date)
+    if dates is not None:
+        dates = set(dates)
+        if not dates:
+            return
+        activity_query = activity_query.filter(ActivityEntry.date.in_(dates))
+    activity_by_date = {day: (steps, calories) for day, steps, calories in activity_query}
+    if dates is None:
+        dates = {day for day, _ in weights} | set(activity_by_date)
+
+    weight_dates = [day for day, _ in weights]
+    existing = {row.date: row for row in DailySummary.query.filter(
+        DailySummary.user_id == user.id, DailySummary.date.in_(dates)
+    )}
+    for day in sorted(dates):
+        # Dernier poids connu à cette date
+        index = bisect.bisect_right(weight_dates, day) - 1
+        weight = weights[index][1] if index >= 0 else None
+        steps, calories = activity_by_date.get(day, (0, 0))
+        if weight is None and not steps and not calories:
+            if day in existing:
+                db.session.delete(existing[day])
+            continue
+        values = metrics.day_metrics(weight, user.height, user.birth_date, user.gender, day, steps, calories)
+        row = existing.get(day)
+        if row is None:
+            row = DailySummary(user_id=user.id, date=day)
+            db.session.add(row)
+        for name, value in values.items():
+            setattr(row, name, value)
+
+def ensure_daily_summaries(user):
+    """Construit l'historique des résumés s'il ne remonte pas au premier jour suivi.
+
+    Les pesées et activités enregistrées ne recalculent que leur jour : un
+    historique partiel (déploiement, restauration) est ainsi complété.
+    """
+    first_weight = db.session.query(func.min(WeightEntry.date)).filter(
+        WeightEntry.user_id == user.id).scalar()
+    # Même règle que refresh_daily_summaries : un jour sans poids ni dépense n'a pas de résumé
+    first_activity = db.session.query(func.min(ActivityEntry.date)).filter(
+        ActivityEntry.user_id == user.id,
+        db.or_(ActivityEntry.steps > 0, ActivityEntry.calories_burned > 0)
+    ).scalar()
+    tracked = [day for day in (first_weight, first_activity) if day is not None]
+    if not tracked:
+        return
+    first_summary = db.session.query(func.min(DailySummary.date)).filter(
+        DailySummary.user_id == user.id).scalar()
+    if first_summary is None or first_summary > min(tracked):
+        refresh_daily_summaries(user)
+        db.session.commit()
+
+def latest_daily_summary(user, day):
+    """Résumé le plus récent jusqu'à day (historique complété si besoin)."""
+    ensure_daily_summaries(user)
+    return DailySummary.query.filter(
+        DailySummary.user_id == user.id, DailySummary.date <= day
+    ).order_by(DailySummary.date.desc()).first()
+
+def upgrade_daily_summaries():
+    """Recrée daily_summaries si son schéma est antérieur (données dérivées, reconstruites à la demande)."""
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns(DailySummary.__tablename__)}
+    if columns != set(DailySummary.__table__.columns.keys()):
+        DailySummary.__table__.drop(db.engine)
+        DailySummary.__table__.create(db.engine)
+
+# Tables exportées (nom dans l'archive → modèle)
+EXPORT_TABLES = {
+    'weights': WeightEntry,
+    'meals': MealEntry,
+    'activities': ActivityEntry,
+    'measurements': BodyMeasurement,
+    'favorites': MealFavorite,
+    'photos': PhotoEntry,
+}
+
+# Sauvegarde d'instance (flask backup) : comptes compris, sans quoi une base
+# PostgreSQL (pas de snapshot SQLite) ne pourrait pas être reconstruite
+INSTANCE_TABLES = {'users': User, **EXPORT_TABLES}
+
+# Clés naturelles utilisées pour rendre la restauration idempotente
+RESTORE_KEYS = {
+    'weights': ['date'],
+    'meals': ['date', 'meal_type'],
+    'activities': ['date', 'activity_type', 'created_at'],
+    'measurements': ['date'],
+    'favorites': ['name', 'meal_type'],
+    # Une photo par angle et par date (un envoi remplace celle du mois)
+    'photos': ['date', 'angle'],
+}
+
+# Champs du profil copiés dans le manifeste d'un export utilisateur
+PROFILE_FIELDS = ['username', 'email', 'theme', 'birth_date', 'height', 'gender', 'target_weight',
+                  'track_meals', 'track_activities', 'enable_garmin_import', 'track_measurements',
+                  'enable_secondary_measurements', 'track_photos']
+
+# ========================================
+# INITIALISATION DE LA BASE DE DONNÉES
+# ========================================
+
+def backfill_meal_foods(chunk_size=1000):
+    """Remplit meal_food pour les repas qui n'y figurent pas encore (migration)."""
+    missing = db.session.query(MealEntry.id, MealEntry.foods).filter(
+        MealEntry.foods.isnot(None),
+        MealEntry.foods != '[]',
+        ~db.session.query(MealFood.meal_entry_id).filter(MealFood.meal_entry_id == MealEntry.id).exists()
+    ).order_by(MealEntry.id)
+
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = missing.filter(MealEntry.id > last_id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        foods_by_entry = {row.id: json.loads(row.foods) for row in rows}
+        foods_by_name = Food.lookup(name for foods in foods_by_entry.values() for name in foods)
+        db.session.flush()
+        links = [
+            {'meal_entry_id': entry_id, 'position': position, 'food_id': foods_by_name[name].id}
+            for entry_id, foods in foods_by_entry.items()
+            for position, name in enumerate(foods)
+        ]
+        if links:
+            db.session.execute(db.insert(MealFood), links)
+        db.session.commit()
+        migrated += len(rows)
+    return migrated
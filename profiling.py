@@ -0,0 +1,228 @@
+"""Instrumentation des requêtes (optionnelle, PROFILING=1).
+
+Pour chaque requête : durée totale, nombre et durée des requêtes SQL
+(événements SQLAlchemy), durée de rendu des templates et pic mémoire
+(tracemalloc). Restitué de trois façons :
+
+- en-tête `Server-Timing` (visible dans l'onglet réseau du navigateur) ;
+- une ligne de log JSON par requête (logger `nutristep.profiling`) ;
+- `/metrics` : histogrammes par route au format texte Prometheus.
+
+Les histogrammes sont propres à chaque processus (un par worker).
+
+Le pic mémoire de tracemalloc est global au processus : avec des workers
+gthread ou gevent, une requête servie en même temps qu'une autre n'a pas
+de pic (peak_kib vide) plutôt qu'un pic faux. La mesure n'est donc
+activée par défaut qu'avec SERVING_PROFILE=sync (voir app.py).
+"""
+import json
+import logging
+import threading
+import time
+import tracemalloc
+
+from flask import Response, g, has_request_context, request
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('nutristep.profiling')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+MEMORY_BUCKETS = (64, 256, 1024, 4096, 16384, 65536)  # Kio
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.total:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class Metrics:
+    """Histogrammes par (méthode, route), protégés par un verrou."""
+
+    SERIES = (
+        ('nutristep_request_duration_seconds', 'wall', DURATION_BUCKETS),
+        ('nutristep_sql_queries', 'sql_count', QUERY_BUCKETS),
+        ('nutristep_sql_duration_seconds', 'sql', DURATION_BUCKETS),
+        ('nutristep_template_duration_seconds', 'template', DURATION_BUCKETS),
+        ('nutristep_peak_memory_kib', 'peak_kib', MEMORY_BUCKETS),
+    )
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method, route, sample):
+        with self._lock:
+            histograms = self._routes.get((method, route))
+            if histograms is None:
+                histograms = {key: Histogram(buckets) for _, key, buckets in self.SERIES}
+                self._routes[(method, route)] = histograms
+            for key, histogram in histograms.items():
+                if sample.get(key) is not None:
+                    histogram.observe(sample[key])
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, key, _ in self.SERIES:
+                lines.append(f'# TYPE {name} histogram')
+                for (method, route), histograms in sorted(self._routes.items()):
+                    if histograms[key].count:
+                        lines.extend(histograms[key].lines(name, f'method="{method}",route="{route}"'))
+        return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile' in g:
+        conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('profile_started')
+    if not started or not has_request_context() or 'profile' not in g:
+        return
+    g.profile['sql_count'] += 1
+    g.profile['sql'] += time.perf_counter() - started.pop()
+
+
+def _before_render(sender, template, context, **extra):
+    if 'profile' in g:
+        g.profile['template_started'].append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    if 'profile' in g and g.profile['template_started']:
+        started = g.profile['template_started'].pop()
+        # Templates imbriqués : seul le plus externe est compté
+        if not g.profile['template_started']:
+            g.profile['template'] += time.perf_counter() - started
+
+
+class _Concurrency:
+    """Requêtes en cours dans le processus, pour écarter les pics mémoire partagés."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.started = 0
+
+    def enter(self):
+        """Retourne (seule requête en cours ?, numéro de la requête)."""
+        with self._lock:
+            self.in_flight += 1
+            self.started += 1
+            return self.in_flight == 1, self.started
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def init_app(app, trace_memory=True):
+    """Active l'instrumentation sur app et ajoute la route /metrics."""
+    metrics = Metrics()
+    app.extensions['profiling'] = metrics
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    concurrency = _Concurrency()
+
+    @app.before_request
+    def start_profile():
+        alone, number = concurrency.enter()
+        memory_base = None
+        if tracemalloc.is_tracing() and alone:
+            tracemalloc.reset_peak()
+            memory_base = tracemalloc.get_traced_memory()[0]
+        g.profile = {'started': time.perf_counter(), 'sql_count': 0, 'sql': 0.0,
+                     'template': 0.0, 'template_started': [], 'memory_base': memory_base,
+                     'number': number}
+        g.profile_in_flight = True
+
+    @app.teardown_request
+    def leave_profile(exc):
+        if g.pop('profile_in_flight', False):
+            concurrency.leave()
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None or request.endpoint == 'metrics':
+            return response
+        wall = time.perf_counter() - profile['started']
+        # Pic atteint pendant la requête, au-delà de la mémoire déjà allouée ; seulement
+        # si aucune autre requête n'a commencé entre-temps (pic remis à zéro ou partagé)
+        peak_kib = None
+        if (tracemalloc.is_tracing() and profile['memory_base'] is not None
+                and concurrency.started == profile['number']):
+            peak_kib = (tracemalloc.get_traced_memory()[1] - profile['memory_base']) / 1024
+        sample = {
+            'wall': wall,
+            'sql_count': profile['sql_count'],
+            'sql': profile['sql'],
+            'template': profile['template'],
+            'peak_kib': peak_kib,
+        }
+        route = request.url_rule.rule if request.url_rule else 'inconnue'
+        metrics.observe(request.method, route, sample)
+
+        timings = [
+            f'app;dur={wall * 1000:.1f}',
+            f'db;dur={profile["sql"] * 1000:.1f};desc="{profile["sql_count"]} requetes SQL"',
+            f'tpl;dur={profile["template"] * 1000:.1f}',
+        ]
+        response.headers.add('Server-Timing', ', '.join(timings))
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'route': route,
+            'path': request.path,
+            'status': response.status_code,
+            'wall_ms': round(wall * 1000, 1),
+            'sql_count': profile['sql_count'],
+            'sql_ms': round(profile['sql'] * 1000, 1),
+            'template_ms': round(profile['template'] * 1000, 1),
+            'peak_kib': round(peak_kib) if peak_kib is not None else None,
+        }))
+        return response
+
+    @app.route('/metrics', endpoint='metrics')
+    def metrics_endpoint():
+        token = app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Non autorisé\n', status=401, mimetype='text/plain')
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
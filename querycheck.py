@@ -0,0 +1,149 @@
+"""Détection des requêtes N+1 et des requêtes lentes (développement / tests).
+
+Une requête HTTP qui exécute plusieurs fois la même requête SQL (même
+structure, paramètres différents) est signalée dans les logs, de même
+que toute requête SQL plus lente que le seuil, avec la pile d'appel.
+
+Pour les tests, la fixture pytest `query_budget` vérifie le nombre
+maximal de requêtes d'un bloc (chargée par tests/conftest.py) :
+
+    pytest_plugins = ['querycheck']
+
+    def test_meals(client, query_budget):
+        with query_budget(5):
+            client.get('/meals')
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Fixture déclarée seulement sous pytest (déjà importé quand il charge le plugin) :
+# importer pytest coûterait ~80 ms au démarrage de l'application
+pytest = sys.modules.get('pytest')
+
+logger = logging.getLogger('nutristep.querycheck')
+
+REPEAT_THRESHOLD = 5
+SLOW_QUERY_MS = 100
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_local = threading.local()
+
+
+def normalize(statement):
+    """Forme structurelle d'une requête : littéraux et listes IN remplacés."""
+    statement = re.sub(r"'(?:[^']|'')*'", '?', statement)
+    statement = re.sub(r'\b\d+(?:\.\d+)?\b', '?', statement)
+    statement = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?)', statement)
+    statement = re.sub(r'__\[POSTCOMPILE_\w+\]', '?', statement)
+    return ' '.join(statement.split())
+
+
+def project_stack():
+    """Pile d'appel limitée aux fichiers du projet."""
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(PROJECT_ROOT) and not frame.filename.endswith('querycheck.py')
+    ]
+    return ''.join(traceback.format_list(frames))
+
+
+def _recorders():
+    if not hasattr(_local, 'recorders'):
+        _local.recorders = []
+    return _local.recorders
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('querycheck_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('querycheck_started')
+    duration = time.perf_counter() - started.pop() if started else 0.0
+    for recorder in _recorders():
+        recorder.append((statement, duration))
+    if has_request_context() and 'querycheck' in g:
+        state = g.querycheck
+        state['statements'][normalize(statement)] += 1
+        if duration * 1000 >= state['slow_ms']:
+            logger.warning('Requête lente (%.0f ms) sur %s %s :\n%s\n%s',
+                           duration * 1000, request.method, request.path, statement, project_stack())
+
+
+_listening = False
+
+
+def _listen():
+    global _listening
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening = True
+
+
+def repeated(statements, threshold=REPEAT_THRESHOLD):
+    """[(requête normalisée, nombre)] des requêtes répétées au moins threshold fois."""
+    counts = statements if isinstance(statements, Counter) else Counter(normalize(s) for s in statements)
+    return [(statement, count) for statement, count in counts.most_common() if count >= threshold]
+
+
+def init_app(app, threshold=REPEAT_THRESHOLD, slow_ms=SLOW_QUERY_MS):
+    """Signale dans les logs les N+1 probables et les requêtes lentes de chaque requête HTTP."""
+    _listen()
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def start_querycheck():
+        g.querycheck = {'statements': Counter(), 'slow_ms': slow_ms}
+
+    @app.after_request
+    def finish_querycheck(response):
+        state = g.pop('querycheck', None)
+        if state is None:
+            return response
+        for statement, count in repeated(state['statements'], threshold):
+            logger.warning('N+1 probable sur %s %s : %d× %s', request.method, request.path, count, statement)
+        return response
+
+
+@contextmanager
+def assert_max_queries(max_queries, repeat_threshold=None):
+    """Échoue si le bloc exécute plus de max_queries requêtes SQL.
+
+    Avec repeat_threshold, échoue aussi dès qu'une même requête est répétée
+    ce nombre de fois.
+    """
+    _listen()
+    recorded = []
+    _recorders().append(recorded)
+    try:
+        yield recorded
+    finally:
+        _recorders().remove(recorded)
+
+    statements = [statement for statement, _ in recorded]
+    details = '\n'.join(f'  {count}× {statement}' for statement, count in repeated(statements, 2))
+    if len(recorded) > max_queries:
+        raise AssertionError(f'{len(recorded)} requêtes SQL pour un budget de {max_queries}\n{details}')
+    if repeat_threshold and repeated(statements, repeat_threshold):
+        raise AssertionError(f'Requêtes répétées (N+1 probable) :\n{details}')
+
+
+if pytest is not None:
+    @pytest.fixture
+    def query_budget():
+        """Fabrique de contextes vérifiant le nombre maximal de requêtes SQL."""
+        return assert_max_queries
@@ -0,0 +1,106 @@
+"""Moteur du récapitulatif repas + activités.
+
+Construit les jours de la période en un seul passage sur les repas, un sur
+leurs aliments (table meal_food) et un sur les activités. Aucune requête
+ici : les lignes et les agrégats SQL (qualifications, encas) sont fournis
+par l'appelant.
+"""
+from datetime import timedelta
+
+MEAL_TYPES = ('breakfast', 'snack_morning', 'lunch', 'snack_afternoon', 'dinner')
+MAIN_MEALS = ('breakfast', 'lunch', 'dinner')
+SNACK_MEALS = ('snack_morning', 'snack_afternoon')
+DAY_NAMES_FR = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+# Au-delà, la page devient illisible et la requête inutilement lourde
+MAX_RECAP_DAYS = 366
+
+
+def clamp_period(start, end, max_days=MAX_RECAP_DAYS):
+    """Retourne (start, end, tronquée) avec au plus max_days jours, les plus récents."""
+    if (end - start).days + 1 > max_days:
+        return end - timedelta(days=max_days - 1), end, True
+    return start, end, False
+
+
+def build_recap(start, end, meals, foods, activities, today, qualification_counts, snack_types):
+    """Jours de la période et statistiques.
+
+    `meals` : lignes (id, date, meal_type, qualification, is_none).
+    `foods` : lignes (meal_entry_id, nom), dans l'ordre des positions.
+    `activities` : lignes (date, activity_type, duration, steps, calories_burned, note).
+    `qualification_counts` : {qualification: nombre de repas} (GROUP BY).
+    `snack_types` : types d'encas qui ont des aliments (jointure sur meal_food).
+    """
+    days_data = []
+    days_by_date = {}
+    current = start
+    while current <= end:
+        day = {
+            'date': current,
+            'day_name': DAY_NAMES_FR[current.weekday()],
+            'is_today': current == today,
+            'meals': dict.fromkeys(MEAL_TYPES),
+            'activities': [],
+        }
+        days_data.append(day)
+        days_by_date[current] = day
+        current += timedelta(days=1)
+
+    stats = {
+        'days_with_meals': 0,
+        'complete_days': 0,
+        'total_exceptions': qualification_counts.get('exception', 0),
+        'total_equilibrages': qualification_counts.get('equilibrage', 0),
+    }
+    # Nombre de créneaux remplis par jour (total, principaux)
+    filled = {}
+    slots_by_id = {}
+
+    for meal_id, meal_date, meal_type, qualification, is_none in meals:
+        day = days_by_date.get(meal_date)
+        if day is None or meal_type not in day['meals']:
+            continue
+
+        if day['meals'][meal_type] is None:
+            total, main = filled.get(meal_date, (0, 0))
+            total += 1
+            if meal_type in MAIN_MEALS:
+                main += 1
+                if main == len(MAIN_MEALS):
+                    stats['complete_days'] += 1
+            if total == 1:
+                stats['days_with_meals'] += 1
+            filled[meal_date] = (total, main)
+
+        slot = {'foods': [], 'qualification': qualification, 'is_none': is_none}
+        day['meals'][meal_type] = slot
+        slots_by_id[meal_id] = slot
+
+    for meal_id, name in foods:
+        slot = slots_by_id.get(meal_id)
+        if slot is not None:
+            slot['foods'].append(name)
+
+    activities_stats = {'total_count': 0, 'total_steps': 0, 'total_calories': 0}
+    for activity_date, activity_type, duration, steps, calories_burned, note in activities:
+        activities_stats['total_count'] += 1
+        activities_stats['total_steps'] += steps or 0
+        activities_stats['total_calories'] += calories_burned or 0
+        day = days_by_date.get(activity_date)
+        if day is not None:
+            day['activities'].append({
+                'activity_type': activity_type,
+                'duration': duration,
+                'steps': steps or 0,
+                'calories_burned': calories_burned,
+                'note': note
+            })
+
+    return {
+        'days_data': days_data,
+        'stats': stats,
+        'has_snack_morning': 'snack_morning' in snack_types,
+        'has_snack_afternoon': 'snack_afternoon' in snack_types,
+        'activities_stats': activities_stats,
+    }
@@ -1,3 +0,0 @@
-self.addEventListener("install", (e) => self.skipWaiting());
-self.addEventListener("activate", (e) => self.clients.claim());
-self.addEventListener("fetch", (e) => {});
\ No newline at end of file
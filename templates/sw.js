@@ -0,0 +1,334 @@
+// Service worker NutriStep : rendu par la route /sw.js (liste des fichiers à jour)
+//
+// - fichiers statiques (noms avec empreinte) : précachés, servis depuis le cache ;
+// - pages : réseau d'abord, dernière version en cache hors ligne ;
+// - API GET : cache immédiat puis mise à jour en arrière-plan (stale-while-revalidate) ;
+// - saisies de poids, repas et activités faites hors ligne : boîte d'envoi IndexedDB,
+//   rejouée par Background Sync (ou au retour du réseau sans Background Sync) ;
+// - pages, réponses d'API et saisies en attente sont rattachées au compte de la
+//   session (en-tête X-NutriStep-User) : jamais servies ni rejouées pour un autre.
+
+const VERSION = {{ version|tojson }};
+const PRECACHE_URLS = {{ precache_urls|tojson }};
+const OFFLINE_URL = {{ offline_url|tojson }};
+const LOGIN_PATH = {{ login_path|tojson }};
+const LOGOUT_PATH = {{ logout_path|tojson }};
+
+const STATIC_CACHE = `nutristep-static-${VERSION}`;
+const PAGES_CACHE = `nutristep-pages-${VERSION}`;
+const API_CACHE = 'nutristep-api';
+
+// Saisies mises en file hors ligne (formulaires et PATCH des repas)
+const OUTBOX_ROUTES = [/^\/weight\/add$/, /^\/activities\/add$/, /^\/meals\/save-day$/, /^\/api\/meals\/[^/]+\/[^/]+$/];
+// Jamais mis en cache : connexion, exports en streaming, photos, métriques
+const NO_CACHE_ROUTES = [/^\/login/, /^\/logout/, /^\/register/, /^\/auth\//, /^\/api\/export/, /^\/photos\/file\//, /^\/metrics/];
+const PAGE_TIMEOUT_MS = 3000;
+// Compte de la session, opaque (vide : déconnecté)
+const USER_HEADER = 'X-NutriStep-User';
+
+// ========================================
+// INSTALLATION ET ACTIVATION
+// ========================================
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(STATIC_CACHE);
+    await cache.addAll(PRECACHE_URLS.filter((url) => url.startsWith('/')));
+    // CDN injoignable : l'installation continue, la bibliothèque sera mise en cache à la demande
+    await Promise.all(PRECACHE_URLS.filter((url) => !url.startsWith('/')).map((url) => cache.add(url).catch(() => {})));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    // Caches d'une version précédente (pages comprises : elles pointent vers d'anciens fichiers)
+    const names = await caches.keys();
+    await Promise.all(names
+      .filter((name) => name.startsWith('nutristep-') && ![STATIC_CACHE, PAGES_CACHE, API_CACHE].includes(name))
+      .map((name) => caches.delete(name)));
+    await self.clients.claim();
+    await flushOutbox().catch(() => {});
+  })());
+});
+
+// ========================================
+// STRATÉGIES DE CACHE
+// ========================================
+
+self.addEventListener('fetch', (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  const sameOrigin = url.origin === self.location.origin;
+
+  if (sameOrigin && request.method !== 'GET') {
+    if (OUTBOX_ROUTES.some((route) => route.test(url.pathname))) {
+      event.respondWith(sendOrQueue(request));
+    } else {
+      event.respondWith(sendAndInvalidate(request));
+    }
+    return;
+  }
+  if (request.method !== 'GET') return;
+
+  if (!sameOrigin) {
+    // Bibliothèque servie par un CDN (tant qu'elle n'est pas dans static/vendor/)
+    if (PRECACHE_URLS.includes(request.url)) event.respondWith(cacheFirst(request, STATIC_CACHE));
+    return;
+  }
+  if (url.pathname === LOGOUT_PATH) {
+    event.respondWith(logout(request));
+    return;
+  }
+  if (url.pathname.startsWith(LOGIN_PATH) && request.mode === 'navigate') {
+    // Connexion (peut-être à un autre compte) : plus rien de l'ancienne session n'est servi
+    event.respondWith(forgetUser().then(() => fetch(request)));
+    return;
+  }
+  if (NO_CACHE_ROUTES.some((route) => route.test(url.pathname))) return;
+
+  if (url.pathname.startsWith('/static/')) {
+    event.respondWith(cacheFirst(request, STATIC_CACHE));
+  } else if (url.pathname.startsWith('/api/')) {
+    event.respondWith(staleWhileRevalidate(event, API_CACHE));
+  } else if (request.mode === 'navigate') {
+    event.respondWith(networkFirst(request, PAGES_CACHE));
+  }
+});
+
+async function cacheFirst(request, cacheName) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) {
+    const cache = await caches.open(cacheName);
+    await cache.put(request, response.clone());
+  }
+  return response;
+}
+
+async function staleWhileRevalidate(event, cacheName) {
+  const cache = await caches.open(cacheName);
+  const cached = await matchForUser(cache, event.request);
+  const update = fetch(event.request).then(async (response) => {
+    // Changement de compte : caches effacés, ouvrir de nouveau avant d'écrire
+    await trackUser(response);
+    if (response.ok && response.headers.get(USER_HEADER)) {
+      await (await caches.open(cacheName)).put(event.request, response.clone());
+    }
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(update.catch(() => {}));
+    return cached;
+  }
+  return update;
+}
+
+async function networkFirst(request, cacheName) {
+  const cache = await caches.open(cacheName);
+  const network = fetch(request).then(async (response) => {
+    await trackUser(response);
+    // Redirection (vers /login…) : ne pas mettre en cache sous l'URL demandée
+    if (response.ok && !response.redirected && response.headers.get(USER_HEADER)) {
+      await (await caches.open(cacheName)).put(request, response.clone());
+    }
+    return response;
+  });
+  network.catch(() => {});
+  // Réseau lent (métro) : la page en cache après PAGE_TIMEOUT_MS, le cache est mis à jour ensuite
+  const timeout = new Promise((resolve) => setTimeout(resolve, PAGE_TIMEOUT_MS));
+  try {
+    const response = await Promise.race([network, timeout.then(() => matchForUser(cache, request))]);
+    if (response) return response;
+    return await network;
+  } catch (error) {
+    return (await matchForUser(cache, request)) || (await caches.match(OFFLINE_URL)) || Response.error();
+  }
+}
+
+async function sendAndInvalidate(request) {
+  const response = await fetch(request);
+  // Modification (suppression, favoris, profil…) : les réponses d'API en cache sont périmées
+  if (response.ok || response.type === 'opaqueredirect') await caches.delete(API_CACHE);
+  return response;
+}
+
+async function logout(request) {
+  // Données personnelles : rien ne reste sur l'appareil après la déconnexion
+  await forgetUser();
+  await outboxClear();
+  await notifyClients();
+  return fetch(request);
+}
+
+// ========================================
+// COMPTE DE LA SESSION
+// ========================================
+
+// Mémorisé dans IndexedDB : le navigateur arrête le service worker entre deux événements
+let currentUser;
+
+async function getUser() {
+  if (currentUser === undefined) currentUser = (await metaGet('user')) || '';
+  return currentUser;
+}
+
+async function setUser(user) {
+  if (user === await getUser()) return;
+  // Autre compte, ou session terminée : pages et réponses d'API de l'ancien compte effacées
+  const names = await caches.keys();
+  await Promise.all(names.filter((name) => name !== STATIC_CACHE).map((name) => caches.delete(name)));
+  currentUser = user;
+  await metaPut('user', user);
+}
+
+const forgetUser = () => setUser('');
+
+async function trackUser(response) {
+  // Réponse de l'application (pas une redirection opaque) : compte de la session
+  if (response.type === 'basic') await setUser(response.headers.get(USER_HEADER) || '');
+}
+
+async function matchForUser(cache, request) {
+  // Réponse en cache seulement si elle a été servie au compte courant
+  const cached = await cache.match(request);
+  const user = await getUser();
+  return cached && user && cached.headers.get(USER_HEADER) === user ? cached : undefined;
+}
+
+// ========================================
+// BOÎTE D'ENVOI (INDEXEDDB)
+// ========================================
+
+function openDatabase() {
+  return new Promise((resolve, reject) => {
+    // Version 2 : magasin « meta » (compte de la session)
+    const open = indexedDB.open('nutristep', 2);
+    open.onupgradeneeded = () => {
+      const db = open.result;
+      if (!db.objectStoreNames.contains('outbox')) db.createObjectStore('outbox', { keyPath: 'id', autoIncrement: true });
+      if (!db.objectStoreNames.contains('meta')) db.createObjectStore('meta');
+    };
+    open.onsuccess = () => resolve(open.result);
+    open.onerror = () => reject(open.error);
+  });
+}
+
+async function storeTransaction(storeName, mode, action) {
+  const db = await openDatabase();
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction(storeName, mode);
+    const request = action(tx.objectStore(storeName));
+    tx.oncomplete = () => resolve(request && request.result);
+    tx.onerror = () => reject(tx.error);
+  });
+}
+
+const metaGet = (key) => storeTransaction('meta', 'readonly', (store) => store.get(key));
+const metaPut = (key, value) => storeTransaction('meta', 'readwrite', (store) => store.put(value, key));
+const outboxAdd = (entry) => storeTransaction('outbox', 'readwrite', (store) => store.add(entry));
+const outboxAll = () => storeTransaction('outbox', 'readonly', (store) => store.getAll());
+const outboxDelete = (id) => storeTransaction('outbox', 'readwrite', (store) => store.delete(id));
+const outboxClear = () => storeTransaction('outbox', 'readwrite', (store) => store.clear());
+
+async function sendOrQueue(request) {
+  const entry = {
+    url: request.url,
+    method: request.method,
+    contentType: request.headers.get('Content-Type'),
+    body: await request.clone().arrayBuffer(),
+    queuedAt: new Date().toISOString(),
+    // Rejouée seulement pour ce compte
+    user: await getUser(),
+  };
+  try {
+    const response = await fetch(request);
+    await trackUser(response);
+    if (response.ok || response.type === 'opaqueredirect') await caches.delete(API_CACHE);
+    return response;
+  } catch (error) {
+    // Hors ligne : la requête n'a pas atteint le serveur, elle sera rejouée
+    await outboxAdd(entry);
+    if (self.registration.sync) {
+      await self.registration.sync.register('outbox').catch(() => {});
+    }
+    await notifyClients();
+    if (request.mode === 'navigate') {
+      // Formulaire : retour à la page d'origine (servie depuis le cache)
+      const referrer = request.referrer && new URL(request.referrer);
+      const back = referrer && referrer.origin === self.location.origin ? referrer.pathname + referrer.search : '/dashboard';
+      return Response.redirect(back, 303);
+    }
+    return new Response(JSON.stringify({ success: true, queued: true }), {
+      status: 202,
+      headers: { 'Content-Type': 'application/json' },
+    });
+  }
+}
+
+let flushing = null;
+
+function flushOutbox() {
+  // Une seule synchronisation à la fois (Background Sync et message « online » simultanés)
+  if (!flushing) {
+    flushing = replayOutbox().finally(() => { flushing = null; });
+  }
+  return flushing;
+}
+
+async function replayOutbox() {
+  const user = await getUser();
+  // Saisies d'un autre compte (ou d'avant la connexion) : gardées, jamais rejouées ici
+  const entries = user ? (await outboxAll()).filter((entry) => entry.user === user) : [];
+  let synced = 0;
+  let duplicates = 0;
+  for (const entry of entries) {
+    const headers = { 'X-Queued-At': entry.queuedAt, 'X-Queued-User': entry.user };
+    if (entry.contentType) headers['Content-Type'] = entry.contentType;
+    // Erreur réseau : l'exception interrompt la synchronisation, retentée plus tard
+    const response = await fetch(entry.url, {
+      method: entry.method, headers, body: entry.body, credentials: 'same-origin',
+    });
+    // Session expirée : garder les saisies jusqu'à la prochaine connexion
+    if (response.redirected && new URL(response.url).pathname === LOGIN_PATH) break;
+    if (response.status >= 500) throw new Error(`Synchronisation : erreur ${response.status}`);
+    if (response.status === 409) {
+      const { error } = await response.json().catch(() => ({}));
+      // La session a changé de compte depuis la dernière réponse : rien n'est rejoué
+      if (error === 'other_user') {
+        await trackUser(response);
+        break;
+      }
+      // Déjà enregistrée (poids du jour) : retirée, signalée à la page
+      if (error === 'duplicate') {
+        await outboxDelete(entry.id);
+        duplicates += 1;
+        continue;
+      }
+    }
+    // Succès ou saisie refusée (4xx, inutile de la rejouer)
+    await outboxDelete(entry.id);
+    synced += 1;
+  }
+  if (synced) await caches.delete(API_CACHE);
+  await notifyClients(synced, duplicates);
+}
+
+async function notifyClients(synced = 0, duplicates = 0) {
+  const user = await getUser();
+  const pending = (await outboxAll()).filter((entry) => entry.user === user).length;
+  const clients = await self.clients.matchAll({ type: 'window' });
+  clients.forEach((client) => client.postMessage({ type: 'outbox', pending, synced, duplicates }));
+}
+
+self.addEventListener('sync', (event) => {
+  if (event.tag === 'outbox') event.waitUntil(flushOutbox());
+});
+
+self.addEventListener('message', (event) => {
+  // Page chargée ou réseau revenu (navigateurs sans Background Sync)
+  if (event.data && event.data.type === 'flush-outbox') {
+    event.waitUntil(flushOutbox().catch(() => notifyClients()));
+  }
+});
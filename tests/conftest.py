@@ -0,0 +1,75 @@
+"""Fixtures des tests : application sur une base SQLite temporaire, utilisateur connecté.
+
+Lancer depuis la racine du dépôt : python -m pytest tests
+"""
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Fixture query_budget ; chargé avant l'application pour que pytest réécrive ses assertions
+pytest_plugins = ['querycheck']
+
+
+def clear_caches():
+    """Caches de processus : les identifiants repartent de 1 à chaque base de test."""
+    from blueprints import api, meals, weight
+    for cache in (meals.fragment_cache, weight.trend_cache, weight.projection_cache, api.analytics_cache):
+        cache.clear()
+
+
+@pytest.fixture
+def app(tmp_path):
+    from app import create_app, create_tables
+    from models import db
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'QUERY_CHECK': True,
+        'COMPRESSION': False,
+    })
+    with app.app_context():
+        create_tables()
+    clear_caches()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def user(app):
+    """Utilisateur avec trois semaines de poids, de pas et de repas ; retourne son id."""
+    from models import ActivityEntry, MealEntry, User, WeightEntry, db, refresh_daily_summaries
+    today = datetime.utcnow().date()
+    with app.app_context():
+        user = User(username='test', email='test@example.com', height=175, gender='M',
+                    birth_date=date(1990, 1, 1), target_weight=75)
+        db.session.add(user)
+        db.session.flush()
+        for offset in range(21):
+            day = today - timedelta(days=offset)
+            db.session.add(WeightEntry(user_id=user.id, date=day, weight=80 + offset * 0.1))
+            db.session.add(ActivityEntry(user_id=user.id, date=day, activity_type='Pas',
+                                         duration=60, steps=8000))
+            for meal_type, foods in (('breakfast', ['pain', 'café']),
+                                     ('lunch', ['riz', 'poulet', f'fruit {offset % 5}']),
+                                     ('dinner', ['soupe'])):
+                meal = MealEntry(user_id=user.id, date=day, meal_type=meal_type)
+                meal.set_foods_list(foods)
+                db.session.add(meal)
+        db.session.flush()
+        refresh_daily_summaries(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user
+        session['username'] = 'test'
+    return client
@@ -0,0 +1,23 @@
+"""Paramètres des routes de l'API."""
+import pytest
+
+
+@pytest.mark.parametrize('limit, expected', [('0', 1), ('-5', 1), ('3', 3)])
+def test_food_analytics_limit_clamped(client, limit, expected):
+    response = client.get(f'/api/food-analytics?limit={limit}')
+    assert response.status_code == 200
+    assert len(response.get_json()['top_foods']) == expected
+
+
+def test_food_analytics_limit_capped(client, monkeypatch):
+    from blueprints import api
+    limits = []
+    monkeypatch.setattr(api, 'compute_food_analytics',
+                        lambda user_id, start, end, limit: limits.append(limit) or {})
+    assert client.get('/api/food-analytics?limit=500').status_code == 200
+    assert limits == [50]
+
+
+@pytest.mark.parametrize('limit', ['abc', '2.5', ''])
+def test_food_analytics_limit_invalid(client, limit):
+    assert client.get(f'/api/food-analytics?limit={limit}').status_code == 400
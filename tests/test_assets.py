@@ -0,0 +1,45 @@
+"""Bibliothèques tierces : vérification du SHA-256 avant écriture."""
+import base64
+import hashlib
+import io
+import json
+import os
+
+import pytest
+
+import assets
+
+CONTENT = b'/* Chart.js */' + b'x' * 2000
+
+
+@pytest.fixture
+def cdn(monkeypatch):
+    """CDN simulé : métadonnées jsDelivr (SHA-256 de CONTENT) et fichier servi."""
+    served = {'body': CONTENT}
+    metadata = {'files': [{'name': '/dist/chart.umd.min.js',
+                           'hash': base64.b64encode(hashlib.sha256(CONTENT).digest()).decode()}]}
+
+    def urlopen(url, timeout=None):
+        return io.BytesIO(json.dumps(metadata).encode() if 'data.jsdelivr' in url else served['body'])
+
+    monkeypatch.setattr(assets.urllib.request, 'urlopen', urlopen)
+    monkeypatch.setattr(assets, 'VENDOR_SHA256', {})
+    return served
+
+
+def test_vendor_written_when_hash_matches(tmp_path, cdn):
+    assets.fetch_vendor(tmp_path, echo=lambda message: None)
+    assert (tmp_path / 'vendor' / 'chart.umd.min.js').read_bytes() == CONTENT
+
+
+def test_vendor_not_written_on_mismatch(tmp_path, cdn):
+    cdn['body'] = b'altered'
+    with pytest.raises(ValueError):
+        assets.fetch_vendor(tmp_path, echo=lambda message: None)
+    assert not os.path.exists(tmp_path / 'vendor' / 'chart.umd.min.js')
+
+
+def test_pinned_hash_takes_precedence(tmp_path, cdn, monkeypatch):
+    monkeypatch.setattr(assets, 'VENDOR_SHA256', {'vendor/chart.umd.min.js': '0' * 64})
+    with pytest.raises(ValueError):
+        assets.fetch_vendor(tmp_path, echo=lambda message: None)
@@ -0,0 +1,96 @@
+"""Rotation des archives de sauvegarde et restauration d'une archive utilisateur."""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import backup
+
+
+def make_archives(folder, kinds):
+    """Archives vides, une par heure ; kinds : 'f' (complète) ou 'i' (incrémentale)."""
+    names = []
+    started = datetime(2026, 1, 1)
+    for index, kind in enumerate(kinds):
+        stamp = (started + timedelta(hours=index)).strftime('%Y%m%d-%H%M%S')
+        name = f"{backup.BACKUP_PREFIX}{stamp}{backup.INCREMENTAL_SUFFIX if kind == 'i' else ''}.zip"
+        open(os.path.join(folder, name), 'wb').close()
+        names.append(name)
+    return names
+
+
+def test_rotate_fewer_archives_than_keep(tmp_path):
+    names = make_archives(tmp_path, 'f' * 20)
+    assert backup.rotate_backups(tmp_path, keep=30) == []
+    assert sorted(os.listdir(tmp_path)) == names
+
+
+def test_rotate_exactly_keep(tmp_path):
+    names = make_archives(tmp_path, 'f' * 5)
+    assert backup.rotate_backups(tmp_path, keep=5) == []
+    assert sorted(os.listdir(tmp_path)) == names
+
+
+def test_rotate_keeps_most_recent(tmp_path):
+    names = make_archives(tmp_path, 'f' * 8)
+    assert backup.rotate_backups(tmp_path, keep=3) == names[:5]
+    assert sorted(os.listdir(tmp_path)) == names[5:]
+
+
+def test_rotate_protects_last_full_and_its_incrementals(tmp_path):
+    # Seule la dernière complète permet de restaurer les incrémentales suivantes
+    names = make_archives(tmp_path, 'ff' + 'i' * 6)
+    assert backup.rotate_backups(tmp_path, keep=3) == names[:1]
+    assert sorted(os.listdir(tmp_path)) == names[1:]
+
+
+def test_rotate_disabled(tmp_path):
+    names = make_archives(tmp_path, 'f' * 4)
+    assert backup.rotate_backups(tmp_path, keep=0) == []
+    assert sorted(os.listdir(tmp_path)) == names
+
+
+# ----------------------------------------
+# RESTAURATION D'UNE ARCHIVE UTILISATEUR
+# ----------------------------------------
+
+@pytest.fixture
+def archive(client, tmp_path, monkeypatch):
+    """Export /export/archive de l'utilisateur de test ; photos restaurées dans tmp_path."""
+    import app as app_module
+    monkeypatch.setattr(app_module, 'UPLOAD_FOLDER', str(tmp_path / 'photos'))
+    response = client.get('/export/archive')
+    assert response.status_code == 200
+    path = tmp_path / 'archive.zip'
+    path.write_bytes(response.data)
+    return str(path)
+
+
+def user_counts(email):
+    from models import EXPORT_TABLES, User
+    user = User.query.filter_by(email=email).one()
+    return {name: model.query.filter_by(user_id=user.id).count() for name, model in EXPORT_TABLES.items()}
+
+
+def test_restore_round_trip(app, archive):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['restore', archive, '--email', 'copie@example.com'])
+    assert result.exit_code == 0, result.output
+    assert 'Compte créé' in result.output
+    with app.app_context():
+        from models import User
+        restored = User.query.filter_by(email='copie@example.com').one()
+        assert restored.username == 'test1' and restored.target_weight == 75
+        assert user_counts('copie@example.com') == user_counts('test@example.com')
+
+
+def test_restore_is_idempotent(app, archive):
+    runner = app.test_cli_runner()
+    runner.invoke(args=['restore', archive, '--email', 'copie@example.com'])
+    with app.app_context():
+        first = user_counts('copie@example.com')
+    result = runner.invoke(args=['restore', archive, '--email', 'copie@example.com'])
+    assert result.exit_code == 0, result.output
+    assert 'Total : 0 lignes' in result.output
+    with app.app_context():
+        assert user_counts('copie@example.com') == first
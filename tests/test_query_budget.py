@@ -0,0 +1,48 @@
+"""Budgets de requêtes SQL des pages chargées (régressions N+1).
+
+Chaque page est rendue sans cache : trois semaines de données ne doivent pas
+coûter plus de requêtes qu'une seule journée.
+"""
+import pytest
+
+from querycheck import assert_max_queries
+
+# Une même requête exécutée 5 fois dans la page : N+1 probable
+REPEAT_THRESHOLD = 5
+
+
+def test_dashboard(client, query_budget):
+    with query_budget(14, repeat_threshold=REPEAT_THRESHOLD):
+        response = client.get('/dashboard')
+    assert response.status_code == 200
+
+
+def test_meals_calendar(client, query_budget):
+    with query_budget(4, repeat_threshold=REPEAT_THRESHOLD):
+        response = client.get('/meals')
+    assert response.status_code == 200
+
+
+def test_meals_recap(client, query_budget):
+    with query_budget(7, repeat_threshold=REPEAT_THRESHOLD):
+        response = client.get('/meals/recap')
+    assert response.status_code == 200
+
+
+def test_meals_recap_cached(client, query_budget):
+    """Deuxième affichage : fragment servi par le cache, sans requête sur les repas."""
+    client.get('/meals/recap')
+    with query_budget(2):
+        response = client.get('/meals/recap')
+    assert response.status_code == 200
+
+
+def test_budget_detects_n_plus_one(app, user):
+    """Le budget échoue sur un chargement paresseux par repas."""
+    from models import MealEntry
+    with app.app_context():
+        meals = MealEntry.query.filter_by(user_id=user).all()
+        with pytest.raises(AssertionError, match='N\\+1'):
+            with assert_max_queries(1000, repeat_threshold=REPEAT_THRESHOLD):
+                for meal in meals:
+                    meal.food_links
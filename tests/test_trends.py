@@ -0,0 +1,96 @@
+"""Tendance du poids (moteur incrémental) et projection vers l'objectif."""
+from datetime import date, timedelta
+
+import pytest
+
+import trends
+
+START = date(2026, 1, 1)
+
+
+def points(start_weight, weekly_rate, days=42, every=2):
+    """Points de tendance d'une évolution linéaire, une pesée tous les `every` jours."""
+    rows = [(START + timedelta(days=day), round(start_weight + weekly_rate * day / 7, 2))
+            for day in range(0, days + 1, every)]
+    return trends.compute_trend(rows).points
+
+
+def test_trend_empty():
+    trend = trends.compute_trend([])
+    assert trend.summary() is None
+    assert trend.series()['dates'] == []
+
+
+def test_trend_same_day_last_weighing_wins():
+    trend = trends.compute_trend([(START, 80.0), (START, 79.0), (START + timedelta(days=1), 79.0)])
+    assert [p['weight'] for p in trend.points] == [79.0, 79.0]
+    assert trend.summary()['count'] == 2
+
+
+def test_trend_catches_up_over_gaps():
+    # Trois jours sans pesée : lissage de trois jours d'un coup
+    trend = trends.compute_trend([(START, 80.0), (START + timedelta(days=3), 70.0)])
+    expected = 80 + (1 - (1 - trends.ALPHA) ** 3) * (70 - 80)
+    assert trend.points[-1]['trend'] == round(expected, 2)
+
+
+def test_trend_rolling_windows_and_rate():
+    trend = trends.compute_trend([(START + timedelta(days=day), 80.0 + day) for day in range(10)])
+    first, last = trend.points[0], trend.points[-1]
+    assert first['weekly_rate'] is None
+    # Fenêtre de 7 jours : jours 3 à 9 ; 30 jours : tout l'historique
+    assert last['avg_7'] == 86.0
+    assert last['avg_30'] == 84.5
+    assert last['weekly_rate'] > 0
+
+
+def test_trend_rejects_out_of_order():
+    trend = trends.compute_trend([(START, 80.0), (START + timedelta(days=2), 79.0)])
+    with pytest.raises(ValueError):
+        trend.update(START + timedelta(days=1), 79.5)
+    with pytest.raises(ValueError):
+        trend.update(START + timedelta(days=2), 79.5)
+
+
+def test_trend_copy_is_independent():
+    trend = trends.compute_trend([(START + timedelta(days=day), 80.0) for day in range(10)])
+    clone = trend.copy()
+    clone.update(START + timedelta(days=10), 70.0)
+    assert len(trend.points) == 10 and trend.last_date == START + timedelta(days=9)
+    assert trend.points[-1]['avg_7'] == 80.0
+    # Même résultat qu'un calcul complet
+    full = trends.compute_trend([(START + timedelta(days=day), 80.0) for day in range(10)]
+                                + [(START + timedelta(days=10), 70.0)])
+    assert clone.points == full.points
+
+
+def test_projection_insufficient_data():
+    assert trends.project_goal([], 70)['status'] == 'insufficient_data'
+    assert trends.project_goal(points(80, -0.5, days=4), 70)['status'] == 'insufficient_data'
+
+
+def test_projection_on_track():
+    result = trends.project_goal(points(80, -0.5), 75)
+    assert result['status'] == 'on_track'
+    # 77 kg au dernier jour, 2 kg à 0,5 kg/semaine : quatre semaines
+    assert abs((result['eta'] - (START + timedelta(days=42))).days - 28) <= 2
+    assert result['eta_earliest'] <= result['eta']
+
+
+def test_projection_reached_when_crossing_down():
+    assert trends.project_goal(points(76, -0.35), 75)['status'] == 'reached'
+
+
+def test_projection_regain_past_target_is_not_reached():
+    # 74 → 76 kg : cible franchie en remontant, il reste des kg à perdre
+    assert trends.project_goal(points(74, 0.35), 75)['status'] == 'wrong_direction'
+
+
+def test_projection_wrong_direction():
+    assert trends.project_goal(points(80, 0.3), 75)['status'] == 'wrong_direction'
+
+
+def test_projection_beyond_horizon():
+    result = trends.project_goal(points(100, -0.01), 60)
+    assert result['status'] == 'beyond_horizon'
+    assert 'eta' not in result
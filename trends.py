@@ -0,0 +1,216 @@
+"""Tendance du poids : moyenne exponentielle lissée, moyennes glissantes
+7/30 jours et rythme hebdomadaire.
+
+Le moteur est incrémental : chaque pesée (dans l'ordre chronologique)
+est intégrée en temps constant, sans relire l'historique.
+"""
+from collections import deque
+from datetime import timedelta
+
+# Poids d'une pesée dans la tendance (≈ lissage sur une dizaine de jours)
+ALPHA = 0.1
+ROLLING_WINDOWS = (7, 30)
+RATE_WINDOW_DAYS = 7
+
+
+class WeightTrend:
+    """État de la tendance d'un utilisateur, alimenté pesée par pesée."""
+
+    def __init__(self, alpha=ALPHA):
+        self.alpha = alpha
+        self.points = []
+        self._trend = None
+        self._last_date = None
+        self._windows = {days: (deque(), [0.0]) for days in ROLLING_WINDOWS}
+        self._rate_anchor = deque()
+
+    @property
+    def last_date(self):
+        return self._last_date
+
+    def update(self, date, weight):
+        """Intègre une pesée postérieure à la précédente et retourne son point."""
+        if self._last_date is not None and date <= self._last_date:
+            raise ValueError('Les pesées doivent arriver dans l\'ordre chronologique')
+
+        if self._trend is None:
+            self._trend = weight
+        else:
+            # Jours sans pesée : le lissage « rattrape » l'écart
+            gap = (date - self._last_date).days
+            alpha = 1 - (1 - self.alpha) ** gap
+            self._trend += alpha * (weight - self._trend)
+        self._last_date = date
+
+        point = {'date': date, 'weight': weight, 'trend': round(self._trend, 2)}
+        for days, (window, total) in self._windows.items():
+            window.append((date, weight))
+            total[0] += weight
+            limit = date - timedelta(days=days)
+            while window[0][0] <= limit:
+                total[0] -= window.popleft()[1]
+            point[f'avg_{days}'] = round(total[0] / len(window), 2)
+
+        # Point d'ancrage : dernière tendance connue il y a au moins 7 jours
+        self._rate_anchor.append((date, self._trend))
+        limit = date - timedelta(days=RATE_WINDOW_DAYS)
+        while len(self._rate_anchor) > 1 and self._rate_anchor[1][0] <= limit:
+            self._rate_anchor.popleft()
+        anchor_date, anchor_trend = self._rate_anchor[0]
+        span = (date - anchor_date).days
+        point['weekly_rate'] = round((self._trend - anchor_trend) / span * 7, 3) if span else None
+
+        self.points.append(point)
+        return point
+
+    def copy(self):
+        """Copie indépendante : les points (jamais modifiés) sont partagés, pas les listes."""
+        clone = WeightTrend(self.alpha)
+        clone.points = list(self.points)
+        clone._trend = self._trend
+        clone._last_date = self._last_date
+        clone._windows = {days: (deque(window), [total[0]]) for days, (window, total) in self._windows.items()}
+        clone._rate_anchor = deque(self._rate_anchor)
+        return clone
+
+    def extend(self, rows):
+        for date, weight in rows:
+            self.update(date, weight)
+        return self
+
+    def summary(self):
+        """Dernier point de la tendance (None sans pesée)."""
+        if not self.points:
+            return None
+        return dict(self.points[-1], count=len(self.points))
+
+    def series(self, start=None):
+        """Séries en colonnes (dates ISO) à partir de start."""
+        points = [p for p in self.points if start is None or p['date'] >= start]
+        return {
+            'dates': [p['date'].isoformat() for p in points],
+            'weights': [p['weight'] for p in points],
+            'trend': [p['trend'] for p in points],
+            'avg_7': [p['avg_7'] for p in points],
+            'avg_30': [p['avg_30'] for p in points],
+            'weekly_rate': [p['weekly_rate'] for p in points],
+        }
+
+
+def compute_trend(rows):
+    """Tendance complète à partir de lignes (date, poids) triées par date.
+
+    Deux pesées le même jour : la dernière l'emporte.
+    """
+    by_date = {}
+    for date, weight in rows:
+        by_date[date] = weight
+    return WeightTrend().extend(by_date.items())
+
+
+# ----------------------------------------
+# PROJECTION VERS L'OBJECTIF
+# ----------------------------------------
+
+PROJECTION_WINDOW_DAYS = 60
+PROJECTION_MIN_POINTS = 5
+PROJECTION_HORIZON_DAYS = 5 * 365
+# Quantile normal pour un intervalle de confiance à 90 %
+CONFIDENCE_Z = 1.645
+
+
+def theil_sen(xs, ys, z=CONFIDENCE_Z):
+    """Pente médiane des paires (robuste aux pesées aberrantes) et bornes de Sen.
+
+    Retourne (pente, ordonnée, pente basse, pente haute).
+    """
+    n = len(xs)
+    slopes = sorted(
+        (ys[j] - ys[i]) / (xs[j] - xs[i])
+        for i in range(n) for j in range(i + 1, n) if xs[j] != xs[i]
+    )
+    count = len(slopes)
+    mid = count // 2
+    slope = slopes[mid] if count % 2 else (slopes[mid - 1] + slopes[mid]) / 2
+    residuals = sorted(y - slope * x for x, y in zip(xs, ys))
+    half = n // 2
+    intercept = residuals[half] if n % 2 else (residuals[half - 1] + residuals[half]) / 2
+
+    # Rangs de l'intervalle d'après la variance de la statistique de Kendall
+    spread = z * (n * (n - 1) * (2 * n + 5) / 18) ** 0.5
+    low_index = max(0, int((count - spread) / 2))
+    high_index = min(count - 1, int((count + spread) / 2))
+    return slope, intercept, slopes[low_index], slopes[high_index]
+
+
+def _eta_days(current, target, slope):
+    """Jours avant que la droite atteigne la cible (None si elle s'en éloigne)."""
+    if slope == 0 or (target - current) / slope < 0:
+        return None
+    return (target - current) / slope
+
+
+def _eta(current, target, slope, last_date):
+    """Date où la droite atteint la cible (None si jamais ou au-delà de l'horizon)."""
+    days = _eta_days(current, target, slope)
+    if days is None or days > PROJECTION_HORIZON_DAYS:
+        return None
+    return last_date + timedelta(days=round(days))
+
+
+def project_goal(points, target, window_days=PROJECTION_WINDOW_DAYS):
+    """Date estimée d'atteinte du poids cible, ajustée sur les dernières pesées.
+
+    `points` : points de WeightTrend (ordre chronologique).
+    """
+    result = {'status': 'insufficient_data', 'target': target, 'window_days': window_days}
+    if not points or target is None:
+        return result
+
+    last_date = points[-1]['date']
+    start = last_date - timedelta(days=window_days)
+    recent = [p for p in points if p['date'] > start]
+    result['points'] = len(recent)
+    if len(recent) < PROJECTION_MIN_POINTS or (last_date - recent[0]['date']).days < 7:
+        return result
+
+    xs = [(p['date'] - recent[0]['date']).days for p in recent]
+    ys = [p['weight'] for p in recent]
+    slope, intercept, slope_low, slope_high = theil_sen(xs, ys)
+    current = intercept + slope * xs[-1]
+    result.update({
+        'current': round(current, 2),
+        'slope_per_week': round(slope * 7, 3),
+        'slope_per_week_bounds': [round(slope_low * 7, 3), round(slope_high * 7, 3)],
+    })
+
+    # Atteint : poids actuel sur la cible, ou cible franchie pendant la fenêtre en
+    # descendant, avec la dernière pesée sur ou sous la cible (comme le tableau de bord :
+    # dernière pesée - cible > 0, il reste des kg à perdre). Une reprise au-delà de la
+    # cible n'est pas un objectif atteint
+    remaining = points[-1]['weight'] - target
+    crossed_down = ys[0] > target > current
+    if abs(target - current) < 0.1 or (crossed_down and remaining <= 0):
+        result['status'] = 'reached'
+        return result
+
+    # Sens à suivre d'après le poids actuel : la tendance s'en éloigne, ou est trop lente
+    days = _eta_days(current, target, slope)
+    if days is None:
+        result['status'] = 'wrong_direction'
+        return result
+    if days > PROJECTION_HORIZON_DAYS:
+        result['status'] = 'beyond_horizon'
+        return result
+    eta = _eta(current, target, slope, last_date)
+
+    # La pente la plus favorable donne la date la plus proche
+    bound_etas = [_eta(current, target, s, last_date) for s in (slope_low, slope_high)]
+    reachable = [d for d in bound_etas if d is not None]
+    result.update({
+        'status': 'on_track',
+        'eta': eta,
+        'eta_earliest': min(reachable) if reachable else eta,
+        'eta_latest': max(reachable) if len(reachable) == 2 else None,
+    })
+    return result